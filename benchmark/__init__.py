@@ -0,0 +1,3 @@
+"""
+Benchmarks of the simulator and schedulers, run from the repository root, e.g. python -m benchmark.engine_throughput
+"""
@@ -0,0 +1,39 @@
+"""
+Throughput of the asynchronous actor/learner training with increasing numbers of actor processes
+Transitions per second should scale with the actors until the learner or the CPU cores are saturated
+
+usage: python -m benchmark.actor_learner_scaling -actors 1 2 4 8 -duration 20
+"""
+
+import argparse
+import torch
+from tabulate import tabulate
+
+from src.DRL.actor_learner import AsyncTrainer
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling of actor/learner training with actor processes')
+    parser.add_argument('-actors', default=[1, 2, 4], nargs='+', type=int, help='Numbers of actor processes')
+    parser.add_argument('-envs_per_actor', default=4, type=int, help='Sub-environments of each actor')
+    parser.add_argument('-duration', default=20, type=float, help='Seconds of training per measurement')
+    parser.add_argument('-m_no', default=10, type=int, help='Number of machines')
+    parser.add_argument('-span', default=2000, type=int, help='Length of simulation of an episode')
+    parser.add_argument('-engine', default='heap', choices=['simpy', 'heap'], help='Simulation engine')
+    args = parser.parse_args()
+    silence_logging()
+    torch.set_num_threads(1)
+
+    rows = [["actors", "transitions", "transitions/s", "updates/s", "weight versions", "loss"]]
+    for num_actors in args.actors:
+        trainer = AsyncTrainer(num_actors, envs_per_actor = args.envs_per_actor, engine = args.engine,
+                               **base_config(m_no = args.m_no, span = args.span, E_utliz = 0.9))
+        stats = trainer.run(args.duration)
+        rows.append([num_actors, stats['transitions'], round(stats['transitions/s']), round(stats['updates/s'], 1),
+                     stats['weight_version'], round(stats['loss'], 4)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
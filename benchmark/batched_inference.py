@@ -0,0 +1,50 @@
+"""
+Latency of policy inference of the DRL_scheduler on CPU, one forward pass per decision against one batched forward pass
+over all decisions raised at the same time (see src.DRL.broker.DecisionBroker)
+Both modes pick the same jobs, so the simulations are identical and only the inference time differs
+
+usage: python -m benchmark.batched_inference -m_no 10 50 -span 2000
+"""
+
+import argparse
+import time
+import torch
+from tabulate import tabulate
+
+from src.DRL.policy import QueuePolicy
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-decision against batched policy inference')
+    parser.add_argument('-m_no', default=[10, 50], nargs='+', type=int, help='Numbers of machines')
+    parser.add_argument('-span', default=2000, type=int, help='Length of simulation')
+    parser.add_argument('-max_queue', default=32, type=int, help='Padded queue length of observation')
+    parser.add_argument('-engine', default='heap', choices=['simpy', 'heap'], help='Simulation engine')
+    args = parser.parse_args()
+    silence_logging()
+    torch.set_num_threads(1)
+    torch.manual_seed(1)
+    policy = QueuePolicy().eval()
+
+    rows = [["machines", "mode", "decisions", "forward passes", "decisions/pass", "inference T", "us/decision", "wall T", "mean tardiness"]]
+    for m_no in args.m_no:
+        for batched in (False, True):
+            spf = Shopfloor(engine = args.engine, **base_config(
+                m_no = m_no, span = args.span, E_utliz = 0.9, sqc_method = SequencingMethod.DRL_scheduler,
+                policy = policy, max_queue = args.max_queue, batched_inference = batched, headless = True, quiet = True))
+            _start_T = time.perf_counter()
+            spf.run_simulation()
+            wall_T = time.perf_counter() - _start_T
+            broker = spf.broker
+            rows.append([m_no, "batched" if batched else "per-decision", broker.decision_cnt, broker.forward_cnt,
+                         round(broker.decision_cnt / broker.forward_cnt, 2), round(broker.inference_T, 2),
+                         round(broker.inference_T / broker.decision_cnt * 1e6, 1), round(wall_T, 2),
+                         round(spf.performance()['mean_tardiness'], 3)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
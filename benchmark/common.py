@@ -0,0 +1,27 @@
+"""
+Shared settings of the benchmark scripts
+"""
+
+import logging
+from src.scheduler.sequencing_rule import SequencingMethod
+
+
+# same defaults as main.py, with console stream and Gantt chart disabled
+BASE_CONFIG = {
+    'm_no': 5, 'seed': 1, 'span': 1000, 'E_utliz': 0.6,
+    'due_tightness': 2, 'pt_range': [1, 10], 'processing_time_variability': False, 'pt_cv': 0.1,
+    'machine_breakdown': True, 'MTBF': 50, 'random_MTBF': True, 'MTTR': 10, 'random_MTTR': False,
+    'draw_gantt': 0, 'save_gantt': False, 'stream': False,
+    'sqc_method': SequencingMethod.FIFO,
+}
+
+
+def base_config(**kwargs) -> dict:
+    config = dict(BASE_CONFIG)
+    config.update(kwargs)
+    return config
+
+
+def silence_logging():
+    # drop all records before they reach the handlers
+    logging.disable(logging.CRITICAL)
@@ -0,0 +1,71 @@
+"""
+Latency of a single sequencing decision against the queue length
+"list" rebuilds the arrays from the job instances on every decision (the previous implementation of Slack and CR),
+"features" reads the machine's incrementally maintained queue feature arrays, whose upkeep is reported as "push + pop"
+
+usage: python -m benchmark.decision_latency -lengths 2 8 32 128 512
+"""
+
+import argparse
+import numpy as np
+import timeit
+from tabulate import tabulate
+
+from src.scheduler.queue_features import QueueFeatures
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.scenario import Scenario
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def slack_from_list(jobs):
+    s = np.array([j.due for j in jobs]) - jobs[0].env.now
+    return np.argmin(s)
+
+
+def cr_from_list(jobs):
+    ttd = np.array([j.due for j in jobs]) - jobs[0].env.now
+    sum_pt = np.array([sum(j.remaining_pt) for j in jobs])
+    return np.argmin(ttd / sum_pt)
+
+
+def per_call_us(func, repeat:int) -> float:
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequencing decision latency against queue length')
+    parser.add_argument('-m_no', default=10, type=int, help='Number of machines, i.e. operations per job')
+    parser.add_argument('-lengths', default=[2, 8, 32, 128, 512], nargs='+', type=int, help='Queue lengths')
+    parser.add_argument('-repeat', default=2000, type=int, help='Decisions per measurement')
+    args = parser.parse_args()
+    silence_logging()
+
+    rows = [["queue", "Slack list us", "Slack features us", "CR list us", "CR features us",
+             "ATC us", "COVERT us", "MOD us", "push + pop us"]]
+    for length in args.lengths:
+        # jobs are replayed from a scenario, so they can be created without running the simulation
+        scenario = Scenario.generate(**base_config(m_no = args.m_no, span = length * 20, machine_breakdown = False))
+        spf = Shopfloor(**base_config(scenario = scenario))
+        jobs = []
+        for _ in range(length):
+            jobs.append(spf.narrator.create_job())
+            spf.narrator.j_idx += 1
+        features = QueueFeatures.from_jobs(jobs)
+        def upkeep():
+            features.push(jobs[0])
+            features.pop(0)
+        rows.append([length,
+            round(per_call_us(lambda: slack_from_list(jobs), args.repeat), 2),
+            round(per_call_us(lambda: SequencingMethod.Slack(jobs, features = features), args.repeat), 2),
+            round(per_call_us(lambda: cr_from_list(jobs), args.repeat), 2),
+            round(per_call_us(lambda: SequencingMethod.CR(jobs, features = features), args.repeat), 2),
+            round(per_call_us(lambda: SequencingMethod.ATC(jobs, features = features), args.repeat), 2),
+            round(per_call_us(lambda: SequencingMethod.COVERT(jobs, features = features), args.repeat), 2),
+            round(per_call_us(lambda: SequencingMethod.MOD(jobs, features = features), args.repeat), 2),
+            round(per_call_us(upkeep, args.repeat), 2)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
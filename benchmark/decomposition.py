@@ -0,0 +1,143 @@
+"""
+Intersection detection and decomposition of the central scheduler's problems (see src.scheduler.scheduler.conflict_components),
+against the pairwise intersection of trajectories and one model for all jobs, on the logged over-extended problems
+
+The problems are read from over_extended_problems.json of a simulation with ORTools (see src.scheduler.problem_format),
+due dates missing from the files before the versioned format are drawn as for new jobs.
+Jobs in this shopfloor visit every machine, so a logged problem is rarely split,
+-merge K joins K logged problems on disjoint machines to show the case where the groups are independent
+
+usage: python -m benchmark.decomposition logs/<run>/over_extended_problems.json -sqc ORTools -merge 1 2
+"""
+
+import argparse
+import itertools
+import logging
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tabulate import tabulate
+from types import SimpleNamespace
+
+from src.scheduler import problem_format
+from src.scheduler.problem_format import problem_instance
+from src.scheduler.scheduler import ORTools, GurobiOptimizer, SolverBudget, conflict_components
+from .common import silence_logging
+
+
+def load_problems(path:str, rng:np.random.Generator) -> list:
+    # (now, jobs, machines) of every logged problem, jobs and machines carry the attributes read by the optimizers
+    return [problem_instance(record, rng) for record in problem_format.load_problems(path)]
+
+
+def merge(problems:list) -> tuple:
+    # one problem of independent parts, the machines (and jobs) of every part are shifted past the previous ones
+    now = max(p[0] for p in problems)
+    jobs, machines = {}, {}
+    for _, p_jobs, p_machines in problems:
+        j_offset, m_offset = len(jobs), len(machines)
+        for j_idx, job in p_jobs.items():
+            pt_by_m_idx = np.zeros(m_offset + len(p_machines), dtype=int)
+            pt_by_m_idx[m_offset:] = job.pt_by_m_idx
+            jobs[j_offset + j_idx] = SimpleNamespace(traj = job.traj + m_offset, pt_by_m_idx = pt_by_m_idx, remaining_pt = job.remaining_pt,
+                available_T = max(job.available_T, now), due = job.due)
+        for m_idx, m in p_machines.items():
+            machines[m_offset + m_idx] = SimpleNamespace(m_idx = m_offset + m_idx, release_T = max(m.release_T, now))
+    for job in jobs.values():
+        job.pt_by_m_idx = np.pad(job.pt_by_m_idx, (0, len(machines) - len(job.pt_by_m_idx)))
+    return now, jobs, machines
+
+
+def pairwise_intersections(trajectories:dict) -> dict:
+    # the intersection of trajectories before the machine-to-jobs index
+    job_intersections = {}
+    for pair in itertools.combinations(trajectories.keys(), 2):
+        _intersec = list(set(trajectories[pair[0]]).intersection(trajectories[pair[1]]))
+        if len(_intersec):
+            job_intersections[pair] = _intersec
+    return job_intersections
+
+
+def indexed_components(trajectories:dict):
+    machine_to_jobs = {}
+    for j_idx, traj in trajectories.items():
+        for m_idx in traj.tolist():
+            machine_to_jobs.setdefault(m_idx, []).append(j_idx)
+    job_intersections = {}
+    for m_idx in sorted(machine_to_jobs):
+        for pair in itertools.combinations(machine_to_jobs[m_idx], 2):
+            job_intersections.setdefault(pair, []).append(m_idx)
+    return job_intersections, conflict_components(trajectories, machine_to_jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decomposition of the central scheduler problems')
+    parser.add_argument('file', help='over_extended_problems.json of a simulation with ORTools')
+    parser.add_argument('-sqc', default=['ORTools'], nargs='+', choices=['ORTools', 'GurobiOptimizer'], help='Optimizers')
+    parser.add_argument('-merge', default=[1, 2], nargs='+', type=int, help='Numbers of logged problems joined into one')
+    parser.add_argument('-pool', default=2, type=int, help='Threads of the pool that solves the components')
+    parser.add_argument('-time_limit', default=10, type=float, help='Wall-clock limit (s) of every call to the optimizer')
+    parser.add_argument('-seed', default=0, type=int, help='Random seed of the due dates')
+    args = parser.parse_args()
+    silence_logging()
+    # the Gurobi log is written next to the first handler of logger
+    logger = logging.getLogger("benchmark.decomposition")
+    logger.addHandler(logging.FileHandler(Path(tempfile.mkdtemp()) / "sim.log"))
+    budget = SolverBudget(time_limit = args.time_limit)
+    problems = load_problems(args.file, np.random.default_rng(args.seed))
+    pool = ThreadPoolExecutor(args.pool)
+
+    rows = [["sqc method", "merged", "problems", "jobs", "components", "pairwise T (ms)", "indexed T (ms)",
+             "monolithic T", "components T", "pool T", "tardiness mono.", "tardiness comp."]]
+    for sqc_method in args.sqc:
+        scheduler = {'ORTools': ORTools, 'GurobiOptimizer': GurobiOptimizer}[sqc_method]
+        for k in args.merge:
+            instances = [merge(problems[i:i+k]) for i in range(0, len(problems) - k + 1, k)]
+            stats = np.zeros(9)
+            for now, jobs, machines in instances:
+                env = SimpleNamespace(now = now)
+                trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+                m_list = list(machines.values())
+                tardiness = lambda schedule: sum(max(0, schedule[j_idx, traj[-1]] + jobs[j_idx].pt_by_m_idx[traj[-1]] - jobs[j_idx].due)
+                                                 for j_idx, traj in trajectories.items())
+                _start_T = time.perf_counter()
+                job_intersections = pairwise_intersections(trajectories)
+                stats[0] += time.perf_counter() - _start_T
+                _start_T = time.perf_counter()
+                indexed_intersections, components = indexed_components(trajectories)
+                stats[1] += time.perf_counter() - _start_T
+                stats[2] += len(components)
+                # one model of all jobs
+                _start_T = time.perf_counter()
+                mono, _ = scheduler.solve_scheduling_problem(logger, env, m_list, job_intersections, trajectories, jobs, budget = budget)
+                stats[3] += time.perf_counter() - _start_T
+                # one model per component, in turn and in the pool
+                def solve(component):
+                    _trajectories = {j_idx: trajectories[j_idx] for j_idx in component}
+                    _machines = sorted(set(m_idx for traj in _trajectories.values() for m_idx in traj.tolist()))
+                    _intersections = {pair: v for pair, v in indexed_intersections.items() if pair[0] in _trajectories}
+                    return scheduler.solve_scheduling_problem(logger, env, [machines[m_idx] for m_idx in _machines],
+                                                              _intersections, _trajectories, jobs, budget = budget)[0]
+                _start_T = time.perf_counter()
+                comp = {}
+                for component in components:
+                    comp.update(solve(component))
+                stats[4] += time.perf_counter() - _start_T
+                _start_T = time.perf_counter()
+                list(pool.map(solve, components))
+                stats[5] += time.perf_counter() - _start_T
+                stats[6] += len(jobs)
+                stats[7] += tardiness(mono)
+                stats[8] += tardiness(comp)
+            n = len(instances)
+            rows.append([sqc_method, k, n, round(stats[6] / n, 1), round(stats[2] / n, 1), round(stats[0] / n * 1000, 3),
+                         round(stats[1] / n * 1000, 3), round(stats[3] / n, 3), round(stats[4] / n, 3), round(stats[5] / n, 3),
+                         round(stats[7] / n, 2), round(stats[8] / n, 2)])
+    pool.shutdown()
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
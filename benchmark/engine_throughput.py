@@ -0,0 +1,69 @@
+"""
+Events per second of the simpy engine and the array-backed event heap engine, for rule-based sequencing
+Both engines must produce the same tardiness and flowtime for the same seed
+
+usage: python -m benchmark.engine_throughput -m_no 5 20 100 -span 1000 10000 100000 1000000
+"""
+
+import argparse
+import time
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def run_engine(engine:str, config:dict) -> dict:
+    spf = Shopfloor(engine = engine, **config)
+    until = config['span'] + 1000
+    _start_T = time.perf_counter()
+    if engine == 'simpy':
+        # step manually to count the processed events
+        env, event_cnt = spf.env, 0
+        while env.peek() < until:
+            env.step()
+            event_cnt += 1
+    else:
+        spf.env.run(until = until)
+        event_cnt = spf.env.event_cnt
+    wall_T = time.perf_counter() - _start_T
+    tardiness = spf.recorder.j_tardiness_dict.values()
+    flowtime = spf.recorder.j_flowtime_dict.values()
+    return {
+        'events': event_cnt, 'wall_T': wall_T, 'jobs': len(tardiness),
+        'mean_tardiness': sum(tardiness) / max(len(tardiness), 1),
+        'mean_flowtime': sum(flowtime) / max(len(flowtime), 1),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of simulation engines')
+    parser.add_argument('-m_no', nargs='+', default=[5, 20, 100], type=int, help='Numbers of machines')
+    parser.add_argument('-span', nargs='+', default=[1000, 10000], type=float, help='Lengths of simulation, up to 1e6')
+    parser.add_argument('-utl', '--E_utliz', default=0.85, type=float, help='Expected system utilization rate')
+    parser.add_argument('-sqc', '--sqc_method', default='FIFO', help='Sequencing rule')
+    parser.add_argument('-seed', default=1, type=int, help='Random seed')
+    args = parser.parse_args()
+    silence_logging()
+
+    # the heap engine does not put untriggered/unwaited events on the heap, so it processes fewer events than simpy
+    # the speedup is therefore measured by the wall time of the same run
+    rows = [["m_no", "span", "jobs", "simpy events/s", "heap events/s", "simpy wall T", "heap wall T", "speedup", "results match"]]
+    for m_no in args.m_no:
+        for span in args.span:
+            config = base_config(m_no = m_no, span = int(span), E_utliz = args.E_utliz, seed = args.seed,
+                                 sqc_method = getattr(SequencingMethod, args.sqc_method))
+            res_simpy = run_engine('simpy', config)
+            res_heap = run_engine('heap', config)
+            match = (res_simpy['mean_tardiness'] == res_heap['mean_tardiness']) and (res_simpy['mean_flowtime'] == res_heap['mean_flowtime'])
+            eps_simpy = res_simpy['events'] / res_simpy['wall_T']
+            eps_heap = res_heap['events'] / res_heap['wall_T']
+            rows.append([m_no, int(span), res_heap['jobs'], round(eps_simpy), round(eps_heap),
+                         round(res_simpy['wall_T'], 3), round(res_heap['wall_T'], 3), round(res_simpy['wall_T'] / res_heap['wall_T'], 2), 'yes' if match else 'NO'])
+            print(tabulate([rows[0], rows[-1]], headers="firstrow", tablefmt="plain"), flush=True)
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
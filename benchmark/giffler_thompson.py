@@ -0,0 +1,119 @@
+"""
+Giffler-Thompson backend of the central scheduler (see src.scheduler.scheduler.GifflerThompson): time to build one schedule
+on random problems of -jobs jobs on -machines machines, tardiness gap against ORTools on the logged over-extended problems,
+and in simulation runs
+
+usage: python -m benchmark.giffler_thompson logs/<run>/over_extended_problems.json -jobs 10 100 -machines 5 20 -seeds 1 2 3
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from tabulate import tabulate
+from types import SimpleNamespace
+
+from src.scheduler.scheduler import GT_RULES, GifflerThompson, ORTools, SolverBudget
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+from .decomposition import indexed_components, load_problems
+
+
+def random_problem(job_no:int, m_no:int, rng:np.random.Generator, now:float = 0) -> tuple:
+    # (now, jobs, machines) as load_problems, every job visits every machine
+    jobs, machines = {}, {}
+    for j_idx in range(job_no):
+        pt_by_m_idx = rng.integers(1, 11, m_no)
+        traj = rng.permutation(m_no)
+        jobs[j_idx] = SimpleNamespace(traj = traj, pt_by_m_idx = pt_by_m_idx, remaining_pt = pt_by_m_idx[traj],
+            available_T = now + rng.integers(0, 10), due = now + pt_by_m_idx.sum() * rng.uniform(1.2, 2))
+    for m_idx in range(m_no):
+        machines[m_idx] = SimpleNamespace(m_idx = m_idx, release_T = now + rng.integers(0, 10))
+    return now, jobs, machines
+
+
+def tardiness(schedule:dict, jobs:dict) -> float:
+    return sum(max(0, schedule[j_idx, job.traj[-1]] + job.pt_by_m_idx[job.traj[-1]] - job.due) for j_idx, job in jobs.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Giffler-Thompson backend of the central scheduler')
+    parser.add_argument('file', nargs='?', default=None, help='over_extended_problems.json of a simulation with ORTools')
+    parser.add_argument('-jobs', default=[10, 100], nargs='+', type=int, help='Number of jobs of the random problems')
+    parser.add_argument('-machines', default=[5, 20], nargs='+', type=int, help='Number of machines of the random problems, one per -jobs')
+    parser.add_argument('-reps', default=20, type=int, help='Random problems of every size')
+    parser.add_argument('-time_limit', default=10, type=float, help='Wall-clock limit (s) of every call to ORTools')
+    parser.add_argument('-seeds', default=[1, 2, 3], nargs='*', type=int, help='Random seeds of the simulation runs, none to skip')
+    parser.add_argument('-span', default=100, type=int, help='Length of simulation')
+    parser.add_argument('-utl', default=0.6, type=float, help='Expected utilization of simulation')
+    args = parser.parse_args()
+    silence_logging()
+    logger = logging.getLogger("benchmark.giffler_thompson")
+    rng = np.random.default_rng(0)
+
+    # time to build one schedule
+    rows = [["jobs", "machines", "operations"] + list(GT_RULES)]
+    for job_no, m_no in zip(args.jobs, args.machines):
+        problems = [random_problem(job_no, m_no, rng) for _ in range(args.reps)]
+        row = [job_no, m_no, job_no * m_no]
+        for rule in GT_RULES:
+            solve_T = []
+            for now, jobs, machines in problems:
+                trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+                _start_T = time.perf_counter()
+                GifflerThompson.solve_scheduling_problem(logger, SimpleNamespace(now = now), list(machines.values()), None, trajectories, jobs, rule = rule)
+                solve_T.append(time.perf_counter() - _start_T)
+            row.append("{:.3f} ms".format(np.median(solve_T) * 1000))
+        rows.append(row)
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+    if args.file is not None:
+        # the ORTools log is written next to the first handler of logger
+        logger.addHandler(logging.FileHandler(Path(tempfile.mkdtemp()) / "sim.log"))
+        budget = SolverBudget(time_limit = args.time_limit)
+        problems = load_problems(args.file, np.random.default_rng(0))
+        rows = [["method", "problems", "mean T (ms)", "mean tardiness", "gap"]]
+        results = {}
+        for method in ['ORTools'] + list(GT_RULES):
+            solve_T, _tardiness = [], []
+            for now, jobs, machines in problems:
+                trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+                job_intersections, _ = indexed_components(trajectories)
+                _start_T = time.perf_counter()
+                if method == 'ORTools':
+                    schedule, _ = ORTools.solve_scheduling_problem(
+                        logger, SimpleNamespace(now = now), list(machines.values()), job_intersections, trajectories, jobs, budget = budget)
+                else:
+                    schedule, _ = GifflerThompson.solve_scheduling_problem(
+                        logger, SimpleNamespace(now = now), list(machines.values()), job_intersections, trajectories, jobs, rule = method)
+                solve_T.append(time.perf_counter() - _start_T)
+                _tardiness.append(tardiness(schedule, jobs))
+            results[method] = np.mean(_tardiness)
+            rows.append(["GT " + method if method in GT_RULES else method, len(problems), round(np.mean(solve_T) * 1000, 3),
+                         round(results[method], 2), "{:+.2f}".format(results[method] - results['ORTools'])])
+        print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+    if args.seeds:
+        rows = [["method", "solves", "opt. T", "opt. T / solve (ms)", "mean tardiness"]]
+        for method in ['ORTools', 'ATC', 'EDD']:
+            opt_cnt, opt_T, _tardiness = 0, 0, []
+            for seed in args.seeds:
+                kwargs = {'sqc_method': SequencingMethod.ORTools, 'solver_time_limit': args.time_limit} if method == 'ORTools' else \
+                         {'sqc_method': SequencingMethod.GifflerThompson, 'gt_rule': method}
+                spf = Shopfloor(**base_config(
+                    span = args.span, E_utliz = args.utl, seed = seed, schedule_cache_size = 0,
+                    processing_time_variability = False, random_MTTR = False, quiet = True, headless = True, **kwargs))
+                spf.run_simulation()
+                opt_cnt += spf.recorder.opt_cnt
+                opt_T += spf.recorder.opt_time_expense
+                _tardiness.append(spf.performance()['mean_tardiness'])
+            rows.append(["GT " + method if method in GT_RULES else method, opt_cnt, round(opt_T, 3),
+                         round(opt_T / max(opt_cnt, 1) * 1000, 3), round(np.mean(_tardiness), 3)])
+        print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
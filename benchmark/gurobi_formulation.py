@@ -0,0 +1,93 @@
+"""
+Formulations of the Gurobi scheduler (see src.scheduler.scheduler.GurobiOptimizer): solve time and tardiness
+on the logged over-extended problems, cut to the first -jobs jobs to fit the size-limited license of the pip package,
+and in simulation runs, with a new Gurobi environment and model for every solve or one model updated in place (GurobiSession)
+
+usage: python -m benchmark.gurobi_formulation logs/<run>/over_extended_problems.json -jobs 6 8 -seeds 1 2 3
+"""
+
+import argparse
+import gurobipy as gp
+import logging
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from tabulate import tabulate
+from types import SimpleNamespace
+
+from src.scheduler.scheduler import GurobiOptimizer, SolverBudget
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+from .decomposition import indexed_components, load_problems
+
+
+FORMULATIONS = ['quadratic', 'big_m', 'indicator']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Formulations of the Gurobi scheduler')
+    parser.add_argument('file', nargs='?', default=None, help='over_extended_problems.json of a simulation with ORTools')
+    parser.add_argument('-jobs', default=[6, 8], nargs='+', type=int, help='Number of jobs kept from every logged problem')
+    parser.add_argument('-time_limit', default=10, type=float, help='Wall-clock limit (s) of every call to the optimizer')
+    parser.add_argument('-seeds', default=[1, 2, 3], nargs='*', type=int, help='Random seeds of the simulation runs, none to skip')
+    parser.add_argument('-span', default=100, type=int, help='Length of simulation')
+    parser.add_argument('-utl', default=0.6, type=float, help='Expected utilization of simulation')
+    args = parser.parse_args()
+    silence_logging()
+
+    if args.file is not None:
+        # the Gurobi log is written next to the first handler of logger
+        logger = logging.getLogger("benchmark.gurobi_formulation")
+        logger.addHandler(logging.FileHandler(Path(tempfile.mkdtemp()) / "sim.log"))
+        budget = SolverBudget(time_limit = args.time_limit)
+        problems = load_problems(args.file, np.random.default_rng(0))
+        rows = [["jobs", "formulation", "problems", "solved", "mean T", "max T", "mean tardiness"]]
+        for job_no in args.jobs:
+            for formulation in FORMULATIONS:
+                solve_T, tardiness, solved = [], [], 0
+                for now, jobs, machines in problems:
+                    jobs = dict(list(jobs.items())[:job_no])
+                    trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+                    job_intersections, _ = indexed_components(trajectories)
+                    _start_T = time.perf_counter()
+                    try:
+                        schedule, _ = GurobiOptimizer.solve_scheduling_problem(
+                            logger, SimpleNamespace(now = now), list(machines.values()), job_intersections, trajectories, jobs,
+                            budget = budget, formulation = formulation)
+                    except gp.GurobiError:
+                        # beyond the size limit of license
+                        continue
+                    solve_T.append(time.perf_counter() - _start_T)
+                    tardiness.append(sum(max(0, schedule[j_idx, traj[-1]] + jobs[j_idx].pt_by_m_idx[traj[-1]] - jobs[j_idx].due)
+                                         for j_idx, traj in trajectories.items()))
+                    solved += 1
+                rows.append([job_no, formulation, len(problems), solved, round(np.mean(solve_T), 3) if solved else "-",
+                             round(np.max(solve_T), 3) if solved else "-", round(np.mean(tardiness), 2) if solved else "-"])
+        print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+    if args.seeds:
+        # a new environment and model for every solve, or one model updated in place
+        rows = [["formulation", "model reuse", "solves", "set-up T", "set-up / solve (ms)", "optimizer T", "opt. T", "mean tardiness"]]
+        for formulation in FORMULATIONS:
+            for reuse_model in (False, True):
+                opt_cnt, setup_T, solver_T, opt_T, tardiness = 0, 0, 0, 0, []
+                for seed in args.seeds:
+                    spf = Shopfloor(**base_config(
+                        span = args.span, E_utliz = args.utl, seed = seed, sqc_method = SequencingMethod.GurobiOptimizer,
+                        gurobi_formulation = formulation, gurobi_reuse_model = reuse_model, solver_time_limit = args.time_limit,
+                        schedule_cache_size = 0, processing_time_variability = False, random_MTTR = False, quiet = True, headless = True))
+                    spf.run_simulation()
+                    opt_cnt += spf.recorder.opt_cnt
+                    setup_T += spf.recorder.opt_setup_T
+                    solver_T += spf.recorder.opt_solver_T
+                    opt_T += spf.recorder.opt_time_expense
+                    tardiness.append(spf.performance()['mean_tardiness'])
+                rows.append([formulation, reuse_model, opt_cnt, round(setup_T, 3), round(setup_T / opt_cnt * 1000, 2),
+                             round(solver_T, 2), round(opt_T, 2), round(np.mean(tardiness), 3)])
+        print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Wall time of the same simulation with full per-event logging, quiet mode, and quiet mode with the in-memory event trace
+
+usage: python -m benchmark.logging_overhead -m_no 20 -span 10000
+"""
+
+import argparse
+import time
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config
+
+
+MODES = {
+    'verbose': {'quiet': False, 'trace_capacity': 0},
+    'quiet': {'quiet': True, 'trace_capacity': 0},
+    'quiet + trace': {'quiet': True, 'trace_capacity': 100000},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Overhead of per-event logging')
+    parser.add_argument('-m_no', default=20, type=int, help='Number of machines')
+    parser.add_argument('-span', default=10000, type=int, help='Length of simulation')
+    parser.add_argument('-utl', '--E_utliz', default=0.85, type=float, help='Expected system utilization rate')
+    parser.add_argument('-sqc', '--sqc_method', default='FIFO', help='Sequencing rule')
+    parser.add_argument('-engine', default='simpy', choices=['simpy', 'heap'], help='Simulation engine')
+    args = parser.parse_args()
+
+    rows = [["mode", "wall T", "speedup", "mean tardiness"]]
+    for mode, setting in MODES.items():
+        config = base_config(m_no = args.m_no, span = args.span, E_utliz = args.E_utliz,
+                             sqc_method = getattr(SequencingMethod, args.sqc_method), **setting)
+        spf = Shopfloor(engine = args.engine, **config)
+        _start_T = time.perf_counter()
+        spf.env.run(until = args.span + 1000)
+        wall_T = time.perf_counter() - _start_T
+        tardiness = spf.recorder.j_tardiness_dict.values()
+        if mode == 'verbose':
+            verbose_T = wall_T
+        rows.append([mode, round(wall_T, 3), round(verbose_T / wall_T, 2), round(sum(tardiness) / len(tardiness), 2)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Wall time of rules with static priority, with the machine queue kept as a list (rule scans the queue) or as a binary heap
+Utilization is swept towards 1, where the queues grow without bound over the span
+
+usage: python -m benchmark.queue_scaling -utl 0.8 0.9 0.95 -sqc Slack SPT
+"""
+
+import argparse
+import time
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List vs heap machine queue against utilization')
+    parser.add_argument('-m_no', default=10, type=int, help='Number of machines')
+    parser.add_argument('-span', default=20000, type=int, help='Length of simulation')
+    parser.add_argument('-utl', '--E_utliz', default=[0.8, 0.9, 0.95], nargs='+', type=float, help='Expected system utilization rates')
+    parser.add_argument('-sqc', '--sqc_method', default=['Slack', 'SPT'], nargs='+', help='Sequencing rules with static priority')
+    parser.add_argument('-engine', default='heap', choices=['simpy', 'heap'], help='Simulation engine')
+    args = parser.parse_args()
+    silence_logging()
+
+    rows = [["rule", "utilization", "max queue", "list T", "heap T", "speedup", "identical"]]
+    for sqc_method in args.sqc_method:
+        for E_utliz in args.E_utliz:
+            wall_T, result = {}, {}
+            for heap_queue in (False, True):
+                config = base_config(m_no = args.m_no, span = args.span, E_utliz = E_utliz,
+                                     sqc_method = getattr(SequencingMethod, sqc_method), heap_queue = heap_queue)
+                spf = Shopfloor(engine = args.engine, **config)
+                # track the longest queue by sampling at every job arrival
+                max_queue = [0]
+                def arrival(job, m, _job_arrival):
+                    _job_arrival(job)
+                    max_queue[0] = max(max_queue[0], len(m.queue))
+                for m in spf.m_list:
+                    m.job_arrival = lambda job, m=m, _job_arrival=m.job_arrival: arrival(job, m, _job_arrival)
+                _start_T = time.perf_counter()
+                spf.env.run(until = args.span + 1000)
+                wall_T[heap_queue] = time.perf_counter() - _start_T
+                result[heap_queue] = spf.recorder.j_operation_dict
+            rows.append([sqc_method, E_utliz, max_queue[0], round(wall_T[False], 3), round(wall_T[True], 3),
+                         round(wall_T[False] / wall_T[True], 2), result[False] == result[True]])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
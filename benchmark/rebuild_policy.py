@@ -0,0 +1,70 @@
+"""
+Schedule-rebuild policies of the central scheduler (see src.scheduler.scheduler.CentralScheduler.request_rebuild),
+number of rebuilds and tardiness cost against rebuilding the schedule at every trigger, on the same random seeds
+A run that fails, or ends with jobs not completed, is counted as failed and left out of the tardiness, the cost of a policy
+is given only if no run of it and of the reference failed
+
+usage: python -m benchmark.rebuild_policy -sqc ORTools GifflerThompson -seeds 1 2 3 4 5 -span 100 1000
+"""
+
+import argparse
+import itertools
+import numpy as np
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+# name: keyword arguments of the policy, the first one is the reference
+POLICIES = {
+    'every trigger': {},
+    'same time stamp': {'rebuild_window': 0},
+    'window 5': {'rebuild_window': 5},
+    'min. interval 10': {'rebuild_min_interval': 10},
+    'on idle': {'rebuild_on_idle': True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Schedule-rebuild policies of the central scheduler')
+    parser.add_argument('-sqc', default=['ORTools'], nargs='+', choices=['ORTools', 'GurobiOptimizer', 'GifflerThompson', 'TabuSearch'], help='Central schedulers')
+    parser.add_argument('-seeds', default=[1, 2, 3], nargs='+', type=int, help='Random seeds of the runs')
+    parser.add_argument('-m_no', default=5, type=int, help='Number of machines')
+    parser.add_argument('-span', default=[100, 1000], nargs='+', type=int, help='Lengths of simulation, 1000 is the default of main.py')
+    parser.add_argument('-utl', default=0.6, type=float, help='Expected utilization')
+    parser.add_argument('-MTBF', default=50, type=float, help='Mean time between machine breakdowns')
+    parser.add_argument('-time_limit', default=1, type=float, help='Wall-clock limit (s) of every solve')
+    args = parser.parse_args()
+    silence_logging()
+
+    rows = [["sqc method", "span", "policy", "runs", "failed", "triggers", "rebuilds", "forced", "solves", "opt. T", "mean tardiness", "cost"]]
+    for sqc_method, span in itertools.product(args.sqc, args.span):
+        reference = None
+        for policy, policy_kwargs in POLICIES.items():
+            counts, opt_T, tardiness, failed = np.zeros(4, dtype=int), 0, [], 0
+            for seed in args.seeds:
+                spf = Shopfloor(**base_config(
+                    m_no = args.m_no, span = span, E_utliz = args.utl, MTBF = args.MTBF, seed = seed,
+                    sqc_method = getattr(SequencingMethod, sqc_method), solver_time_limit = args.time_limit, schedule_cache_size = 0,
+                    processing_time_variability = False, random_MTTR = False, quiet = True, headless = True, **policy_kwargs))
+                spf.run_simulation()
+                # a stalled run completes only some of the created jobs, their tardiness says nothing of the policy
+                if not spf.succeeded or spf.recorder.tardiness_stat.count < spf.narrator.j_idx:
+                    failed += 1
+                    continue
+                counts += [spf.recorder.rebuild_trigger_cnt, spf.recorder.rebuild_cnt, spf.recorder.rebuild_forced_cnt, spf.recorder.opt_cnt]
+                opt_T += spf.recorder.opt_time_expense
+                tardiness.append(spf.performance()['mean_tardiness'])
+            mean_tardiness = np.mean(tardiness) if tardiness else None
+            if reference is None:
+                reference = mean_tardiness if not failed else np.nan
+            cost = "{:+.3f}".format(mean_tardiness - reference) if not failed and not np.isnan(reference) else "-"
+            rows.append([sqc_method, span, policy, len(args.seeds), failed, *counts, round(opt_T, 2),
+                         round(mean_tardiness, 3) if mean_tardiness is not None else "-", cost])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Peak RSS of the simulation against its span, with the recorder keeping all records in memory or streaming them to file
+Each run is measured in a fresh process
+
+usage: python -m benchmark.recorder_memory -span 10000 100000 1000000
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+from tabulate import tabulate
+
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def run(task:tuple) -> tuple:
+    span, m_no, engine, record_file = task
+    silence_logging()
+    spf = Shopfloor(engine = engine, **base_config(m_no = m_no, span = span, E_utliz = 0.85, record_file = record_file))
+    _start_T = time.perf_counter()
+    spf.env.run(until = span + 1000)
+    spf.recorder.close_store()
+    wall_T = time.perf_counter() - _start_T
+    # ru_maxrss is in KB on Linux
+    return spf.recorder.tardiness_stat.count, wall_T, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory of in-memory and streaming recorder')
+    parser.add_argument('-m_no', default=5, type=int, help='Number of machines')
+    parser.add_argument('-span', default=[10000, 100000, 1000000], nargs='+', type=int, help='Lengths of simulation')
+    parser.add_argument('-engine', default='heap', choices=['simpy', 'heap'], help='Simulation engine')
+    args = parser.parse_args()
+
+    rows = [["span", "jobs", "memory T", "memory RSS MB", "stream T", "stream RSS MB", "file MB"]]
+    ctx = mp.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for span in args.span:
+            record_file = Path(tmp_dir) / f"records_{span}.h5"
+            row = [span]
+            for path in (None, record_file):
+                with ctx.Pool(1) as pool:
+                    jobs, wall_T, rss = pool.apply(run, ((span, args.m_no, args.engine, path),))
+                row += ([jobs] if path is None else []) + [round(wall_T, 2), round(rss, 1)]
+            rows.append(row + [round(record_file.stat().st_size / 2**20, 1)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Replay the logged scheduling problems (over_extended_problems.json, see src.scheduler.problem_format) against every backend
+of the central scheduler with the same budget, in a pool of worker processes. Report the percentiles of solve time
+and the cumulative tardiness of each backend, and the regressions against a stored baseline of the same corpus.
+
+A corpus is any number of files, or directories searched for over_extended_problems.json, the same problem logged twice is
+replayed once. A schedule is checked against the problem (see problem_format.evaluate_schedule) before its tardiness is counted.
+A regression is a problem that a backend solved in the baseline but not now, a schedule of larger tardiness than the baseline's
+(beyond -objective_tol), or a solve-time percentile slower than the baseline's by more than -threshold and -time_floor;
+the exit status is 1 if any is found.
+
+usage: python -m benchmark.replay logs/ -backends ORTools TabuSearch -time_limit 1 -baseline benchmark/replay_baseline.json
+       python -m benchmark.replay logs/ -time_limit 1 -baseline benchmark/replay_baseline.json -save_baseline
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from tabulate import tabulate
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from src.scheduler import problem_format, scheduler
+from src.simulator.exc import InvalidRequestError
+from .common import silence_logging
+from .decomposition import indexed_components
+
+
+BACKENDS = ['ORTools', 'GurobiOptimizer', 'GifflerThompson', 'TabuSearch']
+PERCENTILES = [50, 90, 99]
+BASELINE_FORMAT, BASELINE_VERSION = "replay_baseline", 1
+
+
+def load_corpus(paths:List[str]) -> List[dict]:
+    records = {}
+    for path in map(Path, paths):
+        files = sorted(path.rglob("over_extended_problems.json")) if path.is_dir() else [path]
+        for file in files:
+            for record in problem_format.load_problems(file):
+                records.setdefault(problem_format.problem_id(record), record)
+    return list(records.values())
+
+
+def replay_worker(task:Tuple[str, dict, float, int]) -> dict:
+    backend, record, time_limit, workers = task
+    silence_logging()
+    # the Gurobi log is written next to the first handler of logger
+    logger = logging.getLogger("benchmark.replay")
+    if not logger.handlers:
+        logger.addHandler(logging.FileHandler(Path(tempfile.mkdtemp()) / "sim.log"))
+    now, jobs, machines = problem_format.problem_instance(record)
+    trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+    job_intersections, _ = indexed_components(trajectories)
+    result = {'backend': backend, 'problem': problem_format.problem_id(record), 'jobs': len(jobs),
+              'ops': sum(len(traj) for traj in trajectories.values()), 'T': None, 'objective': None}
+    _start_T = time.perf_counter()
+    try:
+        schedule, _ = getattr(scheduler, backend).solve_scheduling_problem(
+            logger, SimpleNamespace(now = now), list(machines.values()), job_intersections, trajectories, jobs,
+            budget = scheduler.SolverBudget(time_limit = time_limit, workers = workers))
+    except Exception as e:
+        # e.g. a problem beyond the size limit of the Gurobi license
+        return dict(result, status = f"failed: {type(e).__name__}")
+    result['T'] = time.perf_counter() - _start_T
+    try:
+        result['objective'] = problem_format.evaluate_schedule(now, jobs, machines, schedule)
+    except InvalidRequestError as e:
+        return dict(result, status = f"infeasible: {e}")
+    return dict(result, status = "solved")
+
+
+def summary(results:List[dict]) -> dict:
+    solved = [r for r in results if r['status'] == "solved"]
+    T = [r['T'] for r in solved]
+    return {'problems': len(results), 'solved': len(solved),
+            **{f"p{q}": float(np.percentile(T, q)) if T else None for q in PERCENTILES},
+            'max': max(T) if T else None, 'tardiness': sum(r['objective'] for r in solved)}
+
+
+def regressions(backend:str, results:List[dict], baseline:dict, threshold:float, time_floor:float, objective_tol:float) -> List[str]:
+    found = []
+    base_results = baseline['results'].get(backend, {})
+    for r in results:
+        base = base_results.get(r['problem'])
+        if base is None or base['status'] != "solved":
+            continue
+        if r['status'] != "solved":
+            found.append(f"{backend} {r['problem']}: {r['status']}, solved in the baseline")
+        elif r['objective'] > base['objective'] + objective_tol:
+            found.append(f"{backend} {r['problem']}: tardiness {round(r['objective'], 3)} > {round(base['objective'], 3)} of the baseline")
+    # percentiles over the problems solved in both
+    common = [r for r in results if r['status'] == "solved" and base_results.get(r['problem'], {}).get('status') == "solved"]
+    if common:
+        for q in PERCENTILES:
+            T, base_T = np.percentile([r['T'] for r in common], q), np.percentile([base_results[r['problem']]['T'] for r in common], q)
+            if T > base_T * (1 + threshold) and T - base_T > time_floor:
+                found.append(f"{backend}: p{q} solve time {round(T, 3)}s > {round(base_T, 3)}s of the baseline by more than {threshold:.0%}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay the logged scheduling problems against every backend')
+    parser.add_argument('corpus', nargs='+', help='over_extended_problems.json files, or directories to search for them')
+    parser.add_argument('-backends', default=BACKENDS, nargs='+', choices=BACKENDS, help='Backends of the central scheduler')
+    parser.add_argument('-time_limit', default=1, type=float, help='Wall-clock limit (s) of every solve')
+    parser.add_argument('-solver_workers', default=1, type=int, help='Search workers of every solve, 0 for the solver default')
+    parser.add_argument('-processes', default=None, type=int, help='Worker processes, default to the number of CPU cores')
+    parser.add_argument('-baseline', default=None, help='JSON file of the stored baseline')
+    parser.add_argument('-save_baseline', default=False, action='store_true', help='Store the results as the baseline instead of comparing')
+    parser.add_argument('-threshold', default=0.2, type=float, help='Relative slow-down of a solve-time percentile reported as regression')
+    parser.add_argument('-time_floor', default=0.01, type=float, help='Slow-down (s) of a solve-time percentile below which it is not a regression')
+    parser.add_argument('-objective_tol', default=1e-6, type=float, help='Increase of tardiness of a problem reported as regression')
+    args = parser.parse_args()
+    silence_logging()
+
+    records = load_corpus(args.corpus)
+    if not records:
+        raise InvalidRequestError(f"No logged problem found in {args.corpus}")
+    tasks = [(backend, record, args.time_limit, args.solver_workers) for backend in args.backends for record in records]
+    processes = min(args.processes or mp.cpu_count(), len(tasks))
+    _start_T = time.time()
+    if processes > 1:
+        with mp.Pool(processes) as pool:
+            results = list(pool.imap_unordered(replay_worker, tasks, chunksize=1))
+    else:
+        results = [replay_worker(task) for task in tasks]
+    by_backend = {backend: [r for r in results if r['backend'] == backend] for backend in args.backends}
+    print("{} problems x {} backends, time limit: {}s, {} processes, wall time: {}s".format(
+        len(records), len(args.backends), args.time_limit, processes, round(time.time() - _start_T, 2)))
+
+    baseline = None
+    if args.baseline is not None and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != BASELINE_FORMAT or baseline['version'] > BASELINE_VERSION:
+            raise InvalidRequestError(f"{args.baseline} is not a baseline of version {BASELINE_VERSION} or before")
+        if baseline['time_limit'] != args.time_limit:
+            print(f"Warning: the baseline is replayed with a time limit of {baseline['time_limit']}s")
+    rows = [["backend", "problems", "solved"] + [f"p{q} T (s)" for q in PERCENTILES] + ["max T (s)", "tardiness", "vs. baseline"]]
+    found = []
+    for backend, _results in by_backend.items():
+        stats = summary(_results)
+        # change of tardiness over the problems solved now and in the baseline
+        change = "-"
+        if baseline is not None and backend in baseline['results']:
+            base_results = baseline['results'][backend]
+            common = [r for r in _results if r['status'] == "solved" and base_results.get(r['problem'], {}).get('status') == "solved"]
+            change = "{:+.2f} ({} problems)".format(sum(r['objective'] - base_results[r['problem']]['objective'] for r in common), len(common))
+            found += regressions(backend, _results, baseline, args.threshold, args.time_floor, args.objective_tol)
+        rows.append([backend, stats['problems'], stats['solved']] + [round(stats[f"p{q}"], 4) if stats['solved'] else "-" for q in PERCENTILES]
+                    + [round(stats['max'], 4) if stats['solved'] else "-", round(stats['tardiness'], 2), change])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+    for r in results:
+        if r['status'] != "solved":
+            print(f"{r['backend']} {r['problem']} ({r['jobs']} jobs, {r['ops']} operations): {r['status']}")
+
+    if args.save_baseline:
+        if args.baseline is None:
+            raise InvalidRequestError("-save_baseline needs the path of -baseline")
+        with open(args.baseline, "w") as f:
+            json.dump({'format': BASELINE_FORMAT, 'version': BASELINE_VERSION, 'time_limit': args.time_limit,
+                       'summary': {backend: summary(_results) for backend, _results in by_backend.items()},
+                       'results': {backend: {r['problem']: {k: r[k] for k in ('status', 'T', 'objective')} for r in _results}
+                                   for backend, _results in by_backend.items()}}, f, indent=1)
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline is not None:
+        print("{} regression(s) against {}".format(len(found), args.baseline))
+        for line in found:
+            print("  " + line)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
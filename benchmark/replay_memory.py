@@ -0,0 +1,76 @@
+"""
+Insertion and batch sampling of the array replay memory, against a Python list of experiences stacked into a batch on every sample
+Also reports the time of HDF5 checkpoint and restoration
+
+usage: python -m benchmark.replay_memory -capacity 100000 -batch 256
+"""
+
+import argparse
+import numpy as np
+import tempfile
+import time
+from pathlib import Path
+from tabulate import tabulate
+
+from src.DRL.replay_memory import ReplayMemory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay memory insertion, sampling and checkpoint')
+    parser.add_argument('-capacity', default=100000, type=int, help='Number of experiences')
+    parser.add_argument('-batch', default=256, type=int, help='Batch size of sampling')
+    parser.add_argument('-max_queue', default=16, type=int, help='Padded queue length of state')
+    parser.add_argument('-repeat', default=200, type=int, help='Batches sampled per measurement')
+    args = parser.parse_args()
+    rng = np.random.default_rng(1)
+    spec = {'queue': ((args.max_queue, 5), 'float32'), 'action_mask': ((args.max_queue,), 'bool')}
+    states = {'queue': rng.random((args.capacity, args.max_queue, 5), dtype=np.float32),
+              'action_mask': rng.random((args.capacity, args.max_queue)) > 0.3}
+
+    # list of experiences, as the per-machine lists of the previous repository
+    _start_T = time.perf_counter()
+    experiences = []
+    for i in range(args.capacity):
+        s = {name: states[name][i] for name in spec}
+        experiences.append([s, i % args.max_queue, -1.0, s, False])
+    list_insert_T = time.perf_counter() - _start_T
+    _start_T = time.perf_counter()
+    for _ in range(args.repeat):
+        batch = [experiences[i] for i in rng.integers(0, len(experiences), args.batch)]
+        {name: np.stack([e[0][name] for e in batch]) for name in spec}, np.array([e[1] for e in batch]), np.array([e[2] for e in batch])
+        {name: np.stack([e[3][name] for e in batch]) for name in spec}, np.array([e[4] for e in batch])
+    list_sample_T = time.perf_counter() - _start_T
+
+    memory = ReplayMemory(args.capacity, spec)
+    _start_T = time.perf_counter()
+    for i in range(args.capacity):
+        s = {name: states[name][i] for name in spec}
+        memory.add(s, i % args.max_queue, -1.0, s, False)
+    memory_insert_T = time.perf_counter() - _start_T
+    _start_T = time.perf_counter()
+    for _ in range(args.repeat):
+        memory.sample(args.batch, rng)
+    memory_sample_T = time.perf_counter() - _start_T
+    _start_T = time.perf_counter()
+    for _ in range(args.repeat):
+        memory.sample_prioritized(args.batch, rng)
+    prioritized_sample_T = time.perf_counter() - _start_T
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _start_T = time.perf_counter()
+        path = memory.save(Path(tmp_dir) / "replay_memory.h5")
+        save_T = time.perf_counter() - _start_T
+        _start_T = time.perf_counter()
+        ReplayMemory.load(path)
+        load_T = time.perf_counter() - _start_T
+        file_MB = path.stat().st_size / 2**20
+
+    rows = [["storage", "insert us", "uniform batch ms", "prioritized batch ms", "save s", "load s", "file MB"],
+            ["list", round(list_insert_T / args.capacity * 1e6, 2), round(list_sample_T / args.repeat * 1e3, 3), "-", "-", "-", "-"],
+            ["arrays", round(memory_insert_T / args.capacity * 1e6, 2), round(memory_sample_T / args.repeat * 1e3, 3),
+             round(prioritized_sample_T / args.repeat * 1e3, 3), round(save_T, 3), round(load_T, 3), round(file_MB, 1)]]
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
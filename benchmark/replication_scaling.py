@@ -0,0 +1,44 @@
+"""
+Scaling of Simulator.replicate with the number of worker processes, the workload (seeds x sequencing methods) is fixed
+
+usage: python -m benchmark.replication_scaling -seeds 16 -sqc FIFO Slack CR -span 10000
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+from tabulate import tabulate
+
+from src.simulator.simulator import Simulator
+from .common import base_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling of parallel replications')
+    parser.add_argument('-seeds', default=8, type=int, help='Number of seeds per sequencing method')
+    parser.add_argument('-sqc', '--sqc_method', nargs='+', default=['FIFO', 'Slack', 'CR'], help='Sequencing rules')
+    parser.add_argument('-m_no', default=10, type=int, help='Number of machines')
+    parser.add_argument('-span', default=5000, type=int, help='Length of simulation')
+    parser.add_argument('-engine', default='heap', choices=['simpy', 'heap'], help='Simulation engine')
+    parser.add_argument('-processes', nargs='+', type=int, default=None, help='Numbers of worker processes, default to powers of 2 up to CPU count')
+    args = parser.parse_args()
+
+    cpu_no = mp.cpu_count()
+    processes = args.processes or sorted({2**i for i in range(cpu_no.bit_length()) if 2**i <= cpu_no} | {cpu_no})
+    config = base_config(m_no = args.m_no, span = args.span, E_utliz = 0.85, quiet = True, engine = args.engine)
+    seeds = list(range(1, args.seeds + 1))
+    rows = [["processes", "runs", "wall T", "runs/s", "speedup", "efficiency"]]
+    for proc_no in processes:
+        _start_T = time.perf_counter()
+        results = Simulator.replicate(seeds = seeds, sqc_methods = args.sqc_method, processes = proc_no, **config)
+        wall_T = time.perf_counter() - _start_T
+        if proc_no == processes[0]:
+            base_T = wall_T * processes[0]
+        rows.append([proc_no, len(results), round(wall_T, 2), round(len(results) / wall_T, 2),
+                     round(base_T / wall_T, 2), round(base_T / wall_T / proc_no, 2)])
+    print(f"CPU cores: {cpu_no}")
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of copying a running simulation (see src.simulator.snapshot), against replaying it from t=0 with the same seed,
+the throughput of look-ahead rollouts from a copy, and the Rollout sequencing method against its base rule
+
+usage: python -m benchmark.rollout -m_no 10 -span 5000 -horizon 50 200 500
+"""
+
+import argparse
+import time
+from tabulate import tabulate
+
+from src.scheduler import sequencing_rule
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot/restore cost and rollout throughput')
+    parser.add_argument('-m_no', default=10, type=int, help='Number of machines')
+    parser.add_argument('-span', default=5000, type=int, help='Length of simulation, snapshots are taken at 1/4, 1/2 and the end of it')
+    parser.add_argument('-horizon', default=[50, 200, 500], nargs='+', type=int, help='Look-ahead of rollouts')
+    parser.add_argument('-repeat', default=50, type=int, help='Restores/rollouts per measurement')
+    parser.add_argument('-rule_span', default=500, type=int, help='Length of simulation of the comparison of sequencing methods, 0 to skip')
+    args = parser.parse_args()
+    silence_logging()
+    config = base_config(m_no = args.m_no, span = args.span, E_utliz = 0.9, sqc_method = SequencingMethod.ATC, quiet = True, headless = True)
+
+    rows = [["time", "jobs in system", "snapshot KB", "snapshot ms", "restore ms", "replay ms", "replay/restore"]]
+    for T in (args.span // 4, args.span // 2, args.span):
+        _start_T = time.perf_counter()
+        spf = Shopfloor(engine = "heap", **config)
+        spf.env.run(until = T)
+        replay_T = time.perf_counter() - _start_T
+        _start_T = time.perf_counter()
+        for _ in range(args.repeat):
+            snapshot = spf.snapshot()
+        snapshot_T = (time.perf_counter() - _start_T) / args.repeat
+        _start_T = time.perf_counter()
+        for _ in range(args.repeat):
+            snapshot.restore()
+        restore_T = (time.perf_counter() - _start_T) / args.repeat
+        rows.append([T, len(spf.recorder.in_system_jobs), round(len(snapshot) / 1024, 1), round(snapshot_T * 1e3, 2),
+                     round(restore_T * 1e3, 2), round(replay_T * 1e3, 1), round(replay_T / restore_T, 1)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+    # rollouts from the snapshot in the middle of simulation
+    spf = Shopfloor(engine = "heap", **config)
+    spf.env.run(until = args.span // 2)
+    snapshot = spf.snapshot()
+    rows = [["horizon", "events/rollout", "rollouts/s"]]
+    for horizon in args.horizon:
+        event_cnt = 0
+        _start_T = time.perf_counter()
+        for _ in range(args.repeat):
+            clone = snapshot.restore()
+            start_cnt = clone.env.event_cnt
+            clone.env.run(until = snapshot.now + horizon)
+            event_cnt += clone.env.event_cnt - start_cnt
+        rows.append([horizon, round(event_cnt / args.repeat), round(args.repeat / (time.perf_counter() - _start_T), 1)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+    if args.rule_span:
+        rows = [["sqc method", "decisions", "mean tardiness", "wall T"]]
+        for rule in (sequencing_rule.ROLLOUT_BASE, "Rollout"):
+            spf = Shopfloor(engine = "heap", **dict(config, span = args.rule_span, sqc_method = getattr(SequencingMethod, rule)))
+            _start_T = time.perf_counter()
+            spf.run_simulation()
+            rows.append([rule, spf.recorder.sqc_cnt_reactive, round(spf.performance()['mean_tardiness'], 2), round(time.perf_counter() - _start_T, 2)])
+        print(f"Look-ahead of Rollout: {sequencing_rule.ROLLOUT_HORIZON}")
+        print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Re-use of solved scheduling problems by the central scheduler (see src.scheduler.scheduler.ProblemCache), against solving every problem
+A cached solution is as good as a fresh one for its problem, the tardiness can still differ between the runs
+because equally good schedules are broken differently
+
+usage: python -m benchmark.schedule_cache -sqc ORTools -seeds 1 2 3 -span 100
+"""
+
+import argparse
+import numpy as np
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Problem cache of the central scheduler')
+    parser.add_argument('-sqc', default=['ORTools'], nargs='+', choices=['ORTools', 'GurobiOptimizer'], help='Optimizers')
+    parser.add_argument('-seeds', default=[1, 2, 3], nargs='+', type=int, help='Random seeds of the runs')
+    parser.add_argument('-m_no', default=5, type=int, help='Number of machines')
+    parser.add_argument('-span', default=100, type=int, help='Length of simulation')
+    parser.add_argument('-utl', default=0.6, type=float, help='Expected utilization')
+    parser.add_argument('-cache', default=[0, 128], nargs='+', type=int, help='Cache sizes, 0 disables the cache')
+    args = parser.parse_args()
+    silence_logging()
+
+    rows = [["sqc method", "cache size", "solves", "hits", "misses", "opt. T", "mean tardiness"]]
+    for sqc_method in args.sqc:
+        for cache_size in args.cache:
+            opt_cnt, hit, miss, opt_T, tardiness = 0, 0, 0, 0, []
+            for seed in args.seeds:
+                spf = Shopfloor(**base_config(
+                    m_no = args.m_no, span = args.span, E_utliz = args.utl, seed = seed, sqc_method = getattr(SequencingMethod, sqc_method),
+                    schedule_cache_size = cache_size, processing_time_variability = False, random_MTTR = False, quiet = True, headless = True))
+                spf.run_simulation()
+                opt_cnt += spf.recorder.opt_cnt
+                hit += spf.recorder.opt_cache_hit
+                miss += spf.recorder.opt_cache_miss
+                opt_T += spf.recorder.opt_time_expense
+                tardiness.append(spf.performance()['mean_tardiness'])
+            rows.append([sqc_method, cache_size, opt_cnt, hit, miss, round(opt_T, 2), round(np.mean(tardiness), 3)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Throughput of the simulator over a matrix of shopfloor settings and sequencing methods, with stored baselines
+Every run builds its own Shopfloor in a new worker process (so that the peak RSS is its own), in quiet mode without
+console stream or Gantt chart, and reports the jobs completed and events processed per second of wall time,
+the peak resident set size, and the share of wall time spent in the handlers of the simulation logger (writing the log file).
+
+The central schedulers (GurobiOptimizer, ORTools, GifflerThompson, TabuSearch) and Rollout solve a problem at every decision
+or trigger, they are only run up to -max_slow_span; Rollout needs the heap engine, and DRL_scheduler a policy, it is skipped.
+The size-limited Gurobi license fails the larger shopfloors, the failure is reported in the row.
+
+Every setting is run -repeat times and the fastest run is kept. A baseline stores the results by setting, later runs list the settings whose events per second dropped, or whose peak RSS
+grew, by more than -threshold, and exit with status 1 if any is found.
+
+usage: python -m benchmark.simulator_throughput -preset quick -baseline benchmark/throughput_baseline.json -save_baseline
+       python -m benchmark.simulator_throughput -m_no 5 20 100 -utl 0.6 0.85 0.95 -span 1000 1000000 -baseline benchmark/throughput_baseline.json
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from tabulate import tabulate
+from typing import Tuple
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.exc import InvalidRequestError
+from src.simulator.simulator import Shopfloor
+from .common import base_config
+
+
+SLOW_METHODS = ['GurobiOptimizer', 'ORTools', 'GifflerThompson', 'TabuSearch', 'Rollout']
+METHODS = [name for name in dict(inspect.getmembers(SequencingMethod, predicate=inspect.ismethod)) if name != 'DRL_scheduler']
+PRESETS = {
+    'quick': {'m_no': [5, 20], 'utl': [0.85], 'span': [10000], 'sqc': [m for m in METHODS if m not in SLOW_METHODS]},
+    'full': {'m_no': [5, 20, 100], 'utl': [0.6, 0.85, 0.95], 'span': [1000, 10000, 100000, 1000000], 'sqc': METHODS},
+}
+BASELINE_FORMAT, BASELINE_VERSION = "throughput_baseline", 1
+
+
+class TimedHandler(logging.Handler):
+    # wraps a handler of the simulation logger and adds up the time spent in it
+    def __init__(self, handler:logging.Handler):
+        super().__init__(handler.level)
+        self.handler = handler
+        self.wall_T = 0.0
+
+
+    def handle(self, record):
+        _start_T = time.perf_counter()
+        try:
+            return self.handler.handle(record)
+        finally:
+            self.wall_T += time.perf_counter() - _start_T
+
+
+def setting_key(setting:dict) -> str:
+    return "m_no={m_no},utl={utl},span={span},sqc={sqc},breakdown={breakdown:d},pt_var={pt_var:d}".format(**setting)
+
+
+def throughput_worker(task:Tuple[dict, int, bool, float]) -> dict:
+    setting, seed, verbose, time_limit = task
+    config = base_config(m_no = setting['m_no'], E_utliz = setting['utl'], span = setting['span'], seed = seed,
+                         sqc_method = getattr(SequencingMethod, setting['sqc']), machine_breakdown = setting['breakdown'],
+                         processing_time_variability = setting['pt_var'], quiet = not verbose, headless = True,
+                         solver_time_limit = time_limit, log_dir = Path(tempfile.mkdtemp()))
+    result = {'key': setting_key(setting), **setting}
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    _start_T = time.perf_counter()
+    try:
+        spf = Shopfloor(engine = 'heap' if setting['sqc'] == 'Rollout' else 'simpy', **config)
+        build_T = time.perf_counter() - _start_T
+        handlers = spf.logger.handlers
+        spf.logger.handlers = [TimedHandler(handler) for handler in handlers]
+        until = setting['span'] + 1000
+        _start_T = time.perf_counter()
+        if spf.engine == 'simpy':
+            # step manually to count the processed events
+            env, event_cnt = spf.env, 0
+            while env.peek() < until:
+                env.step()
+                event_cnt += 1
+        else:
+            spf.env.run(until = until)
+            event_cnt = spf.env.event_cnt
+        wall_T = time.perf_counter() - _start_T
+        log_T = sum(handler.wall_T for handler in spf.logger.handlers)
+        spf.logger.handlers = handlers
+        if spf.narrator.opt_mode:
+            spf.narrator.central_scheduler.post_simulation()
+    except Exception as e:
+        return dict(result, status = f"failed: {type(e).__name__}: {str(e)[:40]}")
+    jobs = spf.performance()['jobs']
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return dict(result, status = "ok", jobs = jobs, events = event_cnt, build_T = build_T, wall_T = wall_T,
+                jobs_per_s = jobs / wall_T, events_per_s = event_cnt / wall_T, log_share = log_T / wall_T,
+                peak_rss_mb = peak_rss / 1024, run_rss_mb = (peak_rss - start_rss) / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of the simulator with stored baselines')
+    parser.add_argument('-preset', default='quick', choices=list(PRESETS), help='Matrix of settings, the options below override it')
+    parser.add_argument('-m_no', default=None, nargs='+', type=int, help='Numbers of machines')
+    parser.add_argument('-utl', default=None, nargs='+', type=float, help='Expected utilization rates')
+    parser.add_argument('-span', default=None, nargs='+', type=float, help='Lengths of simulation, 1e3 to 1e6')
+    parser.add_argument('-sqc', default=None, nargs='+', choices=METHODS, help='Sequencing methods')
+    parser.add_argument('-breakdown', default=[True, False], nargs='+', type=lambda x: x.lower() in ('1', 'true', 'on'), help='Machine breakdown on and/or off')
+    parser.add_argument('-pt_var', default=[False, True], nargs='+', type=lambda x: x.lower() in ('1', 'true', 'on'), help='Processing time variability on and/or off')
+    parser.add_argument('-max_slow_span', default=1000, type=float, help='Longest span run with the central schedulers and Rollout')
+    parser.add_argument('-time_limit', default=1, type=float, help='Wall-clock limit (s) of every solve of the central schedulers')
+    parser.add_argument('-seed', default=1, type=int, help='Random seed of every run')
+    parser.add_argument('-verbose', default=False, action='store_true', help='Log the per-event messages, instead of quiet mode')
+    parser.add_argument('-repeat', default=3, type=int, help='Runs of every setting, the fastest is kept')
+    parser.add_argument('-processes', default=1, type=int, help='Worker processes, more than one shares the CPU between runs')
+    parser.add_argument('-baseline', default=None, help='JSON file of the stored baseline')
+    parser.add_argument('-save_baseline', default=False, action='store_true', help='Store the results as the baseline instead of comparing')
+    parser.add_argument('-threshold', default=0.15, type=float, help='Relative drop of events per second, or growth of peak RSS, reported as regression')
+    args = parser.parse_args()
+
+    matrix = {k: getattr(args, k) or v for k, v in PRESETS[args.preset].items()}
+    settings = [{'m_no': m_no, 'utl': utl, 'span': int(span), 'sqc': sqc, 'breakdown': breakdown, 'pt_var': pt_var}
+                for m_no, utl, span, sqc, breakdown, pt_var in itertools.product(
+                    matrix['m_no'], matrix['utl'], matrix['span'], matrix['sqc'], args.breakdown, args.pt_var)
+                if sqc not in SLOW_METHODS or span <= args.max_slow_span]
+    # one run per process, the peak RSS of a process is never reset, the fastest of the repeated runs of a setting is kept
+    tasks = [(setting, args.seed, args.verbose, args.time_limit) for setting in settings for _ in range(args.repeat)]
+    best = {}
+    with mp.Pool(args.processes, maxtasksperchild=1) as pool:
+        for result in pool.imap(throughput_worker, tasks, chunksize=1):
+            print("{} {}".format(result['key'], "{} events/s".format(round(result['events_per_s'])) if result['status'] == "ok" else result['status']), flush=True)
+            kept = best.get(result['key'])
+            if kept is None or (result['status'] == "ok" and (kept['status'] != "ok" or result['wall_T'] < kept['wall_T'])):
+                best[result['key']] = result
+    results = list(best.values())
+
+    baseline = None
+    if args.baseline is not None and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != BASELINE_FORMAT or baseline['version'] > BASELINE_VERSION:
+            raise InvalidRequestError(f"{args.baseline} is not a baseline of version {BASELINE_VERSION} or before")
+    rows = [["m_no", "utl", "span", "sqc", "breakdown", "pt var.", "jobs", "events", "wall T", "jobs/s", "events/s",
+             "logging", "peak RSS (MB)", "run RSS (MB)", "vs. baseline"]]
+    found = []
+    for r in results:
+        if r['status'] != "ok":
+            rows.append([r['m_no'], r['utl'], r['span'], r['sqc'], r['breakdown'], r['pt_var'], r['status']] + ["-"] * 8)
+            continue
+        change = "-"
+        base = baseline['runs'].get(r['key']) if baseline is not None else None
+        if base is not None and base['status'] == "ok":
+            change = "{:+.1%}".format(r['events_per_s'] / base['events_per_s'] - 1)
+            if r['events_per_s'] < base['events_per_s'] * (1 - args.threshold):
+                found.append(f"{r['key']}: {round(r['events_per_s'])} events/s < {round(base['events_per_s'])} of the baseline")
+            if r['peak_rss_mb'] > base['peak_rss_mb'] * (1 + args.threshold):
+                found.append(f"{r['key']}: peak RSS {round(r['peak_rss_mb'])} MB > {round(base['peak_rss_mb'])} MB of the baseline")
+        rows.append([r['m_no'], r['utl'], r['span'], r['sqc'], r['breakdown'], r['pt_var'], r['jobs'], r['events'],
+                     round(r['wall_T'], 3), round(r['jobs_per_s']), round(r['events_per_s']), "{:.1%}".format(r['log_share']),
+                     round(r['peak_rss_mb'], 1), round(r['run_rss_mb'], 1), change])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+    if args.save_baseline:
+        if args.baseline is None:
+            raise InvalidRequestError("-save_baseline needs the path of -baseline")
+        with open(args.baseline, "w") as f:
+            json.dump({'format': BASELINE_FORMAT, 'version': BASELINE_VERSION, 'seed': args.seed, 'verbose': args.verbose, 'time_limit': args.time_limit,
+                       'runs': {r['key']: r for r in results}}, f, indent=1)
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline is not None:
+        print("{} regression(s) against {}".format(len(found), args.baseline))
+        for line in found:
+            print("  " + line)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Scheduler wall time and tardiness of the central scheduler under different solver budgets (see src.scheduler.scheduler.SolverBudget)
+The wall time is reported per simulated hour, taking one time unit of simulation as a minute
+
+usage: python -m benchmark.solver_budget -sqc ORTools -seeds 1 2 -span 100
+"""
+
+import argparse
+import numpy as np
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+# name, solver_time_limit, solver_workers, solver_gap, solver_det_time
+SETTINGS = [
+    ("no limit", None, 0, None, None),
+    ("10s", 10, 0, None, None),
+    ("1s", 1, 0, None, None),
+    ("0.1s", 0.1, 0, None, None),
+    ("1s, gap 10%", 1, 0, 0.1, None),
+    ("det. 0.5", None, 0, None, 0.5),
+    ("1s, 4 workers", 1, 4, None, None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Central scheduler under solver budgets')
+    parser.add_argument('-sqc', default=['ORTools'], nargs='+', choices=['ORTools', 'GurobiOptimizer'], help='Optimizers')
+    parser.add_argument('-seeds', default=[1, 2], nargs='+', type=int, help='Random seeds of the runs')
+    parser.add_argument('-m_no', default=5, type=int, help='Number of machines')
+    parser.add_argument('-span', default=100, type=int, help='Length of simulation')
+    parser.add_argument('-utl', default=0.8, type=float, help='Expected utilization')
+    args = parser.parse_args()
+    silence_logging()
+
+    rows = [["sqc method", "budget", "solves", "opt. T", "opt. s/sim. hour", "mean tardiness"]]
+    for sqc_method in args.sqc:
+        for name, time_limit, workers, gap, det_time in SETTINGS:
+            opt_cnt, opt_T, sim_T, tardiness = 0, 0, 0, []
+            for seed in args.seeds:
+                spf = Shopfloor(**base_config(
+                    m_no = args.m_no, span = args.span, E_utliz = args.utl, seed = seed, sqc_method = getattr(SequencingMethod, sqc_method),
+                    solver_time_limit = time_limit, solver_workers = workers, solver_gap = gap, solver_det_time = det_time,
+                    processing_time_variability = False, random_MTTR = False, quiet = True, headless = True))
+                spf.run_simulation()
+                opt_cnt += spf.recorder.opt_cnt
+                opt_T += spf.recorder.opt_time_expense
+                sim_T += spf.recorder.last_job_comp_T
+                tardiness.append(spf.performance()['mean_tardiness'])
+            rows.append([sqc_method, name, opt_cnt, round(opt_T, 2), round(opt_T / sim_T * 60, 3), round(np.mean(tardiness), 3)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Local search backend of the central scheduler (see src.scheduler.scheduler.TabuSearch): tardiness against the time budget
+of every solve, compared with ORTools under the same budget, on the logged over-extended problems (if given)
+and on random problems of -jobs jobs on -machines machines, and in simulation runs
+
+usage: python -m benchmark.tabu_search logs/<run>/over_extended_problems.json -budgets 0.05 0.2 1 -seeds 1 2 3
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from tabulate import tabulate
+from types import SimpleNamespace
+
+from src.scheduler.scheduler import GifflerThompson, ORTools, SolverBudget, TabuSearch
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+from .decomposition import indexed_components, load_problems
+from .giffler_thompson import random_problem, tardiness
+
+
+# name: scheduler and its options
+METHODS = {
+    'ORTools': (ORTools, {}),
+    'TS N5': (TabuSearch, {'neighborhood': 'N5', 'max_iter': 10**6}),
+    'TS N7': (TabuSearch, {'neighborhood': 'N7', 'max_iter': 10**6}),
+}
+
+
+def budget_table(problems:list, budgets:list, logger) -> list:
+    # mean tardiness and solve time of every method under every budget, the Giffler-Thompson schedule by ATC for reference
+    rows = [["method", "budget", "mean T", "mean tardiness", "gap to GT ATC"]]
+    reference = []
+    for now, jobs, machines in problems:
+        trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+        schedule, _ = GifflerThompson.solve_scheduling_problem(logger, SimpleNamespace(now = now), list(machines.values()), None, trajectories, jobs)
+        reference.append(tardiness(schedule, jobs))
+    rows.append(["GT ATC", "-", "-", round(np.mean(reference), 2), "+0.00"])
+    for method, (scheduler, options) in METHODS.items():
+        for time_limit in budgets:
+            budget = SolverBudget(time_limit = time_limit)
+            solve_T, _tardiness = [], []
+            for now, jobs, machines in problems:
+                trajectories = {j_idx: job.traj for j_idx, job in jobs.items()}
+                job_intersections, _ = indexed_components(trajectories)
+                _start_T = time.perf_counter()
+                schedule, _ = scheduler.solve_scheduling_problem(logger, SimpleNamespace(now = now), list(machines.values()),
+                                                                 job_intersections, trajectories, jobs, budget = budget, **options)
+                solve_T.append(time.perf_counter() - _start_T)
+                _tardiness.append(tardiness(schedule, jobs))
+            rows.append([method, time_limit, round(np.mean(solve_T), 3), round(np.mean(_tardiness), 2),
+                         "{:+.2f}".format(np.mean(_tardiness) - np.mean(reference))])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local search backend of the central scheduler')
+    parser.add_argument('file', nargs='?', default=None, help='over_extended_problems.json of a simulation with ORTools')
+    parser.add_argument('-budgets', default=[0.05, 0.2, 1], nargs='+', type=float, help='Wall-clock limits (s) of every solve')
+    parser.add_argument('-jobs', default=20, type=int, help='Number of jobs of the random problems, 0 to skip')
+    parser.add_argument('-machines', default=5, type=int, help='Number of machines of the random problems')
+    parser.add_argument('-reps', default=5, type=int, help='Number of random problems')
+    parser.add_argument('-time_limit', default=1, type=float, help='Wall-clock limit (s) of every solve in simulation')
+    parser.add_argument('-seeds', default=[1, 2, 3], nargs='*', type=int, help='Random seeds of the simulation runs, none to skip')
+    parser.add_argument('-span', default=100, type=int, help='Length of simulation')
+    parser.add_argument('-utl', default=0.6, type=float, help='Expected utilization of simulation')
+    args = parser.parse_args()
+    silence_logging()
+    # the ORTools log is written next to the first handler of logger
+    logger = logging.getLogger("benchmark.tabu_search")
+    logger.addHandler(logging.FileHandler(Path(tempfile.mkdtemp()) / "sim.log"))
+
+    if args.file is not None:
+        print("Logged problems")
+        print(tabulate(budget_table(load_problems(args.file, np.random.default_rng(0)), args.budgets, logger), headers="firstrow", tablefmt="psql"))
+    if args.jobs:
+        rng = np.random.default_rng(0)
+        problems = [random_problem(args.jobs, args.machines, rng) for _ in range(args.reps)]
+        print(f"Random problems, {args.jobs} jobs x {args.machines} machines")
+        print(tabulate(budget_table(problems, args.budgets, logger), headers="firstrow", tablefmt="psql"))
+
+    if args.seeds:
+        rows = [["method", "solves", "opt. T", "opt. T / solve (ms)", "mean tardiness"]]
+        for method in ['ORTools', 'TabuSearch', 'GifflerThompson']:
+            opt_cnt, opt_T, _tardiness = 0, 0, []
+            for seed in args.seeds:
+                spf = Shopfloor(**base_config(
+                    span = args.span, E_utliz = args.utl, seed = seed, sqc_method = getattr(SequencingMethod, method),
+                    solver_time_limit = args.time_limit, schedule_cache_size = 0,
+                    processing_time_variability = False, random_MTTR = False, quiet = True, headless = True))
+                spf.run_simulation()
+                opt_cnt += spf.recorder.opt_cnt
+                opt_T += spf.recorder.opt_time_expense
+                _tardiness.append(spf.performance()['mean_tardiness'])
+            rows.append([method, opt_cnt, round(opt_T, 3), round(opt_T / max(opt_cnt, 1) * 1000, 3), round(np.mean(_tardiness), 3)])
+        print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
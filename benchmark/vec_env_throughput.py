@@ -0,0 +1,49 @@
+"""
+Decision throughput of the DRL vector environment, with one batched forward pass of a small policy network per step on CPU
+
+usage: python -m benchmark.vec_env_throughput -num_envs 1 8 64 -steps 500
+"""
+
+import argparse
+import time
+import torch
+from tabulate import tabulate
+
+from src.DRL.policy import QueuePolicy
+from src.DRL.vec_env import ShopfloorVecEnv
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of the DRL vector environment')
+    parser.add_argument('-num_envs', default=[1, 8, 64], nargs='+', type=int, help='Numbers of sub-environments')
+    parser.add_argument('-steps', default=500, type=int, help='Batched steps per measurement')
+    parser.add_argument('-m_no', default=10, type=int, help='Number of machines')
+    parser.add_argument('-span', default=2000, type=int, help='Length of simulation of an episode')
+    parser.add_argument('-max_queue', default=32, type=int, help='Padded queue length of observation')
+    parser.add_argument('-engine', default='heap', choices=['simpy', 'heap'], help='Simulation engine')
+    args = parser.parse_args()
+    silence_logging()
+    torch.set_num_threads(1)
+    policy = QueuePolicy().eval()
+
+    rows = [["envs", "decisions", "episodes", "wall T", "policy T", "decisions/s"]]
+    for num_envs in args.num_envs:
+        vec_env = ShopfloorVecEnv(num_envs, max_queue = args.max_queue, engine = args.engine,
+                                  **base_config(m_no = args.m_no, span = args.span, E_utliz = 0.9))
+        obs, _ = vec_env.reset(seed = 1)
+        policy_T = 0
+        _start_T = time.perf_counter()
+        for _ in range(args.steps):
+            _policy_start_T = time.perf_counter()
+            actions = policy.act(obs)
+            policy_T += time.perf_counter() - _policy_start_T
+            obs, rewards, terminated, truncated, infos = vec_env.step(actions)
+        wall_T = time.perf_counter() - _start_T
+        rows.append([num_envs, vec_env.decision_cnt, int(vec_env.episode_cnt.sum()), round(wall_T, 2), round(policy_T, 2),
+                     round(vec_env.decision_cnt / wall_T)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Solve time of the central scheduler with and without warm start from the previous schedule, on the same seeds
+Without a time limit both runs solve every problem to optimality, the tardiness can still differ between the runs
+because equally good schedules are broken differently
+
+usage: python -m benchmark.warm_start -sqc ORTools -seeds 1 2 3 -span 100
+"""
+
+import argparse
+import numpy as np
+import time
+from tabulate import tabulate
+
+from src.scheduler.sequencing_rule import SequencingMethod
+from src.simulator.simulator import Shopfloor
+from .common import base_config, silence_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm-started re-solves of the central scheduler')
+    parser.add_argument('-sqc', default=['ORTools'], nargs='+', choices=['ORTools', 'GurobiOptimizer'], help='Optimizers')
+    parser.add_argument('-seeds', default=[1, 2, 3], nargs='+', type=int, help='Random seeds of the runs')
+    parser.add_argument('-m_no', default=5, type=int, help='Number of machines')
+    parser.add_argument('-span', default=100, type=int, help='Length of simulation')
+    parser.add_argument('-utl', default=0.6, type=float, help='Expected utilization')
+    args = parser.parse_args()
+    silence_logging()
+
+    rows = [["sqc method", "warm start", "solves", "solve T", "ms/solve", "mean tardiness", "wall T"]]
+    for sqc_method in args.sqc:
+        for warm_start in (False, True):
+            opt_cnt, opt_T, tardiness, wall_T = 0, 0, [], 0
+            for seed in args.seeds:
+                spf = Shopfloor(**base_config(
+                    m_no = args.m_no, span = args.span, E_utliz = args.utl, seed = seed, sqc_method = getattr(SequencingMethod, sqc_method),
+                    warm_start = warm_start, processing_time_variability = False, random_MTTR = False, quiet = True, headless = True))
+                _start_T = time.perf_counter()
+                spf.run_simulation()
+                wall_T += time.perf_counter() - _start_T
+                opt_cnt += spf.recorder.opt_cnt
+                opt_T += spf.recorder.opt_time_expense
+                tardiness.append(spf.performance()['mean_tardiness'])
+            rows.append([sqc_method, warm_start, opt_cnt, round(opt_T, 2), round(opt_T / max(opt_cnt, 1) * 1e3, 1),
+                         round(np.mean(tardiness), 3), round(wall_T, 2)])
+    print(tabulate(rows, headers="firstrow", tablefmt="psql"))
+
+
+if __name__ == '__main__':
+    main()
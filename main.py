@@ -7,16 +7,17 @@ Script to start the simulation
 import argparse
 import inspect
 from pathlib import Path
+from tabulate import tabulate
 from typing import List
 
 from src.scheduler.sequencing_rule import SequencingMethod
-from src.simulator.simulator import Simulator, SimulatorMultiThread
+from src.simulator.simulator import Simulator
 
 parser = argparse.ArgumentParser(description='demonstration')
 
 # system specification
 parser.add_argument('-m_no', default=5, action='store', type=int, help='Number of Machines in system')
-parser.add_argument('-seed', default=0, action='store', type=int, help='Random seed')
+parser.add_argument('-seed', default=0, action='store', type=int, help='Random seed, 0 to draw one (replications start from 1 instead)')
 parser.add_argument('-span', default=100, action='store', type=int, help='Length of simulation')
 parser.add_argument('-utl', '--E_utliz', default=0.6, action='store', type=float, help='Expected system utilization rate')
 
@@ -33,30 +34,71 @@ parser.add_argument('-rnd_mtbf', '--random_MTBF', default=True, action='store_tr
 parser.add_argument('-mttr', '--MTTR', default=10, help='Mean time to repair')
 parser.add_argument('-rnd_mttr', '--random_MTTR', default=False, action='store_true', help='Use random MTTR')
 
+# replay a scenario generated by src.simulator.scenario, its settings override the ones above
+parser.add_argument('-scenario', default=None, help='Path of a pre-sampled scenario file (.h5 or .npz)')
+
 # logging and plotting settings
 parser.add_argument('-draw', '--draw_gantt', default=5, action='store', type=int, help='Any value greater than 0 would plot the gantt chart, strictly no-show for >200 simulation')
 parser.add_argument('-save_gantt', default=True, action='store_false', help='Save the gantt chart figure to log?')
 parser.add_argument('-ns', '--no_stream', default=False, action='store_false', help='Flag to disable stream logger (print to console)')
+parser.add_argument('-quiet', default=False, action='store_true', help='Production mode, only log warnings and the post-simulation report')
+parser.add_argument('-trace', '--trace_capacity', default=0, type=int, help='Keep the last N events in memory and dump them to log if simulation fails, 0 to disable')
+parser.add_argument('-stream_records', default=False, action='store_true', help='Keep running KPI aggregates and write operation/job records to records.h5 in chunks, for long simulations')
+parser.add_argument('-profile', default=False, action='store_true', help='Time the hot phases of simulation, report them and write profile.json and profile.folded (collapsed stacks) to log')
 
 # select a scheudling rule or centralized scheduler
 methods = dict(inspect.getmembers(SequencingMethod, predicate=inspect.ismethod))
-parser.add_argument('-sqc', '--sqc_method', default='GurobiOptimizer', help='Sequencing rule or scheduler')
+parser.add_argument('-sqc', '--sqc_method', default=['GurobiOptimizer'], nargs='+', help='Sequencing rule or scheduler, more than one can be given for replications')
+parser.add_argument('-time_limit', '--solver_time_limit', default=10, type=float, help='Wall-clock limit (s) of every call to the optimizer, 0 for no limit')
+parser.add_argument('-workers', '--solver_workers', default=0, type=int, help='Parallel search workers of the optimizer, 0 for the solver default')
+parser.add_argument('-gap', '--solver_gap', default=None, type=float, help='Stop the optimizer within this relative optimality gap')
+parser.add_argument('-det_time', '--solver_det_time', default=None, type=float, help='Deterministic limit of every call to the optimizer (CP-SAT deterministic time, Gurobi work units), for reproducible runs')
+parser.add_argument('-solver_pool', '--solver_pool_size', default=None, type=int, help='Threads that solve the independent parts of a scheduling problem, default to 1, set -workers as well to share the cores')
+parser.add_argument('-formulation', '--gurobi_formulation', default='quadratic', choices=['quadratic', 'big_m', 'indicator'], help='Formulation of the precedence between jobs in the Gurobi model')
+parser.add_argument('-fresh_model', '--gurobi_reuse_model', default=True, action='store_false', help='Start a new Gurobi environment and build a new model for every solve, instead of updating one model in place')
+parser.add_argument('-gt_rule', default='ATC', help='Priority rule of the GifflerThompson scheduler: ATC, EDD, SPT, Slack, CR or MWKR')
+parser.add_argument('-neighborhood', '--ls_neighborhood', default='N7', choices=['N5', 'N7'], help='Neighborhood of the TabuSearch scheduler on the critical blocks')
+parser.add_argument('-tenure', '--tabu_tenure', default=8, type=int, help='Minimum number of steps a reversed order of operations stays tabu in the TabuSearch scheduler')
+parser.add_argument('-ls_iter', '--ls_max_iter', default=1000, type=int, help='Maximum steps of the TabuSearch scheduler per solve, within the time limit')
+parser.add_argument('-cache', '--schedule_cache_size', default=0, type=int, help='Number of solved scheduling problems kept for re-use, default to 0 (disabled)')
+parser.add_argument('-rebuild_window', default=None, type=float, help='Coalesce the schedule-rebuild triggers within this simulated time, 0 for the same time stamp only, default to rebuild at every trigger')
+parser.add_argument('-rebuild_interval', '--rebuild_min_interval', default=0, type=float, help='Minimum simulated time between two schedule rebuilds')
+parser.add_argument('-rebuild_on_idle', default=False, action='store_true', help='Rebuild the schedule only when a machine runs out of it')
+parser.add_argument('-warm_start', default=False, action='store_true', help='Start every re-solve of the central scheduler from the previous schedule')
+parser.add_argument('-engine', default='simpy', choices=['simpy', 'heap'], help='Simulation engine, the event heap engine only supports rule-based sequencing')
 
-# threading
-parser.add_argument('-multi_thread', default=False , action='store_true', help='Use this flag to create multiple threads/environments')
-parser.add_argument('-thread_no', default= 4, type=int, help='Number of threads')
+# replications
+parser.add_argument('-multi_thread', default=False , action='store_true', help='Use this flag to run the replications in a pool of worker processes')
+parser.add_argument('-thread_no', default=None, type=int, help='Number of worker processes, default to the number of CPU cores')
+parser.add_argument('-rep', '--replications', default=1, type=int, help='Number of replications (seeds) of each sequencing method, seeds start from -seed')
 
 
 args = parser.parse_args()
 
 
 if __name__ == '__main__':
-    Simulator.run(
-        m_no = args.m_no, span = args.span, E_utliz = args.E_utliz, seed = args.seed, 
+    config = dict(
+        m_no = args.m_no, span = args.span, E_utliz = args.E_utliz,
         pt_range = args.pt_range, due_tightness = args.due_tightness, 
         processing_time_variability = args.processing_time_variability, pt_cv = args.pt_cv,
         machine_breakdown = args.machine_breakdown, MTBF = args.MTBF, MTTR = args.MTTR, 
         random_MTBF = args.random_MTBF, random_MTTR = args.random_MTTR,
         stream = not args.no_stream, draw_gantt = args.draw_gantt, save_gantt = args.save_gantt,
-        sqc_method = methods[args.sqc_method]
-        )
\ No newline at end of file
+        quiet = args.quiet, trace_capacity = args.trace_capacity, engine = args.engine, scenario = args.scenario,
+        stream_records = args.stream_records, profile = args.profile, warm_start = args.warm_start,
+        solver_time_limit = args.solver_time_limit or None, solver_workers = args.solver_workers,
+        solver_gap = args.solver_gap, solver_det_time = args.solver_det_time, schedule_cache_size = args.schedule_cache_size,
+        solver_pool_size = args.solver_pool_size, gurobi_formulation = args.gurobi_formulation, gurobi_reuse_model = args.gurobi_reuse_model, gt_rule = args.gt_rule,
+        ls_neighborhood = args.ls_neighborhood, tabu_tenure = args.tabu_tenure, ls_max_iter = args.ls_max_iter,
+        rebuild_window = args.rebuild_window, rebuild_min_interval = args.rebuild_min_interval, rebuild_on_idle = args.rebuild_on_idle
+        )
+    if args.multi_thread or args.replications > 1 or len(args.sqc_method) > 1:
+        # N seeds x M sequencing methods, one row per run
+        # seed 0 would draw a different random workload for every method, replications start from 1 instead
+        first_seed = args.seed or 1
+        results = Simulator.replicate(
+            seeds = list(range(first_seed, first_seed + args.replications)), sqc_methods = args.sqc_method,
+            processes = args.thread_no if args.multi_thread else 1, **config)
+        print(tabulate(results, headers="keys", tablefmt="psql", showindex=False, floatfmt=".2f"))
+    else:
+        Simulator.run(seed = args.seed, sqc_method = methods[args.sqc_method[0]], **config)
\ No newline at end of file
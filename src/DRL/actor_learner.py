@@ -0,0 +1,227 @@
+"""
+Asynchronous actor/learner training over shared memory
+Each actor process runs its own vector environment of shopfloors with a local copy of the policy,
+and writes transitions into its own shared-memory ring buffer. The learner (the calling process) moves the transitions
+from the ring buffers into a replay memory, trains the policy, and publishes the weights through shared memory.
+Only the names of the shared memory blocks and the configuration are pickled when the actors start,
+the transitions and the weights are copied between numpy views of shared memory.
+"""
+
+# standard imports
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import time
+import torch
+from typing import Dict, Optional
+# project modules
+from .policy import QueuePolicy
+from .replay_memory import ReplayMemory
+from .vec_env import FEATURE_NO, ShopfloorVecEnv
+from ..utilities import LOG_DIR, prune_logs
+
+
+def _attach(size:int, name:Optional[str]) -> SharedMemory:
+    # create a new block, or attach to the block created by another process
+    return SharedMemory(name=name, create=name is None, size=size)
+
+
+class SharedRing:
+    '''
+    Single-producer single-consumer ring buffer of transitions in shared memory
+    The header holds [head, tail, ready]: rows in [tail, head) are written but not yet consumed,
+    the producer only advances head after the rows are written, and waits if the ring is full
+    '''
+    def __init__(self, capacity:int, max_queue:int, name:Optional[str] = None):
+        self.capacity = capacity
+        fields = [
+            ('header', (3,), np.int64),
+            ('queue', (capacity, max_queue, FEATURE_NO), np.float32),
+            ('next_queue', (capacity, max_queue, FEATURE_NO), np.float32),
+            ('action_mask', (capacity, max_queue), np.bool_),
+            ('next_action_mask', (capacity, max_queue), np.bool_),
+            ('action', (capacity,), np.int64),
+            ('reward', (capacity,), np.float32),
+            ('done', (capacity,), np.bool_)]
+        # 8-byte aligned offsets
+        offsets, size = [], 0
+        for _, shape, dtype in fields:
+            offsets.append(size)
+            size += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8
+        self.shm = _attach(size, name)
+        self.name = self.shm.name
+        for (field, shape, dtype), offset in zip(fields, offsets):
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+
+
+    def push(self, state:Dict[str, np.ndarray], action:np.ndarray, reward:np.ndarray, next_state:Dict[str, np.ndarray],
+             done:np.ndarray, stop_event=None):
+        n = len(action)
+        head = int(self.header[0])
+        while head + n - self.header[1] > self.capacity:
+            if stop_event is not None and stop_event.is_set():
+                return
+            time.sleep(0.001)
+        idx = (head + np.arange(n)) % self.capacity
+        self.queue[idx], self.action_mask[idx] = state['queue'], state['action_mask']
+        self.next_queue[idx], self.next_action_mask[idx] = next_state['queue'], next_state['action_mask']
+        self.action[idx], self.reward[idx], self.done[idx] = action, reward, done
+        self.header[0] = head + n
+
+
+    def pop_into(self, memory:ReplayMemory) -> int:
+        # move all written rows into the replay memory, return the number of rows
+        head, tail = int(self.header[0]), int(self.header[1])
+        if head == tail:
+            return 0
+        idx = (tail + np.arange(head - tail)) % self.capacity
+        memory.add_batch({'queue': self.queue[idx], 'action_mask': self.action_mask[idx]}, self.action[idx], self.reward[idx],
+                         {'queue': self.next_queue[idx], 'action_mask': self.next_action_mask[idx]}, self.done[idx])
+        self.header[1] = head
+        return head - tail
+
+
+class SharedWeights:
+    '''
+    Flat float32 copy of the policy parameters in shared memory, guarded by a version counter (seqlock)
+    The version is odd while the learner is writing, a reader retries later if the version changed during its copy
+    '''
+    def __init__(self, numel:int, name:Optional[str] = None):
+        self.shm = _attach(8 + numel * 4, name)
+        self.name = self.shm.name
+        self.version = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.params = np.ndarray((numel,), dtype=np.float32, buffer=self.shm.buf, offset=8)
+
+
+    def publish(self, policy:torch.nn.Module):
+        self.version[0] += 1
+        self.params[:] = torch.nn.utils.parameters_to_vector(policy.parameters()).detach().numpy()
+        self.version[0] += 1
+
+
+    def pull(self, policy:torch.nn.Module, local_version:int) -> int:
+        # load the weights if a newer version is published, return the version of the local policy
+        version = int(self.version[0])
+        if version == local_version or version % 2:
+            return local_version
+        params = self.params.copy()
+        if int(self.version[0]) != version:
+            return local_version
+        torch.nn.utils.vector_to_parameters(torch.from_numpy(params), policy.parameters())
+        return version
+
+
+def actor_worker(actor_idx:int, ring_name:str, weights_name:str, stop_event, config:dict):
+    torch.set_num_threads(1)
+    ring = SharedRing(config['ring_capacity'], config['max_queue'], name=ring_name)
+    policy = QueuePolicy(config['hidden']).eval()
+    weights = SharedWeights(sum(p.numel() for p in policy.parameters()), name=weights_name)
+    version = weights.pull(policy, -1)
+    vec_env = ShopfloorVecEnv(config['envs_per_actor'], max_queue = config['max_queue'], engine = config['engine'],
+                              log_dir = LOG_DIR / f"actor{actor_idx}", **config['env_kwargs'])
+    obs, _ = vec_env.reset(seed = config['seed'] + actor_idx * 10000)
+    rng = np.random.default_rng(config['seed'] + actor_idx)
+    state = {name: np.empty_like(obs[name]) for name in ('queue', 'action_mask')}
+    ring.header[2] = 1 # ready
+    while not stop_event.is_set():
+        # epsilon-greedy, random action is the best of random scores over valid positions
+        actions = policy.act(obs)
+        explore = rng.random(len(actions)) < config['epsilon']
+        if explore.any():
+            random_actions = np.where(obs['action_mask'], rng.random(obs['action_mask'].shape), -1).argmax(axis=1)
+            actions = np.where(explore, random_actions, actions)
+        # the observation buffers of vector environment are overwritten by step
+        for name in state:
+            state[name][:] = obs[name]
+        obs, rewards, terminated, truncated, infos = vec_env.step(actions)
+        # the next observation of a finished episode is the reset one, no bootstrapping from it
+        ring.push(state, actions, rewards, obs, terminated | truncated, stop_event)
+        version = weights.pull(policy, version)
+    ring.shm.close()
+    weights.shm.close()
+
+
+class AsyncTrainer:
+    def __init__(self, num_actors:int, envs_per_actor:int = 4, max_queue:int = 16, engine:str = "heap",
+                 ring_capacity:int = 4096, memory_capacity:int = 100000, batch_size:int = 256, lr:float = 1e-3,
+                 gamma:float = 0.99, reward_scale:float = 0.01, epsilon:float = 0.1, publish_every:int = 20,
+                 hidden:int = 64, seed:int = 0, **env_kwargs):
+        for k, v in dict(locals()).items():
+            if k not in ('self', 'env_kwargs'):
+                setattr(self, k, v)
+        self.env_kwargs = env_kwargs
+        torch.manual_seed(seed)
+        self.policy = QueuePolicy(hidden)
+        self.optimizer = torch.optim.Adam(self.policy.parameters(), lr=lr)
+        self.memory = ReplayMemory(memory_capacity, {
+            'queue': ((max_queue, FEATURE_NO), 'float32'), 'action_mask': ((max_queue,), 'bool')})
+        self.rng = np.random.default_rng(seed)
+
+
+    def update(self) -> float:
+        # one-step Q-learning on a uniform batch
+        batch = self.memory.sample(self.batch_size, self.rng)
+        q = self.policy(torch.from_numpy(batch['state']['queue']), torch.from_numpy(batch['state']['action_mask']))
+        q = q.gather(1, torch.from_numpy(batch['action']).unsqueeze(1)).squeeze(1)
+        with torch.no_grad():
+            next_q = self.policy(torch.from_numpy(batch['next_state']['queue']), torch.from_numpy(batch['next_state']['action_mask'])).max(dim=1).values
+            done = torch.from_numpy(batch['done']).float()
+            target = torch.from_numpy(batch['reward']) * self.reward_scale + self.gamma * next_q * (1 - done)
+        loss = torch.nn.functional.smooth_l1_loss(q, target)
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
+
+
+    def run(self, duration:float) -> dict:
+        '''
+        Train for [duration] seconds after all actors are ready, return the throughput statistics
+        '''
+        prune_logs()
+        config = dict(ring_capacity = self.ring_capacity, max_queue = self.max_queue, hidden = self.hidden,
+                      envs_per_actor = self.envs_per_actor, engine = self.engine, seed = self.seed,
+                      epsilon = self.epsilon, env_kwargs = self.env_kwargs)
+        numel = sum(p.numel() for p in self.policy.parameters())
+        weights = SharedWeights(numel)
+        weights.publish(self.policy)
+        rings = [SharedRing(self.ring_capacity, self.max_queue) for _ in range(self.num_actors)]
+        ctx = mp.get_context('spawn')
+        stop_event = ctx.Event()
+        actors = [ctx.Process(target=actor_worker, args=(i, ring.name, weights.name, stop_event, config), daemon=True)
+                  for i, ring in enumerate(rings)]
+        stats = {'actors': self.num_actors, 'transitions': 0, 'updates': 0, 'loss': np.nan}
+        try:
+            for actor in actors:
+                actor.start()
+            while not all(ring.header[2] for ring in rings):
+                if not all(actor.is_alive() for actor in actors):
+                    raise RuntimeError("Actor process exited before it was ready")
+                time.sleep(0.01)
+            # the transitions produced during start-up are not counted
+            for ring in rings:
+                ring.pop_into(self.memory)
+            _start_T = time.perf_counter()
+            while time.perf_counter() - _start_T < duration:
+                stats['transitions'] += sum(ring.pop_into(self.memory) for ring in rings)
+                if len(self.memory) >= self.batch_size:
+                    stats['loss'] = self.update()
+                    stats['updates'] += 1
+                    if stats['updates'] % self.publish_every == 0:
+                        weights.publish(self.policy)
+                else:
+                    time.sleep(0.001)
+            stats['wall_T'] = time.perf_counter() - _start_T
+            stats['weight_version'] = int(weights.version[0]) // 2
+        finally:
+            stop_event.set()
+            for actor in actors:
+                actor.join(timeout=10)
+                if actor.is_alive():
+                    actor.terminate()
+            for block in [weights] + rings:
+                block.shm.close()
+                block.shm.unlink()
+        stats['transitions/s'] = stats['transitions'] / stats['wall_T']
+        stats['updates/s'] = stats['updates'] / stats['wall_T']
+        return stats
@@ -0,0 +1,89 @@
+"""
+Decision broker of the DRL_scheduler in a standalone simulation
+Machines of the same shopfloor often need a sequencing decision at the same time (e.g. after a job arrival, the end of
+a breakdown or a batch release). Instead of a forward pass of the policy per decision, the broker runs the simulation
+until every event of the current time is processed, then serves all decisions raised at that time with one padded and
+masked batched forward pass, and resumes each machine with its action.
+
+The policy is any object with act(obs) -> actions, where obs has the layout of vec_env.ShopfloorVecEnv
+(e.g. policy.QueuePolicy), a decision sees the queue of its machine after all arrivals of the current time.
+Because the machines resume after the other events of the same time, ties between simultaneous events can be broken
+differently from ShopfloorVecEnv, a policy that reproduces a rule there does not necessarily reproduce it here.
+"""
+
+# standard imports
+import numpy as np
+import time
+from typing import Union
+
+
+# time to due date, remaining expected work, pt of the operation, time in queue, time to operation due date
+FEATURE_NO = 5
+
+
+def observe_queue(m, queue:np.ndarray, action_mask:np.ndarray):
+    # write the padded features of machine's queue into the (max_queue, FEATURE_NO) and (max_queue,) rows
+    f = m.queue.features
+    n = min(len(f), len(action_mask))
+    now = f.now
+    queue[:n, 0] = f.due[:n] - now
+    queue[:n, 1] = f.remaining_pt[:n]
+    queue[:n, 2] = f.next_pt[:n]
+    queue[:n, 3] = now - f.arrival_T[:n]
+    queue[:n, 4] = f.op_due[:n] - now
+    queue[n:] = 0
+    action_mask[:n] = True
+    action_mask[n:] = False
+
+
+class DecisionBroker:
+    def __init__(self, policy, m_no:int, max_queue:int = 16, batched:bool = True):
+        '''
+        batched: False serves every decision with its own forward pass, as the machines would do by themselves
+        '''
+        self.policy = policy
+        self.max_queue = max_queue
+        self.batched = batched
+        # at most one pending decision per machine
+        self.obs = {
+            'queue': np.zeros((m_no, max_queue, FEATURE_NO), dtype=np.float32),
+            'action_mask': np.zeros((m_no, max_queue), dtype=bool),
+            'm_idx': np.zeros(m_no, dtype=np.int64)}
+        self.decision_cnt = 0
+        self.forward_cnt = 0
+        self.inference_T = 0.0
+
+
+    def run(self, spf, until:Union[int, float]):
+        '''
+        Same as spf.env.run(until), serving the pending decisions whenever the simulation moves on to a later time
+        '''
+        env, pending = spf.env, spf.recorder.pending_decisions
+        while True:
+            next_T = env.peek()
+            if pending and next_T > env.now:
+                self.decide(spf)
+            elif next_T < until:
+                env.step()
+            else:
+                return
+
+
+    def decide(self, spf):
+        pending = spf.recorder.pending_decisions
+        n = len(pending)
+        obs = self.obs
+        for i, m_idx in enumerate(pending):
+            observe_queue(spf.m_list[m_idx], obs['queue'][i], obs['action_mask'][i])
+            obs['m_idx'][i] = m_idx
+        _start_T = time.perf_counter()
+        if self.batched:
+            actions = self.policy.act({name: array[:n] for name, array in obs.items()})
+            self.forward_cnt += 1
+        else:
+            actions = np.concatenate([self.policy.act({name: array[i:i+1] for name, array in obs.items()}) for i in range(n)])
+            self.forward_cnt += n
+        self.inference_T += time.perf_counter() - _start_T
+        for i in range(n):
+            spf.m_list[pending.popleft()].act(int(actions[i]))
+        self.decision_cnt += n
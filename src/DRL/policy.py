@@ -0,0 +1,32 @@
+"""
+Policy network of the sequencing agent
+Every queuing job is scored by a shared MLP over its features (see broker.observe_queue), the score is used as the
+Q-value of picking the job, and the invalid (padded) positions are masked out
+"""
+
+import numpy as np
+import torch
+from typing import Dict
+
+from .broker import FEATURE_NO
+
+
+class QueuePolicy(torch.nn.Module):
+    def __init__(self, hidden:int = 64):
+        super().__init__()
+        self.mlp = torch.nn.Sequential(
+            torch.nn.Linear(FEATURE_NO, hidden), torch.nn.ReLU(),
+            torch.nn.Linear(hidden, hidden), torch.nn.ReLU(),
+            torch.nn.Linear(hidden, 1))
+
+
+    def forward(self, queue:torch.Tensor, action_mask:torch.Tensor) -> torch.Tensor:
+        # (batch, max_queue, features) -> (batch, max_queue)
+        scores = self.mlp(queue).squeeze(-1)
+        return scores.masked_fill(~action_mask, -torch.inf)
+
+
+    @torch.no_grad()
+    def act(self, obs:Dict[str, np.ndarray]) -> np.ndarray:
+        # greedy actions of a batch of observations
+        return self(torch.from_numpy(obs['queue']), torch.from_numpy(obs['action_mask'])).argmax(dim=-1).numpy()
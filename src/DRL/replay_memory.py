@@ -0,0 +1,136 @@
+"""
+Fixed-capacity replay memory of contiguous numpy arrays
+The state is a dictionary of named arrays (e.g. the observation of vec_env.ShopfloorVecEnv), next state has the same layout.
+Insertion overwrites the oldest experience once the memory is full, sampling returns index-gathered copies of the arrays,
+the memory can be checkpointed to and restored from HDF5.
+"""
+
+import h5py
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+
+class ReplayMemory:
+    def __init__(self, capacity:int, state_spec:Dict[str, Tuple[tuple, str]], alpha:float = 0.6):
+        '''
+        state_spec: name -> (shape of a single state, numpy dtype), e.g. {'queue': ((16, 5), 'float32')}
+        alpha: exponent of the priority in prioritized sampling, 0 is uniform
+        '''
+        self.capacity = capacity
+        self.state_spec = {name: (tuple(shape), np.dtype(dtype).name) for name, (shape, dtype) in state_spec.items()}
+        self.alpha = alpha
+        # position of the next insertion, and number of experiences stored
+        self.ptr = 0
+        self.size = 0
+        self.state = {name: np.zeros((capacity, *shape), dtype=dtype) for name, (shape, dtype) in self.state_spec.items()}
+        self.next_state = {name: np.zeros((capacity, *shape), dtype=dtype) for name, (shape, dtype) in self.state_spec.items()}
+        self.action = np.zeros(capacity, dtype=np.int64)
+        self.reward = np.zeros(capacity, dtype=np.float32)
+        self.done = np.zeros(capacity, dtype=bool)
+        self.priority = np.zeros(capacity, dtype=np.float64)
+        self.max_priority = 1.0
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    def add(self, state:Dict[str, np.ndarray], action:int, reward:float, next_state:Dict[str, np.ndarray], done:bool):
+        i = self.ptr
+        for name in self.state_spec:
+            self.state[name][i] = state[name]
+            self.next_state[name][i] = next_state[name]
+        self.action[i], self.reward[i], self.done[i] = action, reward, done
+        # new experience is sampled at least once with high probability
+        self.priority[i] = self.max_priority
+        self.ptr = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+
+    def add_batch(self, state:Dict[str, np.ndarray], action:np.ndarray, reward:np.ndarray, next_state:Dict[str, np.ndarray], done:np.ndarray):
+        # one experience per row, e.g. a step of vector environment, written with wrap-around
+        n = len(action)
+        idx = (self.ptr + np.arange(n)) % self.capacity
+        for name in self.state_spec:
+            self.state[name][idx] = state[name]
+            self.next_state[name][idx] = next_state[name]
+        self.action[idx], self.reward[idx], self.done[idx] = action, reward, done
+        self.priority[idx] = self.max_priority
+        self.ptr = (self.ptr + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+
+    def gather(self, idx:np.ndarray) -> dict:
+        return {
+            'idx': idx,
+            'state': {name: column[idx] for name, column in self.state.items()},
+            'action': self.action[idx],
+            'reward': self.reward[idx],
+            'next_state': {name: column[idx] for name, column in self.next_state.items()},
+            'done': self.done[idx]}
+
+
+    def sample(self, batch_size:int, rng:np.random.Generator) -> dict:
+        # uniform, with replacement
+        return self.gather(rng.integers(0, self.size, batch_size))
+
+
+    def sample_prioritized(self, batch_size:int, rng:np.random.Generator, beta:float = 0.4) -> dict:
+        # proportional prioritization, the importance-sampling weights are normalized by their maximum
+        # inverse transform sampling on the cumulative priorities
+        cdf = np.cumsum(self.priority[:self.size] ** self.alpha)
+        idx = np.minimum(np.searchsorted(cdf, rng.random(batch_size) * cdf[-1], side='right'), self.size - 1)
+        p = (self.priority[idx] ** self.alpha) / cdf[-1]
+        weight = (self.size * p) ** (-beta)
+        batch = self.gather(idx)
+        batch['weight'] = (weight / weight.max()).astype(np.float32)
+        return batch
+
+
+    def update_priorities(self, idx:np.ndarray, td_error:np.ndarray, eps:float = 1e-6):
+        priority = np.abs(td_error) + eps
+        self.priority[idx] = priority
+        self.max_priority = max(self.max_priority, float(priority.max()))
+
+
+    def save(self, path:Union[str, Path]) -> Path:
+        '''
+        Checkpoint to HDF5, only the stored experiences are written, from the oldest to the latest
+        '''
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        order = (np.arange(self.size) + (self.ptr if self.size == self.capacity else 0)) % self.capacity
+        with h5py.File(path, 'w') as f:
+            f.attrs['capacity'], f.attrs['size'] = self.capacity, self.size
+            f.attrs['alpha'], f.attrs['max_priority'] = self.alpha, self.max_priority
+            f.attrs['state_spec'] = json.dumps(self.state_spec)
+            for name in self.state_spec:
+                f.create_dataset(f"state/{name}", data=self.state[name][order])
+                f.create_dataset(f"next_state/{name}", data=self.next_state[name][order])
+            for name in ('action', 'reward', 'done', 'priority'):
+                f.create_dataset(name, data=getattr(self, name)[order])
+        return path
+
+
+    @classmethod
+    def load(cls, path:Union[str, Path], capacity:Optional[int] = None) -> "ReplayMemory":
+        '''
+        Restore a checkpoint, a larger capacity can be given to continue filling the memory
+        '''
+        with h5py.File(path, 'r') as f:
+            size = int(f.attrs['size'])
+            capacity = max(capacity or int(f.attrs['capacity']), size)
+            memory = cls(capacity, json.loads(f.attrs['state_spec']), alpha=float(f.attrs['alpha']))
+            # read straight into the preallocated arrays
+            for name in memory.state_spec if size else ():
+                f[f"state/{name}"].read_direct(memory.state[name], dest_sel=np.s_[:size])
+                f[f"next_state/{name}"].read_direct(memory.next_state[name], dest_sel=np.s_[:size])
+            for name in ('action', 'reward', 'done', 'priority') if size else ():
+                f[name].read_direct(getattr(memory, name), dest_sel=np.s_[:size])
+            memory.size = size
+            # the oldest experience is at the front, and is overwritten first if the memory is full
+            memory.ptr = size % capacity
+            memory.max_priority = float(f.attrs['max_priority'])
+        return memory
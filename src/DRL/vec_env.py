@@ -0,0 +1,120 @@
+"""
+Vectorized Gymnasium-style environment of K shopfloors for DRL training
+Every shopfloor uses the DRL_scheduler, the simulation pauses whenever a machine needs a sequencing decision,
+so that one batched policy forward pass serves the pending decisions of all shopfloors.
+
+Observation of a decision, padded to [max_queue] jobs in queue order:
+    queue: (K, max_queue, 5) float32, time to due date, remaining expected work, pt of the operation,
+        time in queue, time to operation due date (see scheduler.queue_features.QueueFeatures)
+    action_mask: (K, max_queue) bool, the positions of queuing jobs, jobs beyond max_queue can not be picked
+    m_idx: (K,) int64, the machine that asks for the decision
+Action: (K,) int, position of the picked job in queue
+Reward: negative increase of the cumulative tardiness of completed jobs since the last decision
+A sub-environment is reset automatically when its simulation ends, the final performance is returned in infos
+"""
+
+# standard imports
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+# project modules
+from .broker import FEATURE_NO, observe_queue
+from ..scheduler.sequencing_rule import SequencingMethod
+from ..simulator.exc import InvalidRequestError
+from ..simulator.simulator import Shopfloor
+from ..utilities import LOG_DIR, prune_logs
+
+
+class ShopfloorVecEnv:
+    def __init__(self, num_envs:int, max_queue:int = 16, engine:str = "simpy", **kwargs):
+        self.num_envs = num_envs
+        self.max_queue = max_queue
+        self.engine = engine
+        # all sub-environments log to the same directory, per-event messages are silenced unless specified
+        # the caller is responsible for pruning the logs if a directory is given, same as setup_logger
+        kwargs = dict(kwargs, sqc_method = SequencingMethod.DRL_scheduler, stream = False, headless = True)
+        kwargs.setdefault('quiet', True)
+        if kwargs.get('log_dir') is None:
+            kwargs['log_dir'] = LOG_DIR / "vec_env"
+            prune_logs()
+        self.kwargs = kwargs
+        self.envs:List[Optional[Shopfloor]] = [None] * num_envs
+        self.seeds = np.zeros(num_envs, dtype=np.int64)
+        self.episode_cnt = np.zeros(num_envs, dtype=np.int64)
+        self.decision_cnt = 0
+        # preallocated batch buffers, overwritten by every step
+        self.obs = {
+            'queue': np.zeros((num_envs, max_queue, FEATURE_NO), dtype=np.float32),
+            'action_mask': np.zeros((num_envs, max_queue), dtype=bool),
+            'm_idx': np.zeros(num_envs, dtype=np.int64)}
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.cum_tardiness = np.zeros(num_envs, dtype=np.float64)
+
+
+    def reset(self, seed:Union[int, Sequence[int], None] = None) -> Tuple[Dict[str, np.ndarray], dict]:
+        '''
+        Reset all sub-environments, an int seed gives seed, seed+1, ... to the sub-environments
+        '''
+        if seed is None:
+            seed = self.kwargs.get('seed', 0)
+        self.seeds[:] = np.arange(seed, seed + self.num_envs) if np.isscalar(seed) else seed
+        self.episode_cnt[:] = 0
+        for i in range(self.num_envs):
+            self.reset_env(i)
+        return self.obs, {}
+
+
+    def step(self, actions:Sequence[int]) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, np.ndarray, dict]:
+        actions = np.asarray(actions)
+        invalid = ~self.obs['action_mask'][np.arange(self.num_envs), actions]
+        if invalid.any():
+            raise InvalidRequestError(f"Actions {actions[invalid].tolist()} of sub-environments {np.flatnonzero(invalid).tolist()} pick no job")
+        infos:Dict[str, list] = {}
+        self.terminated[:] = False
+        for i, spf in enumerate(self.envs):
+            m_idx = spf.recorder.pending_decisions.popleft()
+            spf.m_list[m_idx].act(int(actions[i]))
+            self.decision_cnt += 1
+            if self.advance(i):
+                self.rewards[i] = self.cum_tardiness[i] - spf.recorder.tardiness_stat.sum
+                self.cum_tardiness[i] = spf.recorder.tardiness_stat.sum
+            else:
+                # episode ends, keep the final performance and start the next one
+                self.rewards[i] = self.cum_tardiness[i] - spf.recorder.tardiness_stat.sum
+                self.terminated[i] = True
+                infos.setdefault('final_info', [None] * self.num_envs)[i] = dict(spf.performance(), seed = int(self.seeds[i]))
+                self.seeds[i] += self.num_envs
+                self.episode_cnt[i] += 1
+                self.reset_env(i)
+        return self.obs, self.rewards, self.terminated, self.truncated, infos
+
+
+    def reset_env(self, i:int):
+        # keep creating episodes until one of them asks for a decision
+        while True:
+            spf = Shopfloor(engine = self.engine, **dict(self.kwargs, seed = int(self.seeds[i])))
+            self.envs[i] = spf
+            self.cum_tardiness[i] = 0
+            if self.advance(i):
+                return
+            self.seeds[i] += self.num_envs
+
+
+    def advance(self, i:int) -> bool:
+        '''
+        Run sub-environment i until a machine asks for a decision, write its observation, return False if the simulation ends
+        '''
+        spf = self.envs[i]
+        until = self.kwargs['span'] + 1000
+        while not spf.recorder.pending_decisions:
+            if spf.env.peek() >= until:
+                return False
+            spf.env.step()
+        self.observe(i, spf.m_list[spf.recorder.pending_decisions[0]])
+        return True
+
+
+    def observe(self, i:int, m):
+        observe_queue(m, self.obs['queue'][i], self.obs['action_mask'][i])
+        self.obs['m_idx'][i] = m.m_idx
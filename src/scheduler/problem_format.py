@@ -0,0 +1,120 @@
+"""
+Versioned record of the scheduling problems solved by the central scheduler, shared by all backends
+A record holds everything a backend reads: the remaining operations (machine, processing time), available time and due date
+of every job, and the release time of every machine, all in absolute simulated time with the time of solve ("now").
+The file of records is written by CentralScheduler.post_simulation and replayed by benchmark.replay.
+Files of earlier versions (ORTools records keyed by time, Gurobi lists of operations) are converted when read,
+both miss the due dates, and Gurobi records also the available time of jobs and the release time of machines.
+"""
+
+import hashlib
+import json
+import numpy as np
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from ..simulator.exc import InvalidRequestError
+
+
+FORMAT = "over_extended_problems"
+VERSION = 1
+
+
+def problem_record(now:float, remaining_trajectories:Dict[int, np.ndarray], in_system_jobs:dict,
+                   machine_release_T:Dict[int, float], job_available_T:Dict[int, float], backend:str, time_expense:float) -> dict:
+    return {
+        'now': float(now),
+        'jobs': {str(j_idx): {
+            'ops': [[int(m_idx), float(in_system_jobs[j_idx].pt_by_m_idx[m_idx])] for m_idx in traj],
+            'available': float(job_available_T[j_idx]),
+            'due': float(in_system_jobs[j_idx].due),
+            } for j_idx, traj in remaining_trajectories.items()
+        },
+        'machines': {str(m_idx): float(release_T) for m_idx, release_T in machine_release_T.items()},
+        'backend': backend,
+        'expense': time_expense,
+    }
+
+
+def dump_problems(records:List[dict], path:Path):
+    with open(path, "w") as f:
+        json.dump({'format': FORMAT, 'version': VERSION, 'problems': records}, f)
+
+
+def load_problems(path:Path) -> List[dict]:
+    with open(path) as f:
+        content = json.load(f)
+    if isinstance(content, dict) and content.get('format') == FORMAT:
+        if content['version'] > VERSION:
+            raise InvalidRequestError(f"{path}: version {content['version']} of problem records is newer than {VERSION}")
+        return content['problems']
+    # before the versioned format: {now: problem}, an ORTools problem is a dict, a Gurobi problem a list of operations per job
+    records = []
+    for now, problem in content.items():
+        if isinstance(problem, dict):
+            jobs = {j_idx: {'ops': [[int(m_idx), pt] for m_idx, pt in job['ops']], 'available': job['avail'], 'due': None}
+                    for j_idx, job in problem['Jobs'].items()}
+            records.append({'now': float(now), 'jobs': jobs, 'machines': {m_idx: float(T) for m_idx, T in problem['Machines'].items()},
+                            'backend': 'ORTools', 'expense': problem['Expense']})
+        else:
+            jobs = {str(j_idx): {'ops': [[int(m_idx), pt] for m_idx, pt in ops], 'available': float(now), 'due': None}
+                    for j_idx, ops in enumerate(problem)}
+            machines = sorted(set(m_idx for job in jobs.values() for m_idx, _ in job['ops']))
+            records.append({'now': float(now), 'jobs': jobs, 'machines': {str(m_idx): float(now) for m_idx in machines},
+                            'backend': 'GurobiOptimizer', 'expense': None})
+    return records
+
+
+def problem_id(record:dict) -> str:
+    # stable identity of the problem, the backend and time expense of the logged solve are left out
+    content = json.dumps([record['now'], record['jobs'], record['machines']], sort_keys=True)
+    return hashlib.sha1(content.encode()).hexdigest()[:12]
+
+
+def problem_instance(record:dict, rng:Optional[np.random.Generator] = None) -> Tuple[float, dict, dict]:
+    '''
+    (now, jobs, machines) of a record, with the attributes the backends read from Job and Machine instances
+    A missing due date (records before the versioned format) is drawn as for new jobs, 1.2 to 2 times the total processing time
+    '''
+    rng = rng or np.random.default_rng(0)
+    m_no = max(int(m_idx) for m_idx in record['machines']) + 1
+    jobs, machines = {}, {}
+    for j_idx, job in record['jobs'].items():
+        traj = np.array([m_idx for m_idx, _ in job['ops']], dtype=int)
+        pt = np.array([pt for _, pt in job['ops']])
+        # integer processing times stay integers, as the CP-SAT model requires
+        pt_by_m_idx = np.zeros(m_no, dtype=int if np.all(pt == np.round(pt)) else float)
+        pt_by_m_idx[traj] = pt
+        due = job['due'] if job['due'] is not None else np.round(job['available'] + pt_by_m_idx.sum() * rng.uniform(1.2, 2))
+        jobs[int(j_idx)] = SimpleNamespace(traj = traj, pt_by_m_idx = pt_by_m_idx, remaining_pt = pt_by_m_idx[traj],
+                                           available_T = job['available'], due = due)
+    for m_idx, release_T in record['machines'].items():
+        machines[int(m_idx)] = SimpleNamespace(m_idx = int(m_idx), release_T = release_T)
+    return record['now'], jobs, machines
+
+
+def evaluate_schedule(now:float, jobs:dict, machines:dict, schedule:Dict[Tuple[int, int], float], tol:float = 1e-6) -> float:
+    '''
+    Cumulative tardiness of the schedule (operation begin time by (j_idx, m_idx)) of an instance
+    Raise InvalidRequestError if an operation is missing, begins before its job or machine is ready, or overlaps another
+    '''
+    machine_ops = {m_idx: [] for m_idx in machines}
+    tardiness = 0
+    for j_idx, job in jobs.items():
+        ready_T = max(job.available_T, now)
+        for m_idx in job.traj.tolist():
+            if (j_idx, m_idx) not in schedule:
+                raise InvalidRequestError(f"Operation {(j_idx, m_idx)} is not scheduled")
+            if schedule[j_idx, m_idx] < ready_T - tol:
+                raise InvalidRequestError(f"Operation {(j_idx, m_idx)} begins before its job is ready")
+            ready_T = schedule[j_idx, m_idx] + job.pt_by_m_idx[m_idx]
+            machine_ops[m_idx].append((schedule[j_idx, m_idx], ready_T))
+        tardiness += max(0, ready_T - job.due)
+    for m_idx, ops in machine_ops.items():
+        ready_T = max(machines[m_idx].release_T, now)
+        for begin_T, end_T in sorted(ops):
+            if begin_T < ready_T - tol:
+                raise InvalidRequestError(f"Operations overlap, or begin before the release, on machine {m_idx}")
+            ready_T = end_T
+    return float(tardiness)
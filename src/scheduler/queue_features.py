@@ -0,0 +1,81 @@
+"""
+Feature arrays of the jobs queuing at a machine, one row per job, kept in the same order as the machine's queue
+The row of a job is written once when it joins the queue and removed when it is picked, so a sequencing decision
+only reads contiguous arrays instead of walking through the job instances.
+"""
+
+import numpy as np
+from typing import Any, List
+
+
+# column index of features
+DUE, REMAINING_PT, NEXT_PT, ARRIVAL_T, OP_DUE = range(5)
+
+
+class QueueFeatures:
+    def __init__(self, env:Any, capacity:int = 16):
+        self.env = env
+        self.size = 0
+        self.data = np.zeros((capacity, 5), dtype=np.float64)
+
+
+    @classmethod
+    def from_jobs(cls, jobs:List[Any]) -> "QueueFeatures":
+        # build the arrays from scratch, for callers that only hold the list of jobs
+        features = cls(jobs[0].env, capacity = max(len(jobs), 1))
+        for job in jobs:
+            features.push(job)
+        return features
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    def push(self, job:Any):
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)])
+        remaining_pt, next_pt, total_pt = job.remaining_work, job.current_pt, job.total_work
+        # operation due date, the job's allowance is allocated in proportion to the processing time up to current operation
+        op_due = job.creation_T + (job.due - job.creation_T) * (total_pt - remaining_pt + next_pt) / total_pt
+        self.data[self.size] = (job.due, remaining_pt, next_pt, job.arrival_T, op_due)
+        self.size += 1
+
+
+    def pop(self, pos:int):
+        # shift the rows behind the picked one forward, negative position is counted from the end like list.pop
+        if pos < 0:
+            pos += self.size
+        if pos < self.size - 1:
+            self.data[pos:self.size-1] = self.data[pos+1:self.size]
+        self.size -= 1
+
+
+    '''
+    Read-only views of the queuing jobs' features
+    '''
+    @property
+    def now(self) -> float:
+        return self.env.now
+
+    @property
+    def due(self) -> np.ndarray:
+        return self.data[:self.size, DUE]
+
+    @property
+    def remaining_pt(self) -> np.ndarray:
+        # expected processing time of remaining operations, including current one
+        return self.data[:self.size, REMAINING_PT]
+
+    @property
+    def next_pt(self) -> np.ndarray:
+        # expected processing time of the operation at this machine
+        return self.data[:self.size, NEXT_PT]
+
+    @property
+    def arrival_T(self) -> np.ndarray:
+        return self.data[:self.size, ARRIVAL_T]
+
+    @property
+    def op_due(self) -> np.ndarray:
+        return self.data[:self.size, OP_DUE]
@@ -1,24 +1,75 @@
 # standard imports
 import collections
+from concurrent.futures import ThreadPoolExecutor
 import gurobipy as gp
 from gurobipy import GRB
 import itertools
-import json
 import logging
 import numpy as np
+import threading
 from ortools.sat.python import cp_model
 import pandas as pd
 from pathlib import Path
 import time
 from tabulate import tabulate
-from typing import Dict, List, Tuple, Union, Literal
+from typing import Callable, Dict, List, Optional, Tuple, Union, Literal
 # project moduels
-from .sequencing_rule import SequencingMethod
+from .problem_format import dump_problems, problem_record
+from .sequencing_rule import ATC_K, SequencingMethod
 from ..simulator.exc import *
+from ..simulator.profiler import Profiler
 from ..simulator.job import Job
 from ..simulator.machine import Machine
 
 
+class SolverBudget:
+    '''
+    Limits of every call to the optimizer, shared by the OR-Tools and Gurobi backends
+    time_limit: wall-clock seconds per call, None for no limit
+    workers: parallel search workers (CP-SAT num_workers, Gurobi Threads), 0 for the solver default
+    rel_gap: stop once the relative gap between the best schedule and the bound is within it, None to prove optimality
+    det_time: deterministic limit per call (CP-SAT deterministic time, Gurobi work units, both roughly seconds),
+        reproducible across machines and loads, applied together with the wall-clock limit if both are given
+    The best schedule found within the budget is used, and the left-shifted previous schedule if none is found (see build_hint)
+    '''
+    def __init__(self, time_limit:Optional[float] = 10, workers:int = 0, rel_gap:Optional[float] = None, det_time:Optional[float] = None):
+        self.time_limit = time_limit
+        self.workers = workers
+        self.rel_gap = rel_gap
+        self.det_time = det_time
+
+
+    def __str__(self) -> str:
+        return "time limit: {}s, workers: {}, gap: {}, det. time: {}".format(
+            self.time_limit, self.workers or "default", self.rel_gap, self.det_time)
+
+
+class ProblemCache:
+    '''
+    Least-recently-used cache of solved scheduling problems, keyed by the canonical form of problem (see CentralScheduler.canonical_problem)
+    A solution is kept as the begin time of operations relative to the time of solve, by (rank of job in canonical form, m_idx)
+    '''
+    def __init__(self, capacity:int):
+        self.capacity = capacity
+        self.entries:collections.OrderedDict = collections.OrderedDict()
+
+
+    def get(self, key:tuple) -> Optional[Dict[Tuple[int, int], float]]:
+        solution = self.entries.get(key)
+        if solution is not None:
+            self.entries.move_to_end(key)
+        return solution
+
+
+    def put(self, key:tuple, solution:Dict[Tuple[int, int], float]):
+        if self.capacity <= 0:
+            return
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
 class CentralScheduler:
     def __init__(self, *args, **kwargs):
         # map the keyword arguments and declare type if necessary
@@ -29,62 +80,273 @@ class CentralScheduler:
         # get jobs in system for scheduling
         self.in_system_jobs:Dict[int, Job] = self.recorder.in_system_jobs
         # set the log path to record complex scheudling problems
-        self.ext_prob_log = {}
+        self.ext_prob_log:List[dict] = []
         self.ext_prob_log_path = Path(self.logger.handlers[0].baseFilename).parent / "over_extended_problems.json"
+        self.grb_log_file = str(self.ext_prob_log_path.parent / "gurobi.log")
         # create the event
         self.build_schedule_event = self.env.event()
-        # create the optimizer object
+        # operation begin time of the last optimized schedule, used as the starting solution of next solve if warm start is on
+        # off by default: in benchmark/warm_start.py a starting solution made CP-SAT slower per solve with worse tardiness,
+        # and left Gurobi unchanged, most solves finish within the budget, where proving optimality dominates the time
+        self.warm_start = kwargs.get('warm_start', False)
+        self.last_op_begin_T:Dict[Tuple[int, int], float] = {}
+        self.budget = SolverBudget(kwargs.get('solver_time_limit', 10), kwargs.get('solver_workers', 0),
+                                   kwargs.get('solver_gap'), kwargs.get('solver_det_time'))
+        # solutions of the problems solved before, 0 to disable (off by default: benchmark/schedule_cache.py found no repeated problem)
+        self.cache = ProblemCache(kwargs.get('schedule_cache_size', 0))
+        # threads to solve the independent components of a problem, the pool is created when first needed
+        # 1 by default: every solve already uses all cores unless solver_workers is set, a pool of them would oversubscribe the cores
+        self.solver_pool_size = kwargs.get('solver_pool_size') or 1
+        self.solver_pool: Optional[ThreadPoolExecutor] = None
+        # rebuild policy, by default the schedule is rebuilt right at every trigger (job arrival or machine breakdown)
+        # rebuild_window: wait this long after the first trigger and solve once for all triggers in between,
+        #     0 to coalesce the triggers at the same time stamp, None to solve right away
+        # rebuild_min_interval: minimum simulated time between two rebuilds
+        # rebuild_on_idle: keep following the current schedule, and rebuild only when a machine runs out of it
+        # a machine with an empty schedule always forces the pending rebuild (see draw_from_schedule)
+        self.rebuild_window = kwargs.get('rebuild_window')
+        self.rebuild_min_interval = kwargs.get('rebuild_min_interval', 0)
+        self.rebuild_on_idle = kwargs.get('rebuild_on_idle', False)
+        self.rebuild_pending = False
+        self.last_rebuild_T = -float('inf')
+        # create the optimizer object, and its options other than the budget
         if self.sqc_method == SequencingMethod.GurobiOptimizer:
             self.scheduler = GurobiOptimizer
+            self.solver_options = {'formulation': kwargs.get('gurobi_formulation', 'quadratic')}
+            # long-lived environment of Gurobi per solving thread and models by the machines of component (see gurobi_session),
+            # or a new session (environment and model) for every call
+            self.reuse_model = kwargs.get('gurobi_reuse_model', True)
+            self.grb_models_per_thread = kwargs.get('gurobi_models_per_thread', 8)
+            self.grb_local = threading.local()
+            self.grb_envs:List[gp.Env] = []
+            self.grb_sessions:List[GurobiSession] = []
+            self.grb_model_cnt = 0
+            self.grb_lock = threading.Lock()
         elif self.sqc_method == SequencingMethod.ORTools:
             self.scheduler = ORTools
+            self.solver_options = {}
+        elif self.sqc_method == SequencingMethod.GifflerThompson:
+            self.scheduler = GifflerThompson
+            self.solver_options = {'rule': kwargs.get('gt_rule', 'ATC')}
+        elif self.sqc_method == SequencingMethod.TabuSearch:
+            self.scheduler = TabuSearch
+            self.solver_options = {'neighborhood': kwargs.get('ls_neighborhood', 'N7'), 'tenure': kwargs.get('tabu_tenure', 8),
+                                   'max_iter': kwargs.get('ls_max_iter', 1000), 'seed': kwargs.get('seed', 0)}
+        # backends time their model build and solve if profiling is on
+        self.profiler:Optional[Profiler] = kwargs.get('profiler')
+        if self.profiler is not None:
+            self.solver_options['profiler'] = self.profiler
         # process the build schedule process
         self.env.process(self.solve_problem_process())
 
 
+    def request_rebuild(self):
+        '''
+        Called by the events that invalidate the schedule, the rebuild itself is made by [solve_problem_process] or,
+        if the rebuild is deferred and a machine runs out of schedule first, by [draw_from_schedule]
+        '''
+        self.recorder.rebuild_trigger_cnt += 1
+        self.rebuild_pending = True
+        if not self.rebuild_on_idle and not self.build_schedule_event.triggered:
+            self.build_schedule_event.succeed()
+
+
+    @property
+    def rebuild_policy(self) -> str:
+        if self.rebuild_on_idle:
+            return "on idle"
+        policy = "every trigger" if self.rebuild_window is None else f"window {self.rebuild_window}"
+        return policy + (f", min. interval {self.rebuild_min_interval}" if self.rebuild_min_interval else "")
+
+
     def solve_problem_process(self):
         while True:
             yield self.build_schedule_event
-            _begin_T = time.time()
-            # if there's only one job in system
-            if len(self.in_system_jobs) == 1:
-                self.solve_without_optimization()
-            # if more than one jobs in system, get all jobs' remaining operation info, and check the intersection between them
-            else:
-                self.remaining_trajectories = {}
-                self.remaining_pts = {}
-                self.job_intersections = {}
-                # extract the remaining trajectory and processing time info of jobs that not yet completed
-                for _j_idx, _job in self.in_system_jobs.items():
-                    if _job.status=='queuing':
-                        self.remaining_trajectories[_j_idx] = _job.remaining_machines
-                        self.remaining_pts[_j_idx] = _job.remaining_pt
-                    elif len(_job.remaining_machines) > 1: # excluding current machine if the job is under processing
-                        self.remaining_trajectories[_j_idx] = _job.remaining_machines[1:]
-                        self.remaining_pts[_j_idx] = _job.remaining_pt[1:]
-                # get the potential intersection between jobs' trajectory to define the precedence constraints
-                for pair in (itertools.combinations(self.remaining_trajectories.keys(), 2)):
-                    # get trajectories of any 2 jobs to infer intersection
-                    _rem_traj_1, _rem_traj_2 = self.remaining_trajectories[pair[0]], self.remaining_trajectories[pair[1]]
-                    _intersec = list(set(_rem_traj_1).intersection(_rem_traj_2))
-                    if len(_intersec):
-                        self.job_intersections[pair] = _intersec
-                #print(self.job_intersections)
-                # if more than one job but no intersection, no math programming is needed
-                if len(self.job_intersections) == 0:
-                    self.solve_without_optimization()
-                # otherwise call the optimizer to solve the problem
-                else:
-                    _varOpBeginT, over_extended_problem = self.scheduler.solve_scheduling_problem(
-                        self.logger, self.env, self.m_list,
-                        self.job_intersections, self.remaining_trajectories, self.in_system_jobs)
-                    self.convert_to_schedule(_varOpBeginT)
-                    # record the over-extended problem instance
-                    if not (over_extended_problem is None):
-                        self.ext_prob_log[int(self.env.now)] = over_extended_problem 
-                self.recorder.opt_time_expense += (time.time() - _begin_T)
+            # defer the rebuild to coalesce the following triggers, the event stays triggered in the meantime
+            delay = max(self.rebuild_window or 0, self.last_rebuild_T + self.rebuild_min_interval - self.env.now)
+            if self.rebuild_window is not None or delay > 0:
+                yield self.env.timeout(delay)
             # de-activate the build schedule event
             self.build_schedule_event = self.env.event()
+            # the pending rebuild may have been forced by a machine during the delay
+            if self.rebuild_pending:
+                self.rebuild()
+
+
+    def rebuild(self):
+        self.rebuild_pending = False
+        self.last_rebuild_T = self.env.now
+        self.recorder.rebuild_cnt += 1
+        _begin_T = time.time()
+        # if there's only one job in system
+        if len(self.in_system_jobs) == 1:
+            self.solve_without_optimization()
+        # if more than one jobs in system, get all jobs' remaining operation info, and check the intersection between them
+        else:
+            self.remaining_trajectories = {}
+            self.remaining_pts = {}
+            self.job_intersections = {}
+            # extract the remaining trajectory and processing time info of jobs that not yet completed
+            for _j_idx, _job in self.in_system_jobs.items():
+                if _job.status=='queuing':
+                    self.remaining_trajectories[_j_idx] = _job.remaining_machines
+                    self.remaining_pts[_j_idx] = _job.remaining_pt
+                elif len(_job.remaining_machines) > 1: # excluding current machine if the job is under processing
+                    self.remaining_trajectories[_j_idx] = _job.remaining_machines[1:]
+                    self.remaining_pts[_j_idx] = _job.remaining_pt[1:]
+            # index the jobs by the machines on their remaining trajectory, only the jobs sharing a machine are intersected
+            machine_to_jobs = collections.defaultdict(list)
+            for _j_idx, _traj in self.remaining_trajectories.items():
+                for _m_idx in _traj.tolist():
+                    machine_to_jobs[_m_idx].append(_j_idx)
+            # get the potential intersection between jobs' trajectory to define the precedence constraints
+            for _m_idx in sorted(machine_to_jobs):
+                for pair in itertools.combinations(machine_to_jobs[_m_idx], 2):
+                    self.job_intersections.setdefault(pair, []).append(_m_idx)
+            # if more than one job but no intersection, no math programming is needed
+            if len(self.job_intersections) == 0:
+                self.solve_without_optimization()
+            # otherwise solve every group of intersected jobs as a separate problem
+            else:
+                rank = {_j_idx: r for r, _j_idx in enumerate(self.remaining_trajectories)}
+                self.job_intersections = dict(sorted(self.job_intersections.items(), key = lambda item: (rank[item[0][0]], rank[item[0][1]])))
+                _varOpBeginT, over_extended_problem = self.solve_components(conflict_components(self.remaining_trajectories, machine_to_jobs))
+                self.last_op_begin_T = _varOpBeginT
+                self.convert_to_schedule(_varOpBeginT)
+                # record the over-extended problem instance
+                if not (over_extended_problem is None):
+                    self.ext_prob_log.append(over_extended_problem)
+            self.recorder.opt_time_expense += (time.time() - _begin_T)
+
+
+    def solve_components(self, components:List[List[int]]) -> Tuple[Dict[Tuple[int, int], float], object]:
+        '''
+        Operation begin time of all remaining operations, and the largest over-extended problem (if any)
+        A job alone on its machines begins every operation as early as possible, the other components are looked up in the cache,
+        and the rest are solved by the optimizer, in parallel threads if there are several and the pool has more than one worker
+        '''
+        now = self.env.now
+        varOpBeginT, over_extended_problem = {}, None
+        unsolved = []
+        for jobs in components:
+            trajectories = {_j_idx: self.remaining_trajectories[_j_idx] for _j_idx in jobs}
+            if len(jobs) == 1:
+                varOpBeginT.update(build_hint({}, trajectories, self.in_system_jobs,
+                    {_m_idx: max(self.m_list[_m_idx].release_T, now) for _m_idx in trajectories[jobs[0]].tolist()},
+                    {jobs[0]: max(self.in_system_jobs[jobs[0]].available_T, now)}))
+                continue
+            key, order = self.canonical_problem(trajectories)
+            cached = self.cache.get(key)
+            if cached is not None:
+                # translate the cached solution back to the jobs and time of this problem
+                self.recorder.opt_cache_hit += 1
+                varOpBeginT.update({(order[rank], m_idx): self.time_origin + T for (rank, m_idx), T in cached.items()})
+            else:
+                self.recorder.opt_cache_miss += 1
+                unsolved.append((trajectories, key, order))
+        if len(unsolved) > 1 and self.solver_pool_size > 1:
+            if self.solver_pool is None:
+                self.solver_pool = ThreadPoolExecutor(self.solver_pool_size, thread_name_prefix="solver")
+            results = list(self.solver_pool.map(lambda problem: self.solve_component(problem[0]), unsolved))
+        else:
+            results = [self.solve_component(trajectories) for trajectories, _, _ in unsolved]
+        for (trajectories, key, order), (_varOpBeginT, _over_extended_problem) in zip(unsolved, results):
+            self.recorder.opt_cnt += 1
+            rank = {j_idx: r for r, j_idx in enumerate(order)}
+            self.cache.put(key, {(rank[j_idx], m_idx): T - self.time_origin for (j_idx, m_idx), T in _varOpBeginT.items()})
+            varOpBeginT.update(_varOpBeginT)
+            # components are sorted by size, keep the largest over-extended one
+            if over_extended_problem is None:
+                over_extended_problem = _over_extended_problem
+        return varOpBeginT, over_extended_problem
+
+
+    def solve_component(self, trajectories:Dict[int, np.ndarray]):
+        # the model of a component includes only its jobs, their intersections and machines
+        machines = sorted(set(m_idx for _traj in trajectories.values() for m_idx in _traj.tolist()))
+        job_intersections = {pair: _intersec for pair, _intersec in self.job_intersections.items() if pair[0] in trajectories}
+        args = (self.logger, self.env, [self.m_list[m_idx] for m_idx in machines], job_intersections, trajectories, self.in_system_jobs)
+        previous = self.last_op_begin_T if self.warm_start else None
+        if self.scheduler is not GurobiOptimizer:
+            return self.scheduler.solve_scheduling_problem(*args, previous = previous, budget = self.budget, **self.solver_options)
+        # the set-up of a new session (the model, and the environment unless shared) is counted in its first call
+        if self.reuse_model:
+            session, new = self.gurobi_session(tuple(machines))
+        else:
+            session, new = GurobiSession(self.grb_log_file, self.solver_options['formulation']), True
+        setup_T, optimize_T = (0, 0) if new else (session.setup_T, session.optimize_T)
+        try:
+            return GurobiOptimizer.solve_scheduling_problem(*args, previous = previous, budget = self.budget, session = session, **self.solver_options)
+        finally:
+            with self.grb_lock:
+                self.recorder.opt_setup_T += session.setup_T - setup_T
+                self.recorder.opt_solver_T += session.optimize_T - optimize_T
+            if not self.reuse_model:
+                session.close()
+
+
+    def gurobi_session(self, machines:Tuple[int, ...]) -> Tuple['GurobiSession', bool]:
+        '''
+        Session of this thread for a component on the machines, and whether it is new
+        The independent components (see conflict_components) updating one model in turn would replace the whole model at every call,
+        so a thread keeps one model per set of machines, all in the environment of the thread,
+        and closes the least recently used model beyond [gurobi_models_per_thread]
+        '''
+        sessions = getattr(self.grb_local, 'sessions', None)
+        if sessions is None:
+            _start_T = time.time()
+            self.grb_local.env = GurobiSession.start_env(self.grb_log_file)
+            sessions = self.grb_local.sessions = collections.OrderedDict()
+            with self.grb_lock:
+                self.grb_envs.append(self.grb_local.env)
+                self.recorder.opt_setup_T += time.time() - _start_T
+        session = sessions.get(machines)
+        if session is not None:
+            sessions.move_to_end(machines)
+            return session, False
+        session = sessions[machines] = GurobiSession(formulation = self.solver_options['formulation'], env = self.grb_local.env)
+        with self.grb_lock:
+            self.grb_sessions.append(session)
+            self.grb_model_cnt += 1
+        if len(sessions) > self.grb_models_per_thread:
+            _, stale = sessions.popitem(last = False)
+            stale.close()
+            with self.grb_lock:
+                self.grb_sessions.remove(stale)
+        return session, True
+
+
+    @property
+    def time_origin(self) -> float:
+        # the time that problems are described from, a backend of integer times (ORTools) truncates now and every time it sees
+        return int(self.env.now) if getattr(self.scheduler, 'integer_time', False) else self.env.now
+
+
+    def time_offset(self, T:float):
+        # a time as the backend sees it, relative to the time origin
+        if getattr(self.scheduler, 'integer_time', False):
+            return int(T) - int(self.env.now)
+        return round(float(T - self.env.now), 6)
+
+
+    def canonical_problem(self, trajectories:Dict[int, np.ndarray]) -> Tuple[tuple, List[int]]:
+        '''
+        Canonical form of a problem, and the jobs in the order of their rank in it
+        A job is described by its remaining route and pt, its available time and due date relative to now (see time_offset),
+        jobs are relabeled by sorting these descriptions, and only the machines on remaining routes are included,
+        so the same residual problem shifted in time, or a breakdown of a machine that no operation uses, gives the same key
+        '''
+        now = self.env.now
+        signatures = {}
+        for _j_idx, _traj in trajectories.items():
+            _job = self.in_system_jobs[_j_idx]
+            signatures[_j_idx] = (tuple(_traj.tolist()), tuple(_job.pt_by_m_idx[_traj].tolist()),
+                                  self.time_offset(max(_job.available_T, now)), self.time_offset(_job.due))
+        order = sorted(signatures, key = signatures.get)
+        machines = sorted(set(m_idx for _traj in trajectories.values() for m_idx in _traj.tolist()))
+        key = (tuple(signatures[_j_idx] for _j_idx in order),
+               tuple(self.time_offset(max(self.m_list[m_idx].release_T, now)) for m_idx in machines))
+        return key, order
 
 
     # no intersection between jobs, no optimization 
@@ -100,7 +362,7 @@ class CentralScheduler:
             for _m_idx in _j_traj:
                 self.schedule[_m_idx] = [_j_idx]
         # if there is a valid schedule
-        if [sch for sch in self.schedule.values() if sch != []]:
+        if [sch for sch in self.schedule.values() if sch != []] and self.logger.isEnabledFor(logging.INFO):
             self.logger.info("{} > Passive schedule: \n{}".format(self.env.now, tabulate([
                 ["Machine"]+list(self.schedule.keys()), ["Schedule"]+list(self.schedule.values())], headers="firstrow", tablefmt="psql")))
 
@@ -117,16 +379,17 @@ class CentralScheduler:
             self.schedule[_m_idx].append(_j_idx)
             # job's expected operation begin time in schedule
             self.j_op_by_schedule[_j_idx].append((_m_idx, round(T, 1)))
-        # log the machines' sequence
-        self.logger.debug("Machines' sequence in new schedule: \n{}".format(tabulate(
-            [["M.idx", "Job sequence [j_idx]"], 
-             *self.schedule.items()], 
-             headers="firstrow", tablefmt="psql")))
-        # log jobs' operations
-        self.logger.debug("Jobs' operations in new schedule: \n{}".format(tabulate(
-            [["J.idx", "Remaining Operations (m_idx, opBeginT)"], 
-             *[[_j_idx, op] for _j_idx, op in self.j_op_by_schedule.items()]], 
-             headers="firstrow", tablefmt="psql")))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            # log the machines' sequence
+            self.logger.debug("Machines' sequence in new schedule: \n{}".format(tabulate(
+                [["M.idx", "Job sequence [j_idx]"], 
+                 *self.schedule.items()], 
+                 headers="firstrow", tablefmt="psql")))
+            # log jobs' operations
+            self.logger.debug("Jobs' operations in new schedule: \n{}".format(tabulate(
+                [["J.idx", "Remaining Operations (m_idx, opBeginT)"], 
+                 *[[_j_idx, op] for _j_idx, op in self.j_op_by_schedule.items()]], 
+                 headers="firstrow", tablefmt="psql")))
         self.update_machine_after_optimization()
 
 
@@ -137,8 +400,9 @@ class CentralScheduler:
             if not self.schedule[m.m_idx]:
                 continue
             #self.logger.debug("Machine {} schedule before {}".format(m.m_idx, self.schedule[m.m_idx]))
-            if m.status == "strategic_idle":
-                # if the machine is currently in strategic idleness status
+            if m.waiting_for_scheduled_job:
+                # if the machine has drawn its next job and not yet begun it: suspended in strategic idleness
+                # (its status is "down" if it broke down meanwhile), or reactivated by the arrival of job but not yet resumed
                 # need to pop from schedule because the sequencing decision is considered made
                 m.next_job_in_schedule = self.schedule[m.m_idx].pop(0)
             else:
@@ -150,7 +414,13 @@ class CentralScheduler:
 
 
     def draw_from_schedule(self, m_idx:int) -> int:
-        self.logger.debug("Draw from schedule, Machine {}, current schedule {}, queue {}".format(m_idx, self.schedule[m_idx], [j.j_idx for j in self.m_list[m_idx].queue]))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Draw from schedule, Machine {}, current schedule {}, queue {}".format(m_idx, self.schedule[m_idx], [j.j_idx for j in self.m_list[m_idx].queue]))
+        # the machine ran out of schedule, or would wait in strategic idleness for a job on a stale schedule while the rebuild is deferred,
+        # rebuild now instead: the job may never come if the deferred schedule no longer matches the shopfloor
+        if not self.schedule[m_idx] or (self.rebuild_pending and self.schedule[m_idx][0] not in [j.j_idx for j in self.m_list[m_idx].queue]):
+            self.recorder.rebuild_forced_cnt += 1
+            self.rebuild()
         next_job_in_schedule = self.schedule[m_idx].pop(0)
         # returned value is the job index in schedule, not the position of job in queue
         # as job may not yet arrived
@@ -158,21 +428,449 @@ class CentralScheduler:
     
 
     def post_simulation(self):
+        # release the Gurobi models and environments
+        if self.scheduler is GurobiOptimizer:
+            for session in self.grb_sessions:
+                session.close()
+            for env in self.grb_envs:
+                env.dispose()
+        if self.solver_pool is not None:
+            self.solver_pool.shutdown()
+            self.solver_pool = None
         if self.ext_prob_log:
             print("{} over-extended scheduling problem is recorded, saved to {}".format(len(self.ext_prob_log), self.ext_prob_log_path))
-        # after the process, write the over-extended problem instances
-        with open(self.ext_prob_log_path, "w") as f:
-            json.dump(self.ext_prob_log, f)
+            # after the process, write the over-extended problem instances
+            dump_problems(self.ext_prob_log, self.ext_prob_log_path)
         return
 
 
 
 
+def conflict_components(remaining_trajectories:Dict[int, np.ndarray], machine_to_jobs:Dict[int, List[int]]) -> List[List[int]]:
+    '''
+    Groups of jobs that are connected by the machines they share, from the largest group
+    Jobs in different groups use different machines, i.e. their operations and the release time of their machines
+    do not constrain each other, and every group can be scheduled on its own
+    '''
+    position = {j_idx: i for i, j_idx in enumerate(remaining_trajectories)}
+    component_of = {}
+    components = []
+    for j_idx in remaining_trajectories:
+        if j_idx in component_of:
+            continue
+        component, stack = [], [j_idx]
+        component_of[j_idx] = len(components)
+        while stack:
+            _j_idx = stack.pop()
+            component.append(_j_idx)
+            for m_idx in remaining_trajectories[_j_idx].tolist():
+                for _other in machine_to_jobs[m_idx]:
+                    if _other not in component_of:
+                        component_of[_other] = len(components)
+                        stack.append(_other)
+        # jobs keep their order in system within a group
+        components.append(sorted(component, key = position.get))
+    return sorted(components, key = len, reverse = True)
+
+
+def build_hint(previous:Dict[Tuple[int, int], float], remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job],
+               machine_release_T:Dict[int, float], job_available_T:Dict[int, float]) -> Dict[Tuple[int, int], float]:
+    '''
+    Starting solution of a re-solve, from the operation begin time of the previous schedule
+    Operations keep their order in the previous schedule, the operations of new jobs follow job by job,
+    and every operation begins as early as the current machine release and job available time allow,
+    i.e. the previous schedule is shifted to the current time, and the hint is always feasible
+    '''
+    ops = [(j_idx, m_idx) for j_idx, traj in remaining_trajectories.items() for m_idx in traj]
+    order = sorted(range(len(ops)), key = lambda i: (previous.get(ops[i], float('inf')), i))
+    machine_free_T, job_ready_T = dict(machine_release_T), dict(job_available_T)
+    hint = {}
+    for i in order:
+        j_idx, m_idx = ops[i]
+        begin_T = max(machine_free_T[m_idx], job_ready_T[j_idx])
+        hint[j_idx, m_idx] = begin_T
+        machine_free_T[m_idx] = job_ready_T[j_idx] = begin_T + in_system_jobs[j_idx].pt_by_m_idx[m_idx]
+    return hint
+
+
+# priority rules of the Giffler-Thompson algorithm, the conflicting operation of largest priority is scheduled first
+# arguments are arrays over the conflicting operations: processing time, due date of job,
+# processing time of job's remaining operations from this one, and the earliest begin time of operation
+GT_RULES:Dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = {
+    'ATC': lambda pt, due, remaining_pt, begin_T: np.exp(-np.maximum(due - pt - begin_T, 0) / (ATC_K * pt.mean())) / pt,
+    'EDD': lambda pt, due, remaining_pt, begin_T: -due,
+    'SPT': lambda pt, due, remaining_pt, begin_T: -pt,
+    'Slack': lambda pt, due, remaining_pt, begin_T: begin_T + remaining_pt - due,
+    'CR': lambda pt, due, remaining_pt, begin_T: -(due - begin_T) / remaining_pt,
+    'MWKR': lambda pt, due, remaining_pt, begin_T: remaining_pt,
+}
+
+
+class GifflerThompson:
+    '''
+    Constructive scheduler, builds one active schedule by the Giffler-Thompson algorithm, without search
+    At every step, the next operation (of all jobs) that can complete first fixes a machine and a time, the next operations
+    on that machine that can begin before that time are in conflict, and the priority rule picks the one to schedule.
+    A step is vectorized over jobs, the rule is a name in GT_RULES or a function of the same arguments.
+    The budget and previous schedule are not used
+    '''
+    @classmethod
+    def solve_scheduling_problem(cls, logger, env, m_list:List[Machine], 
+                                 job_intersections, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job],
+                                 previous:Optional[Dict[Tuple[int, int], float]] = None, budget:Optional[SolverBudget] = None,
+                                 rule:Union[str, Callable] = "ATC", profiler:Optional[Profiler] = None):
+        START_T = time.time()
+        priority = GT_RULES[rule] if isinstance(rule, str) else rule
+        j_idx_list = list(remaining_trajectories)
+        route_len = np.array([len(_traj) for _traj in remaining_trajectories.values()])
+        # routes and processing times of jobs, padded to the longest route
+        route = np.zeros((len(j_idx_list), route_len.max()), dtype=int)
+        pt = np.zeros(route.shape)
+        for i, (_j_idx, _traj) in enumerate(remaining_trajectories.items()):
+            route[i, :route_len[i]] = _traj
+            pt[i, :route_len[i]] = in_system_jobs[_j_idx].pt_by_m_idx[_traj]
+        remaining_pt = np.cumsum(pt[:, ::-1], axis=1)[:, ::-1]
+        due = np.array([in_system_jobs[_j_idx].due for _j_idx in j_idx_list], dtype=float)
+        # ready time of machines and jobs
+        machine_ready_T = np.zeros(max([route.max()] + [m.m_idx for m in m_list]) + 1)
+        for m in m_list:
+            machine_ready_T[m.m_idx] = max(m.release_T, env.now)
+        job_ready_T = np.array([max(in_system_jobs[_j_idx].available_T, env.now) for _j_idx in j_idx_list], dtype=float)
+        # position of the next operation in route, its machine and processing time, earliest begin and completion time
+        step = np.zeros(len(j_idx_list), dtype=int)
+        next_m, next_pt = route[:, 0].copy(), pt[:, 0].copy()
+        begin_T = np.maximum(job_ready_T, machine_ready_T[next_m])
+        end_T = begin_T + next_pt
+        varOpBeginT = np.zeros(route.shape)
+        _solve_T = time.time()
+        for _ in range(route_len.sum()):
+            i = end_T.argmin()
+            m, C = next_m[i], end_T[i]
+            waiting = np.flatnonzero(next_m == m)
+            conflict = waiting[begin_T[waiting] < C]
+            picked = conflict[priority(next_pt[conflict], due[conflict], remaining_pt[conflict, step[conflict]], begin_T[conflict]).argmax()]
+            # schedule the picked operation, and move the job to its next operation
+            k = step[picked]
+            varOpBeginT[picked, k] = begin_T[picked]
+            machine_ready_T[m] = job_ready_T[picked] = end_T[picked]
+            step[picked] = k = k + 1
+            if k < route_len[picked]:
+                next_m[picked], next_pt[picked] = route[picked, k], pt[picked, k]
+                begin_T[picked] = max(job_ready_T[picked], machine_ready_T[next_m[picked]])
+                end_T[picked] = begin_T[picked] + next_pt[picked]
+            else:
+                next_m[picked], end_T[picked] = -1, np.inf
+            # the other operations waiting for this machine can begin only after the picked one
+            waiting = waiting[waiting != picked]
+            begin_T[waiting] = np.maximum(begin_T[waiting], machine_ready_T[m])
+            end_T[waiting] = begin_T[waiting] + next_pt[waiting]
+        if profiler is not None:
+            profiler.add("model_build", _solve_T - START_T)
+            profiler.add("solve", time.time() - _solve_T)
+        logger.debug("Giffler-Thompson schedule ({}) of {} operations, time expense: {}s".format(
+            rule if isinstance(rule, str) else rule.__name__, route_len.sum(), round(time.time() - START_T, 6)))
+        # return only the operation begin time to build the schedule
+        return {(_j_idx, m_idx): T for i, _j_idx in enumerate(j_idx_list)
+                for m_idx, T in zip(route[i, :route_len[i]].tolist(), varOpBeginT[i, :route_len[i]].tolist())}, None
+
+
+class DisjunctiveGraph:
+    '''
+    Disjunctive graph of a scheduling problem, with the sequence of operations on every machine fixed
+    An operation (node) follows its job predecessor and its machine predecessor, and begins no earlier than
+    the release time of its machine and, for the first remaining operation of job, the available time of job.
+    The head of an operation is its earliest begin time, the objective is the cumulative tardiness of jobs.
+    After a change of sequence only the operations downstream of the moved ones are re-evaluated (see propagate),
+    and the change of heads is logged to be undone
+    '''
+    def __init__(self, remaining_trajectories:Dict[int, np.ndarray], in_system_jobs:Dict[int, Job],
+                 machine_release_T:Dict[int, float], job_available_T:Dict[int, float], op_begin_T:Dict[Tuple[int, int], float]):
+        # operations, their job and machine, processing time, release time, and job predecessor / successor (-1 if none)
+        self.ops:List[Tuple[int, int]] = []
+        self.job_pred, self.job_succ, self.machine, self.pt, self.release_T = [], [], [], [], []
+        self.last_op:Dict[int, int] = {}
+        self.due:Dict[int, float] = {}
+        for j_idx, traj in remaining_trajectories.items():
+            for k, m_idx in enumerate(traj.tolist()):
+                v = len(self.ops)
+                self.ops.append((j_idx, m_idx))
+                self.job_pred.append(v - 1 if k else -1)
+                self.job_succ.append(v + 1 if k < len(traj) - 1 else -1)
+                self.machine.append(m_idx)
+                self.pt.append(float(in_system_jobs[j_idx].pt_by_m_idx[m_idx]))
+                self.release_T.append(max(machine_release_T[m_idx], job_available_T[j_idx]) if k == 0 else machine_release_T[m_idx])
+            self.last_op[j_idx] = len(self.ops) - 1
+            self.due[j_idx] = float(in_system_jobs[j_idx].due)
+        self.job_of_last = {v: j_idx for j_idx, v in self.last_op.items()}
+        # operations on every machine in the order of their begin time, and the position of operation in it
+        self.sequence:Dict[int, List[int]] = collections.defaultdict(list)
+        for v in sorted(range(len(self.ops)), key = lambda v: (op_begin_T[self.ops[v]], v)):
+            self.sequence[self.machine[v]].append(v)
+        self.position = [0] * len(self.ops)
+        for seq in self.sequence.values():
+            for i, v in enumerate(seq):
+                self.position[v] = i
+        self.head = [0.0] * len(self.ops)
+        self.evaluate()
+
+
+    def evaluate(self):
+        # heads of all operations in a topological order of the graph, and the objective
+        indegree = [(self.job_pred[v] >= 0) + (self.position[v] > 0) for v in range(len(self.ops))]
+        queue = collections.deque(v for v, d in enumerate(indegree) if d == 0)
+        while queue:
+            v = queue.popleft()
+            self.head[v] = self.earliest_T(v)
+            for s in self.successors(v):
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    queue.append(s)
+        self.objective = sum(self.tardiness(v) for v in self.job_of_last)
+
+
+    def earliest_T(self, v:int) -> float:
+        T = self.release_T[v]
+        u = self.job_pred[v]
+        if u >= 0:
+            T = max(T, self.head[u] + self.pt[u])
+        i = self.position[v]
+        if i:
+            u = self.sequence[self.machine[v]][i - 1]
+            T = max(T, self.head[u] + self.pt[u])
+        return T
+
+
+    def successors(self, v:int) -> List[int]:
+        seq = self.sequence[self.machine[v]]
+        i = self.position[v] + 1
+        return [s for s in (self.job_succ[v], seq[i] if i < len(seq) else -1) if s >= 0]
+
+
+    def tardiness(self, v:int) -> float:
+        return max(0.0, self.head[v] + self.pt[v] - self.due[self.job_of_last[v]])
+
+
+    def move(self, m_idx:int, i:int, k:int) -> List[Tuple[int, float]]:
+        # move the operation at position i of machine to position k, the others keep their order,
+        # the operations between and the one after them have a new machine predecessor
+        self.reorder(m_idx, i, k)
+        return self.propagate(self.sequence[m_idx][min(i, k):max(i, k) + 2])
+
+
+    def revert(self, m_idx:int, i:int, k:int, changed:List[Tuple[int, float]]):
+        # take back the move of operation from position i to k
+        self.undo(changed)
+        self.reorder(m_idx, k, i)
+
+
+    def reorder(self, m_idx:int, i:int, k:int):
+        seq = self.sequence[m_idx]
+        seq.insert(k, seq.pop(i))
+        for pos in range(min(i, k), max(i, k) + 1):
+            self.position[seq[pos]] = pos
+
+
+    def propagate(self, sources:List[int]) -> List[Tuple[int, float]]:
+        '''
+        Re-evaluate the heads downstream of the changed operations, return the old heads of those changed
+        Only the changed last operations of jobs are counted into the change of objective
+        '''
+        changed = []
+        queue, queued = collections.deque(sources), set(sources)
+        while queue:
+            v = queue.popleft()
+            queued.discard(v)
+            T = self.earliest_T(v)
+            if T != self.head[v]:
+                if v in self.job_of_last:
+                    self.objective -= self.tardiness(v)
+                changed.append((v, self.head[v]))
+                self.head[v] = T
+                if v in self.job_of_last:
+                    self.objective += self.tardiness(v)
+                for s in self.successors(v):
+                    if s not in queued:
+                        queue.append(s)
+                        queued.add(s)
+        return changed
+
+
+    def undo(self, changed:List[Tuple[int, float]]):
+        for v, T in reversed(changed):
+            if v in self.job_of_last:
+                self.objective += max(0.0, T + self.pt[v] - self.due[self.job_of_last[v]]) - self.tardiness(v)
+            self.head[v] = T
+
+
+    def critical_blocks(self) -> List[Tuple[int, int, int]]:
+        '''
+        Blocks of the critical tree, as (m_idx, first position, last position)
+        The critical tree is traced back from the last operation of tardy jobs along the tight arcs (that delay the next operation),
+        a block is a run of two or more operations on a machine linked by tight machine arcs of the tree
+        '''
+        tight = collections.defaultdict(set)
+        stack = [v for v in self.job_of_last if self.tardiness(v) > 0]
+        visited = set(stack)
+        while stack:
+            v = stack.pop()
+            u = self.job_pred[v]
+            if u >= 0 and u not in visited and self.head[u] + self.pt[u] == self.head[v]:
+                visited.add(u)
+                stack.append(u)
+            i = self.position[v]
+            if i:
+                u = self.sequence[self.machine[v]][i - 1]
+                if self.head[u] + self.pt[u] == self.head[v]:
+                    tight[self.machine[v]].add(i)
+                    if u not in visited:
+                        visited.add(u)
+                        stack.append(u)
+        blocks = []
+        for m_idx, positions in tight.items():
+            positions = sorted(positions)
+            first = positions[0] - 1
+            for a, b in zip(positions, positions[1:] + [None]):
+                if b != a + 1:
+                    blocks.append((m_idx, first, a))
+                    first = b - 1 if b is not None else None
+        return blocks
+
+
+    def feasible(self, m_idx:int, i:int, k:int) -> bool:
+        # a move is acyclic if no path leads from the job successor of u to v (moving u right after v),
+        # or from u to the job predecessor of v (moving v right before u), such a path would make the later head no less
+        seq = self.sequence[m_idx]
+        if k > i:
+            u, v = seq[i], seq[k]
+            s = self.job_succ[u]
+            return s < 0 or self.head[v] < self.head[s] + self.pt[s]
+        u, v = seq[k], seq[i]
+        p = self.job_pred[v]
+        return p < 0 or self.head[p] < self.head[u] + self.pt[u]
+
+
+    def begin_T(self) -> Dict[Tuple[int, int], float]:
+        return {op: T for op, T in zip(self.ops, self.head)}
+
+
+class TabuSearch:
+    '''
+    Anytime local search over the disjunctive graph of problem, by tabu search with iterated restarts
+    The search starts from the previous schedule (if given) shifted to now, or from the Giffler-Thompson schedule by ATC,
+    and keeps the best schedule found. At every step all moves of the neighborhood on the critical blocks are evaluated
+    by re-evaluating the heads downstream of the move, the best move that is not tabu is made, and the reversed order
+    of operations is tabu for a random tenure, unless a tabu move gives a new best schedule.
+    After max_stall steps without a new best schedule, the search restarts from the best one perturbed by a few random swaps.
+    neighborhood: "N5" swaps the first two and the last two operations of every block,
+        "N7" also moves every operation of the block to its beginning or end, and its first or last operation inside it
+    The search stops when the wall-clock limit of budget or max_iter steps is reached, or no job is tardy
+    '''
+    @classmethod
+    def solve_scheduling_problem(cls, logger, env, m_list:List[Machine], 
+                                 job_intersections, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job],
+                                 previous:Optional[Dict[Tuple[int, int], float]] = None, budget:Optional[SolverBudget] = None,
+                                 neighborhood:Literal["N5", "N7"] = "N7", tenure:int = 8, max_iter:int = 1000, max_stall:int = 100, seed:int = 0,
+                                 profiler:Optional[Profiler] = None):
+        START_T = time.time()
+        if neighborhood not in ("N5", "N7"):
+            raise InvalidRequestError(f"Unknown neighborhood of local search: {neighborhood}")
+        budget = budget or SolverBudget()
+        rng = np.random.default_rng(seed)
+        machine_release_T = {m.m_idx: max(m.release_T, env.now) for m in m_list}
+        job_available_T = {_j_idx: max(in_system_jobs[_j_idx].available_T, env.now) for _j_idx in remaining_trajectories.keys()}
+        if previous is not None:
+            start = build_hint(previous, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T)
+        else:
+            start, _ = GifflerThompson.solve_scheduling_problem(logger, env, m_list, job_intersections, remaining_trajectories, in_system_jobs, rule = "ATC")
+        graph = DisjunctiveGraph(remaining_trajectories, in_system_jobs, machine_release_T, job_available_T, start)
+        best_objective, best_sequence = graph.objective, {m_idx: list(seq) for m_idx, seq in graph.sequence.items()}
+        start_objective = best_objective
+        # order of operations (a before b) that may not be restored before the step in value
+        tabu:Dict[Tuple[int, int], int] = {}
+        it = stall = restarts = 0
+        _solve_T = time.time()
+        while best_objective > 0 and it < max_iter and (budget.time_limit is None or time.time() - START_T < budget.time_limit):
+            it += 1
+            best_move, best_move_objective = None, float('inf')
+            for m_idx, i, k in cls.neighbors(graph, neighborhood):
+                seq = graph.sequence[m_idx]
+                # the order of operations made by the move
+                created = [(seq[i], w) for w in seq[k:i]] if k < i else [(w, seq[i]) for w in seq[i+1:k+1]]
+                changed = graph.move(m_idx, i, k)
+                objective = graph.objective
+                graph.revert(m_idx, i, k, changed)
+                is_tabu = any(tabu.get(pair, 0) > it for pair in created)
+                if objective < best_move_objective and (not is_tabu or objective < best_objective):
+                    best_move, best_move_objective = (m_idx, i, k, created), objective
+            if best_move is not None:
+                m_idx, i, k, created = best_move
+                graph.move(m_idx, i, k)
+                expiry = it + tenure + int(rng.integers(0, tenure // 2 + 1))
+                for a, b in created:
+                    tabu[b, a] = expiry
+            if graph.objective < best_objective:
+                best_objective, best_sequence = graph.objective, {m_idx: list(seq) for m_idx, seq in graph.sequence.items()}
+                stall = 0
+            else:
+                stall += 1
+            # restart from the best schedule, with a few random swaps of adjacent operations in critical blocks
+            if best_move is None or stall >= max_stall:
+                cls.restore(graph, best_sequence)
+                for _ in range(3):
+                    swaps = [(m_idx, i, i + 1) for m_idx, first, last in graph.critical_blocks() for i in range(first, last)
+                             if graph.feasible(m_idx, i, i + 1)]
+                    if not swaps:
+                        break
+                    m_idx, i, k = swaps[rng.integers(len(swaps))]
+                    graph.move(m_idx, i, k)
+                tabu.clear()
+                stall = 0
+                restarts += 1
+        cls.restore(graph, best_sequence)
+        if profiler is not None:
+            profiler.add("model_build", _solve_T - START_T)
+            profiler.add("solve", time.time() - _solve_T)
+        logger.debug("Tabu search ({}) of {} operations, {} steps, {} restarts, tardiness: {} -> {}, time expense: {}s".format(
+            neighborhood, len(graph.ops), it, restarts, start_objective, graph.objective, round(time.time() - START_T, 3)))
+        # return only the operation begin time to build the schedule
+        return graph.begin_T(), None
+
+
+    @classmethod
+    def neighbors(cls, graph:DisjunctiveGraph, neighborhood:str) -> List[Tuple[int, int, int]]:
+        # moves (m_idx, from position, to position) on the critical blocks, without cycle
+        moves = set()
+        for m_idx, first, last in graph.critical_blocks():
+            moves.add((m_idx, first, first + 1))
+            moves.add((m_idx, last - 1, last))
+            if neighborhood == "N7":
+                for i in range(first + 1, last + 1):
+                    moves.add((m_idx, i, first))
+                    moves.add((m_idx, first, i))
+                for i in range(first, last):
+                    moves.add((m_idx, i, last))
+                    moves.add((m_idx, last, i))
+        return [move for move in sorted(moves) if move[1] != move[2] and graph.feasible(*move)]
+
+
+    @classmethod
+    def restore(cls, graph:DisjunctiveGraph, sequence:Dict[int, List[int]]):
+        for m_idx, seq in sequence.items():
+            graph.sequence[m_idx] = list(seq)
+            for i, v in enumerate(seq):
+                graph.position[v] = i
+        graph.evaluate()
+
+
 class ORTools:
+    # CP-SAT has integer variables only, times are truncated to integers (see CentralScheduler.time_offset)
+    integer_time = True
+
     @classmethod
     def solve_scheduling_problem(cls, logger, env, m_list:List[Machine], 
-                                 job_intersections, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job]
-                                 ):
+                                 job_intersections, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job],
+                                 previous:Optional[Dict[Tuple[int, int], float]] = None, budget:Optional[SolverBudget] = None,
+                                 profiler:Optional[Profiler] = None):
         START_T = time.time()
         # get machines' release time info
         machine_release_T = {m.m_idx: int(max(m.release_T, env.now)) for m in m_list}
@@ -254,8 +952,31 @@ class ORTools:
         logger.debug('Problem spec.: [{} Jobs], [{} Ops]. Constraints: [{} op_sqc]; [{} op_overlap]; [{} M_release]; [{} J_release/discrepency/tardiness]'.format(
             len(in_system_jobs), sum(len(x) for x in remaining_trajectories.values()), model_spec['op_sqc'], model_spec['op_overlap'], model_spec['M_release'], model_spec['J_release']))
         model.Minimize(varCumTardiness)
+        # warm start from the previous schedule
+        if previous is not None:
+            hint = build_hint(previous, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T)
+            for (j_idx, m_idx), begin_T in hint.items():
+                model.AddHint(all_ops[j_idx, m_idx].begin, int(begin_T))
+                model.AddHint(all_ops[j_idx, m_idx].end, int(begin_T + in_system_jobs[j_idx].pt_by_m_idx[m_idx]))
+            for j_idx, traj in remaining_trajectories.items():
+                discrepency = int(hint[j_idx, traj[-1]] + in_system_jobs[j_idx].pt_by_m_idx[traj[-1]] - int(in_system_jobs[j_idx].due))
+                model.AddHint(all_jobs[j_idx].discrepency, discrepency)
+                model.AddHint(all_jobs[j_idx].tardiness, max(0, discrepency))
+        budget = budget or SolverBudget()
         solver = cp_model.CpSolver()
+        if budget.time_limit is not None:
+            solver.parameters.max_time_in_seconds = budget.time_limit
+        if budget.det_time is not None:
+            solver.parameters.max_deterministic_time = budget.det_time
+        if budget.workers:
+            solver.parameters.num_workers = budget.workers
+        if budget.rel_gap is not None:
+            solver.parameters.relative_gap_limit = budget.rel_gap
+        _solve_T = time.time()
         status = solver.Solve(model)
+        if profiler is not None:
+            profiler.add("model_build", _solve_T - START_T)
+            profiler.add("solve", time.time() - _solve_T)
         '''
         PART IV: convert the gurobi tupledict to normal Python dict
         '''
@@ -264,19 +985,15 @@ class ORTools:
             solver.StatusName(status), time_expense))
         # record the overextended problem instance
         if time_expense > 1:
-            over_extended_problem = {
-                'Jobs': {j_idx: {
-                    "ops": [(float(m_idx), float(in_system_jobs[j_idx].pt_by_m_idx[m_idx])) for m_idx in traj],
-                    "avail": job_available_T[j_idx]
-                    } for j_idx, traj in remaining_trajectories.items()
-                },
-                'Machines': {m_idx: release_T for m_idx, release_T in machine_release_T.items()},
-                'Expense': time_expense
-            }
+            over_extended_problem = problem_record(env.now, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T, "ORTools", time_expense)
         else:
             over_extended_problem = None
-        # extract the value of varOpBeginT variables
-        converted_varOpBeginT = {key: solver.Value(op.begin) for key, op in all_ops.items()}
+        # extract the value of varOpBeginT variables, the best schedule found within the budget
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            converted_varOpBeginT = {key: solver.Value(op.begin) for key, op in all_ops.items()}
+        else:
+            logger.warning("{} > No schedule found within the budget ({}), use the previous schedule shifted to now".format(env.now, budget))
+            converted_varOpBeginT = build_hint(previous or {}, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T)
         # return only the operation begin time to build the schedule
         return converted_varOpBeginT, over_extended_problem
 
@@ -284,137 +1001,258 @@ class ORTools:
 
 
 
+class GurobiSession:
+    '''
+    Gurobi environment and model kept across the re-solves of central scheduler
+    The environment is started once (license check and log file), and the model is updated in place before every solve:
+    the variables and constraints of completed operations, departed jobs and resolved intersections are removed,
+    those of new operations, jobs and intersections are added, and the others are kept as they are.
+    The release time of machines and available time of jobs are the bounds of begin time variables, changed in place,
+    so are the big-M values of the linear disjunctions.
+    An environment can not be shared between threads, each thread solves with its own sessions,
+    the sessions of a thread can share one environment (given as env), which is then not closed with the session
+    '''
+    def __init__(self, log_file:Optional[str] = None, formulation:Literal["quadratic", "big_m", "indicator"] = "quadratic",
+                 env:Optional[gp.Env] = None):
+        if formulation not in ("quadratic", "big_m", "indicator"):
+            raise InvalidRequestError(f"Unknown formulation of Gurobi scheduler: {formulation}")
+        _start_T = time.time()
+        self.formulation = formulation
+        self.own_env = env is None
+        self.env = self.start_env(log_file) if self.own_env else env
+        self.model = gp.Model(name="jsp_scheduler", env=self.env)
+        # variables and constraints, by the operation (j_idx, m_idx), consecutive operations (j_idx, m1_idx, m2_idx),
+        # job (j_idx) and pair of intersected jobs on a machine (j1_idx, j2_idx, m_idx) they belong to
+        self.varOpBeginT:Dict[Tuple[int, int], gp.Var] = {}
+        self.constrOpSqc:Dict[Tuple[int, int, int], gp.Constr] = {}
+        # completion, discrepency and tardiness variables of job, the job's constraints, and the last operation they refer to
+        self.varJob:Dict[int, tuple] = {}
+        self.constrJob:Dict[int, list] = {}
+        self.jobLastOp:Dict[int, int] = {}
+        # binary precedence variable of pair, and the two disjunctive constraints
+        self.varJobPrec:Dict[Tuple[int, int, int], gp.Var] = {}
+        self.constrJobPrec:Dict[Tuple[int, int, int], list] = {}
+        # schedule makespan, not adjusted by the starting time of a cycle
+        self.varMakespan = self.model.addVar(vtype=GRB.CONTINUOUS, name="varMakespan")
+        self.constrMakespan = None
+        # seconds spent on setting up the environment and model, and in the optimizer
+        self.setup_T, self.optimize_T = time.time() - _start_T, 0
+
+
+    def update(self, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job], job_intersections,
+               machine_release_T:Dict[int, float], job_available_T:Dict[int, float]):
+        model = self.model
+        ops = set((j, m) for j, traj in remaining_trajectories.items() for m in traj)
+        sqcs = set((j, m1, m2) for j, traj in remaining_trajectories.items() for m1, m2 in zip(traj, traj[1:]))
+        pairs = set((j1, j2, m) for (j1, j2), _intersec in job_intersections.items() for m in _intersec)
+        # operations of a job complete from the front, the job's constraints are kept while it ends on the same operation
+        jobs = set(j for j, traj in remaining_trajectories.items() if self.jobLastOp.get(j) == traj[-1])
+        '''
+        PART I: remove what is no longer in the problem
+        '''
+        stale = []
+        for key in [key for key in self.varJobPrec if key not in pairs]:
+            stale += [self.varJobPrec.pop(key)] + self.constrJobPrec.pop(key)
+        for key in [key for key in self.constrOpSqc if key not in sqcs]:
+            stale.append(self.constrOpSqc.pop(key))
+        departed = [j for j in self.varJob if j not in jobs]
+        for j in departed:
+            stale += list(self.varJob.pop(j)) + self.constrJob.pop(j)
+            del self.jobLastOp[j]
+        for key in [key for key in self.varOpBeginT if key not in ops]:
+            stale.append(self.varOpBeginT.pop(key))
+        arrived = [j for j in remaining_trajectories if j not in self.varJob]
+        if self.constrMakespan is not None and (departed or arrived):
+            stale.append(self.constrMakespan)
+            self.constrMakespan = None
+        model.remove(stale)
+        '''
+        PART II: add the new operations, jobs and intersections
+        '''
+        for j, traj in remaining_trajectories.items():
+            pt = in_system_jobs[j].pt_by_m_idx
+            # 1. time of the beginning of operations
+            for m in traj:
+                if (j, m) not in self.varOpBeginT:
+                    self.varOpBeginT[j, m] = model.addVar(vtype=GRB.CONTINUOUS, name=f"varOpBeginT[{j},{m}]")
+            # 2. a job's operations must be processed following job's trajectory
+            for m1, m2 in zip(traj, traj[1:]):
+                if (j, m1, m2) not in self.constrOpSqc:
+                    self.constrOpSqc[j, m1, m2] = model.addConstr(
+                        self.varOpBeginT[j, m1] + pt[m1] <= self.varOpBeginT[j, m2], name=f"constrOpSqc[{j},{m1},{m2}]")
+            # 3. job completion time, discrepency (earliness and tardiness) and tardiness
+            if j not in self.varJob:
+                varJobCompT = model.addVar(vtype=GRB.CONTINUOUS, name=f"varJobCompT[{j}]")
+                varJobCompDiscr = model.addVar(lb=-1000, vtype=GRB.CONTINUOUS, name=f"varJobCompDiscr[{j}]")
+                varJobTardiness = model.addVar(vtype=GRB.CONTINUOUS, name=f"varJobTardiness[{j}]")
+                constrs = [
+                    model.addConstr(varJobCompT == self.varOpBeginT[j, traj[-1]] + pt[traj[-1]], name=f"constrJobCompT[{j}]"),
+                    model.addConstr(varJobCompDiscr == varJobCompT - in_system_jobs[j].due, name=f"constrJobCompDiscr[{j}]")]
+                if self.formulation == "quadratic":
+                    constrs.append(model.addConstr(varJobTardiness == gp.max_(varJobCompDiscr, constant = 0), name=f"constrJobTardiness[{j}]"))
+                else:
+                    # tardiness is non-negative and no less than discrepency, both this and the makespan are minimized so the bounds are tight
+                    constrs.append(model.addConstr(varJobTardiness >= varJobCompDiscr, name=f"constrJobTardiness[{j}]"))
+                    constrs.append(model.addConstr(self.varMakespan >= varJobCompT, name=f"constrMakespan[{j}]"))
+                self.varJob[j] = (varJobCompT, varJobCompDiscr, varJobTardiness)
+                self.constrJob[j] = constrs
+                self.jobLastOp[j] = traj[-1]
+        if self.formulation == "quadratic" and self.constrMakespan is None:
+            self.constrMakespan = model.addConstr(
+                self.varMakespan == gp.max_([varJobCompT for varJobCompT, _, _ in self.varJob.values()]), name = 'constrMakespan')
+        # 4. all operations must be processed following the precedence relations between jobs
+        # the binary variable equals 0 if job 1 preceeds job 2 on that machine, 1 otherwise
+        for (j1, j2), _intersec in job_intersections.items():
+            for m in _intersec:
+                if (j1, j2, m) in self.varJobPrec:
+                    continue
+                S1, S2 = self.varOpBeginT[j1, m], self.varOpBeginT[j2, m]
+                p1, p2 = in_system_jobs[j1].pt_by_m_idx[m], in_system_jobs[j2].pt_by_m_idx[m]
+                y = model.addVar(vtype=GRB.BINARY, name=f"varJobPrec[{j1},{j2},{m}]")
+                if self.formulation == "quadratic":
+                    constrs = [model.addConstr((S1 + p1) * (1 - y) <= S2, name=f"constrJobPrec_0[{j1},{j2},{m}]"),
+                               model.addConstr((S2 + p2) * y <= S1, name=f"constrJobPrec_1[{j1},{j2},{m}]")]
+                elif self.formulation == "big_m":
+                    # S1 + p1 <= S2 + M1 * y and S2 + p2 <= S1 + M2 * (1 - y), the M values are set with the bounds
+                    constrs = [model.addConstr(S1 - S2 - y <= -p1, name=f"constrJobPrec_0[{j1},{j2},{m}]"),
+                               model.addConstr(S2 - S1 + y <= 1 - p2, name=f"constrJobPrec_1[{j1},{j2},{m}]")]
+                else:
+                    constrs = [model.addConstr((y == 0) >> (S1 + p1 <= S2), name=f"constrJobPrec_0[{j1},{j2},{m}]"),
+                               model.addConstr((y == 1) >> (S2 + p2 <= S1), name=f"constrJobPrec_1[{j1},{j2},{m}]")]
+                self.varJobPrec[j1, j2, m] = y
+                self.constrJobPrec[j1, j2, m] = constrs
+        '''
+        PART III: job cannot be processed bafore becoming available or assigned machine is released
+        '''
+        # the earliest begin of operation is its lower bound, after its job and machine are ready
+        opEarliestT, opLatestT = {}, {}
+        for j, traj in remaining_trajectories.items():
+            _T = job_available_T[j]
+            for m in traj:
+                opEarliestT[j, m] = _T = max(_T, machine_release_T[m])
+                _T += in_system_jobs[j].pt_by_m_idx[m]
+        for key, var in self.varOpBeginT.items():
+            var.LB = opEarliestT[key]
+        if self.formulation == "big_m":
+            # the latest begin in a left-shifted schedule is the upper bound, early enough to complete the rest of job
+            # before all remaining operations could end one after another
+            horizon = max(list(machine_release_T.values()) + list(job_available_T.values())) + sum(
+                in_system_jobs[j].pt_by_m_idx[m] for j, m in self.varOpBeginT)
+            for j, traj in remaining_trajectories.items():
+                _T = horizon
+                for m in reversed(traj):
+                    opLatestT[j, m] = _T = _T - in_system_jobs[j].pt_by_m_idx[m]
+                    self.varOpBeginT[j, m].UB = _T
+            # M = the latest end of one operation - the earliest begin of the other
+            for (j1, j2, m), y in self.varJobPrec.items():
+                p1, p2 = in_system_jobs[j1].pt_by_m_idx[m], in_system_jobs[j2].pt_by_m_idx[m]
+                M1, M2 = max(0, opLatestT[j1, m] + p1 - opEarliestT[j2, m]), max(0, opLatestT[j2, m] + p2 - opEarliestT[j1, m])
+                constr_0, constr_1 = self.constrJobPrec[j1, j2, m]
+                model.chgCoeff(constr_0, y, -M1)
+                model.chgCoeff(constr_1, y, M2)
+                constr_1.RHS = M2 - p2
+        '''
+        PART IV: the objectives over current variables
+        '''
+        # the primary (tier 1) objective of optimization, however, Gurobi can be "lazy"
+        # optimization process terminates as soon as Gurobi finds no improvements of objective can be obtained
+        model.setObjective(gp.quicksum(varJobTardiness for _, _, varJobTardiness in self.varJob.values()), GRB.MINIMIZE)
+        # therefore we use the secondary objective in hierachical optimization
+        # it can only be optimized without compromising the primary objective
+        # tier 2 objective, minimize the makespan of entire produiction schedule
+        model.setObjectiveN(expr = self.varMakespan, index = 1, priority = -1)
+        # tier 3 objective, let each operation start as early as possible
+        model.setObjectiveN(expr = gp.quicksum(self.varOpBeginT.values()), index = 2, priority = -2)
+        model.update()
+
+
+    @classmethod
+    def start_env(cls, log_file:Optional[str] = None) -> gp.Env:
+        env = gp.Env(empty=True)
+        env.setParam('LogToConsole', 0)
+        if log_file is not None:
+            env.setParam('LogFile', log_file)
+        env.start()
+        return env
+
+
+    def close(self):
+        self.model.dispose()
+        if self.own_env:
+            self.env.dispose()
+
+
 class GurobiOptimizer:
+    '''
+    Mixed-integer model of the central scheduler, the precedence between two jobs on a shared machine is written as
+    quadratic: products of the begin time and precedence binary variables, tardiness and makespan by max_ general constraints
+    big_m: linear disjunctions, with the M of every pair from the earliest and latest begin time of its two operations
+    indicator: linear constraints enforced by the value of precedence variable (indicator constraints)
+    the linear formulations define tardiness and makespan by linear lower bounds, which are tight at the optimum
+    The model is built in a session (see GurobiSession), a new one for the call unless a long-lived session is given
+    '''
     @classmethod
     def solve_scheduling_problem(cls, logger, env, m_list:List[Machine], 
-                                 job_intersections, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job]
-                                 ):
-        grb_msg = {2:'optimal', 3:'infeasible', 4:'infeasible or unbounded', 9:'time limit', 11:'interrupted'}
+                                 job_intersections, remaining_trajectories:Dict[int, list], in_system_jobs:Dict[int, Job],
+                                 previous:Optional[Dict[Tuple[int, int], float]] = None, budget:Optional[SolverBudget] = None,
+                                 formulation:Literal["quadratic", "big_m", "indicator"] = "quadratic", session:Optional[GurobiSession] = None,
+                                 profiler:Optional[Profiler] = None):
+        grb_msg = {2:'optimal', 3:'infeasible', 4:'infeasible or unbounded', 9:'time limit', 11:'interrupted', 16:'work limit'}
         START_T = time.time()
         # get machines' release time
         machine_release_T = {m.m_idx: max(m.release_T, env.now) for m in m_list}
         # get jobs' available time
         job_available_T = {_j_idx: max(in_system_jobs[_j_idx].available_T, env.now) for _j_idx in remaining_trajectories.keys()}
-        # build the optimization model
-        with gp.Env(empty=True) as grb_env:
-            grb_env.setParam('LogToConsole', 0)
-            grb_env.setParam('LogFile', str(Path(logger.handlers[0].baseFilename).parent / "gurobi.log"))
-            grb_env.start()
-            with gp.Model(name="jsp_scheduler", env=grb_env) as model:
-                ''' 
-                PART I: create the variables and necessary pairs
-                '''
-                # 1. time of the beginning of operations, for all jobs and their remaining operations
-                pairOpBeginT = []
-                pairOpSqc = []
-                pairJobFirstOp = []
-                pairJobLastOp = []
-                for _j_idx, _traj in remaining_trajectories.items():
-                    # (j_idx, m_idx) pairing of begin time variables
-                    pairOpBeginT += list(itertools.product([_j_idx], _traj))
-                    # pairing of consecutive machines in sequence of operation
-                    pairConsecM = list(zip(_traj, _traj[1:]))
-                    # [(j1_idx, m1_idx), (j2_idx, m2_idx)] pairings of begin time variables for consecutive operations
-                    pairOpSqc += [list(itertools.product([_j_idx], mp)) for mp in pairConsecM]
-                    # job's first and last operation
-                    pairJobFirstOp += [(_j_idx, _traj[0])]
-                    pairJobLastOp += [(_j_idx, _traj[-1])]
-                # continuous variables indicating the beginning time of all operations
-                varOpBeginT = model.addVars(pairOpBeginT, vtype=GRB.CONTINUOUS, name="varOpBeginT")
-                # 2. job-specifc variables/metrics
-                # job completion time
-                varJobCompT = model.addVars(list(remaining_trajectories.keys()), vtype=GRB.CONTINUOUS, name="varJobCompT")
-                # discrepency of completion time, can be eother earliness or tardiness
-                varJobCompDiscr = model.addVars(list(remaining_trajectories.keys()), lb=-1000, vtype=GRB.CONTINUOUS, name="varJobCompDiscr")
-                # job tardiness, non-negative
-                varJobTardiness = model.addVars(list(remaining_trajectories.keys()), vtype=GRB.CONTINUOUS, name="varJobTardiness")
-                # schedule makespan, not adjusted by the starting time of a cycle
-                varMakespan = model.addVar(vtype=GRB.CONTINUOUS, name="varMakespan")
-                # 3. precedence variables for each pair of jobs on relevant machines, if they are intersected
-                pairJobPrec = []
-                #print(job_intersections)
-                for (_j1, _j2), _intersec in job_intersections.items():
-                    pairJobPrec += list(itertools.product([_j1], [_j2], _intersec))
-                # binary variable to indicate the precedence between job 1 and job 2 on a machine
-                # equals 0 if job 1 preceeds job 2 on that machine, 1 otherwise
-                varJobPrec = model.addVars(pairJobPrec, vtype=GRB.BINARY, name='varJobPrec')
-                logger.debug('Job in system: {}, Operation begin time pairs: {}, Job operations sequence pairs: {}, Job precedence pairs: {}'.format(
-                    len(in_system_jobs), len(pairOpBeginT), len(pairOpSqc), len(pairJobPrec)))
-                ''' 
-                PART II: create the constraints
-                '''
-                # 1. a job's operations must be processed following job's trajectory
-                constrOpSqc = model.addConstrs(
-                    (varOpBeginT[j, m1] + in_system_jobs[j].pt_by_m_idx[m1] <= varOpBeginT[j, m2] for (j,m1), (j,m2) in pairOpSqc),
-                    name = 'constrOpSqc')
-                # 2. job cannot be processed bafore becoming available or assigned machine is released
-                # 2.1 job's all operations can be processed only after machine release time
-                constrMachineRelease = model.addConstrs(
-                    (varOpBeginT[j, m] >= machine_release_T[m] for j, m in pairOpBeginT),
-                    name = 'constrMachineRelease')
-                # 2.2 job's first operation can be processed only itself becomes available
-                constrJobAvailable = model.addConstrs(
-                    (varOpBeginT[j, m] >= job_available_T[j] for j, m in pairJobFirstOp),
-                    name = 'constrJobAvailable')
-                # 3. all operations must be processed following the precedence relations between jobs
-                # 3.1 if job 1 preceeds job 2 <--> precedence variable = 0
-                constrJobPrec_1 = model.addConstrs(
-                    ((varOpBeginT[j1, m] + in_system_jobs[j1].pt_by_m_idx[m]) * (1 - varJobPrec[j1, j2, m]) <= varOpBeginT[j2, m] for j1, j2, m in pairJobPrec),
-                    name = 'constrJobPrec_0')
-                # 3.2 if job 2 preceeds job 1 <--> precedence variable = 1
-                constrJobPrec_0 = model.addConstrs(
-                    ((varOpBeginT[j2, m] + in_system_jobs[j2].pt_by_m_idx[m]) * varJobPrec[j1, j2, m] <= varOpBeginT[j1, m] for j1, j2, m in pairJobPrec),
-                    name = 'constrJobPrec_1')
-                # 4. performance variables (dummies, not decisional)
-                # 4.1 get the completion time of jobs
-                constrJobCompT = model.addConstrs(
-                    (varJobCompT[j] == varOpBeginT[j, m] + in_system_jobs[j].pt_by_m_idx[m] for j, m in pairJobLastOp),
-                    name = 'constrJobCompT')
-                # 4.2 get the completion discrepency (earliness and tardiness)
-                constrJobCompDiscr = model.addConstrs(
-                    (varJobCompDiscr[j] == varJobCompT[j] - in_system_jobs[j].due for j, m in pairJobLastOp),
-                    name = 'constrJobCompDiscr')
-                # 4.3 get the job tardiness
-                constrJobTardiness = model.addConstrs(
-                    (varJobTardiness[j] == gp.max_(varJobCompDiscr[j], constant = 0) for j, m in pairJobLastOp),
-                    name = 'constrJobTardiness')
-                # 4.4 the makespan of the schedule in this cycle
-                constrMakespan = model.addConstr(varMakespan == gp.max_([varJobCompT[j] for j, m in pairJobLastOp]),name = 'constrMakespan')
-                ''' 
-                PART III: create the objective(s), and run the optimization
-                '''
-                model.update()
-                model.setParam('time_limit', 10)
-                # the primary (tier 1) objective of optimization, however, Gurobi can be "lazy"
-                # optimization process terminates as soon as Gurobi finds no improvements of objective can be obtained
-                model.setObjective(varJobTardiness.sum(), GRB.MINIMIZE)
-                # therefore we use the secondary objective in hierachical optimization
-                # it can only be optimized without compromising the primary objective
-                # tier 2 objective, minimize the makespan of entire produiction schedule
-                model.setObjectiveN(expr = varMakespan, index = 1, priority = -1)
-                # tier 3 objective, let each operation start as early as possible
-                model.setObjectiveN(expr = varOpBeginT.sum(), index = 2, priority = -2)
-                '''
-                for j, m in pairJobLastOp:
-                    model.setObjectiveN(expr = varJobCompT[j], index = j+2, priority = -2)
-                '''
-                # adding this constraint would produce perfect match schedule at the cost fo computation time
-                #model.setObjectiveN(expr = varOpBeginT.sum(), index = 1e5, priority = -3)
-                # run the optimization
-                model.optimize()
-                '''
-                PART IV: convert the gurobi tupledict to Python dict
-                '''
-                time_expense = round(time.time() - START_T, 3)
-                logger.debug("Optimization elapsed, model status: {}, time expense: {}s".format(
-                    grb_msg[model.status], time_expense))
-                # extract the value of varOpBeginT variables
+        # build the optimization model, or update the model of session
+        temporary = session is None
+        if temporary:
+            session = GurobiSession(str(Path(logger.handlers[0].baseFilename).parent / "gurobi.log"), formulation)
+        try:
+            session.update(remaining_trajectories, in_system_jobs, job_intersections, machine_release_T, job_available_T)
+            model, varOpBeginT = session.model, session.varOpBeginT
+            logger.debug('Job in system: {}, Operation begin time pairs: {}, Job operations sequence pairs: {}, Job precedence pairs: {}'.format(
+                len(in_system_jobs), len(varOpBeginT), len(session.constrOpSqc), len(session.varJobPrec)))
+            budget = budget or SolverBudget()
+            model.setParam('TimeLimit', budget.time_limit if budget.time_limit is not None else GRB.INFINITY)
+            model.setParam('WorkLimit', budget.det_time if budget.det_time is not None else GRB.INFINITY)
+            model.setParam('Threads', budget.workers)
+            model.setParam('MIPGap', budget.rel_gap if budget.rel_gap is not None else 1e-4)
+            # warm start (MIP start) from the previous schedule, the precedence follows the begin time of operations
+            if previous is not None:
+                hint = build_hint(previous, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T)
+                for key, var in varOpBeginT.items():
+                    var.Start = hint[key]
+                for (j1, j2, m), var in session.varJobPrec.items():
+                    var.Start = 0 if hint[j1, m] < hint[j2, m] else 1
+            # adding this constraint would produce perfect match schedule at the cost fo computation time
+            #model.setObjectiveN(expr = varOpBeginT.sum(), index = 1e5, priority = -3)
+            # run the optimization
+            _optimize_T = time.time()
+            model.optimize()
+            session.optimize_T += time.time() - _optimize_T
+            session.setup_T += _optimize_T - START_T
+            if profiler is not None:
+                profiler.add("model_build", _optimize_T - START_T)
+                profiler.add("solve", time.time() - _optimize_T)
+            '''
+            convert the variables to Python dict
+            '''
+            time_expense = round(time.time() - START_T, 3)
+            logger.debug("Optimization elapsed, model status: {}, time expense: {}s".format(
+                grb_msg[model.status], time_expense))
+            # extract the value of varOpBeginT variables, the best schedule found within the budget
+            if model.SolCount > 0:
                 converted_varOpBeginT = {key: var.X for key, var in varOpBeginT.items()}
+            else:
+                logger.warning("{} > No schedule found within the budget ({}), use the previous schedule shifted to now".format(env.now, budget))
+                converted_varOpBeginT = build_hint(previous or {}, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T)
+        finally:
+            if temporary:
+                session.close()
         # record the extended problem instance
         if time_expense > 1:
-            over_extended_problem = [[(float(m_idx), float(in_system_jobs[j_idx].pt_by_m_idx[m_idx])) 
-                  for m_idx in traj] for j_idx, traj in remaining_trajectories.items()]
+            over_extended_problem = problem_record(env.now, remaining_trajectories, in_system_jobs, machine_release_T, job_available_T, "GurobiOptimizer", time_expense)
         else:
             over_extended_problem = None
         # return only the operation begin time to build the schedule
-        return converted_varOpBeginT, over_extended_problem
\ No newline at end of file
+        return converted_varOpBeginT, over_extended_problem
@@ -1,31 +1,117 @@
 """
 Sequencing rules and place holders for mathematical-optimization-based schedulers
+A rule receives the queuing jobs, and the feature arrays of the queue (see queue_features.QueueFeatures) as keyword "features"
+It returns the position of picked job in queue
+A rule whose priority of a queuing job never changes while it waits can declare the priority with @static_priority,
+the machine then keeps its queue in a binary heap (see simulator.job_queue.HeapJobQueue) instead of calling the rule
 """
 
 import inspect
 import numpy as np
+from typing import Any, Callable, Optional
+from .queue_features import QueueFeatures
+from ..simulator.exc import InvalidRequestError
+
+
+# look-ahead parameters of ATC and COVERT
+ATC_K = 2.0
+COVERT_K = 2.0
+# look-ahead of Rollout: simulated time after the decision, and the rule of the other decisions in the look-ahead
+ROLLOUT_HORIZON = 200
+ROLLOUT_BASE = "ATC"
+
+
+def static_priority(key:Callable[[Any, int], Any]):
+    # key(job, arrival order) -> priority, the job with smallest priority is picked, ties are broken by arrival order
+    def decorator(rule):
+        rule.priority_key = key
+        return rule
+    return decorator
+
+
+def _features(jobs, features:Optional[QueueFeatures]) -> QueueFeatures:
+    # rules called without the machine's feature arrays build them from the jobs
+    return features if features is not None else QueueFeatures.from_jobs(jobs)
+
 
 class SequencingMethod:
     @classmethod
+    @static_priority(lambda job, arrival_cnt: arrival_cnt)
     def FIFO(cls, jobs, *args, **kwargs):
         return 0
 
     @classmethod
+    @static_priority(lambda job, arrival_cnt: -arrival_cnt)
     def LIFO(cls, jobs, *args, **kwargs):
         return -1
 
     @classmethod
-    def Slack(cls, jobs, *args, **kwargs):
-        s = np.array([j.due for j in jobs]) - jobs[0].env.now
+    # shortest processing time
+    @static_priority(lambda job, arrival_cnt: job.current_pt)
+    def SPT(cls, jobs, *args, features:Optional[QueueFeatures] = None, **kwargs):
+        f = _features(jobs, features)
+        return np.argmin(f.next_pt)
+
+    @classmethod
+    # slack of all jobs shrinks by the same amount as time goes by, so the order is fixed by due date
+    @static_priority(lambda job, arrival_cnt: job.due)
+    def Slack(cls, jobs, *args, features:Optional[QueueFeatures] = None, **kwargs):
+        f = _features(jobs, features)
+        s = f.due - f.now
         return np.argmin(s)
 
     @classmethod
-    def CR(cls, jobs, *args, **kwargs):
-        ttd = np.array([j.due for j in jobs]) - jobs[0].env.now
-        sum_pt = np.array([sum(j.remaining_pt) for j in jobs])
-        critical_ratio = ttd / sum_pt
+    def CR(cls, jobs, *args, features:Optional[QueueFeatures] = None, **kwargs):
+        f = _features(jobs, features)
+        ttd = f.due - f.now
+        critical_ratio = ttd / f.remaining_pt
         return np.argmin(critical_ratio)
+
+    @classmethod
+    # apparent tardiness cost
+    def ATC(cls, jobs, *args, features:Optional[QueueFeatures] = None, **kwargs):
+        f = _features(jobs, features)
+        next_pt = f.next_pt
+        slack = np.maximum(f.due - next_pt - f.now, 0)
+        priority = np.exp(-slack / (ATC_K * next_pt.mean())) / next_pt
+        return np.argmax(priority)
+
+    @classmethod
+    # cost over time, the lead time of remaining operations is estimated as COVERT_K times their processing time
+    def COVERT(cls, jobs, *args, features:Optional[QueueFeatures] = None, **kwargs):
+        f = _features(jobs, features)
+        slack = np.maximum(f.due - f.now - f.remaining_pt, 0)
+        priority = np.maximum(1 - slack / (COVERT_K * f.remaining_pt), 0) / f.next_pt
+        return np.argmax(priority)
+
+    @classmethod
+    # modified operation due date
+    def MOD(cls, jobs, *args, features:Optional[QueueFeatures] = None, **kwargs):
+        f = _features(jobs, features)
+        mod = np.maximum(f.op_due, f.now + f.next_pt)
+        return np.argmin(mod)
     
+    @classmethod
+    # try every queuing job in a copy of the shopfloor (see simulator.snapshot), simulate ROLLOUT_HORIZON units ahead following
+    # ROLLOUT_BASE, pick the job with least tardiness of completed jobs plus lateness of jobs in system at the end of look-ahead
+    # the copies share the state of random generator, so all candidates see the same future arrivals and breakdowns
+    def Rollout(cls, jobs, *args, machine = None, **kwargs):
+        if machine is None:
+            raise InvalidRequestError("Rollout needs the deciding machine to copy its shopfloor")
+        snapshot = machine.shopfloor.snapshot()
+        base_rule = getattr(cls, ROLLOUT_BASE)
+        end_T = machine.env.now + ROLLOUT_HORIZON
+        cost = np.zeros(len(jobs))
+        for pos in range(len(jobs)):
+            spf = snapshot.restore()
+            for m in spf.m_list:
+                m.job_sequencing = base_rule
+            # resume the decision in the copy, same as the action of an external agent
+            spf.narrator.m_decided(machine.m_idx, pos)
+            spf.env.run(until = end_T)
+            cost[pos] = spf.recorder.tardiness_stat.sum + sum(max(0, end_T - j.due) for j in spf.recorder.in_system_jobs.values())
+        return np.argmin(cost)
+
     @classmethod 
     # place holder for Gurobi optimizer, will use the draw_from_schedule function after creating a central scheduler object
     def GurobiOptimizer(cls, jobs, *args, **kwargs): 
@@ -36,7 +122,17 @@ class SequencingMethod:
     def ORTools(cls, jobs, *args, **kwargs): 
         return
 
-    @classmethod
+    @classmethod 
+    # place holder for the constructive Giffler-Thompson scheduler, will use the draw_from_schedule function after creating a central scheduler object
+    def GifflerThompson(cls, jobs, *args, **kwargs): 
+        return
+
+    @classmethod 
+    # place holder for the local search scheduler, will use the draw_from_schedule function after creating a central scheduler object
+    def TabuSearch(cls, jobs, *args, **kwargs): 
+        return
+
+    @classmethod 
     # place holder, will use the function after creating a DRL scheduler
     def DRL_scheduler(cls, jobs, *args, **kwargs): 
         return
@@ -1,14 +1,21 @@
 # standard imports
-from logging import Logger
+from collections import deque
+from logging import Logger, INFO
 import numpy as np
+from pathlib import Path
 from simpy import Environment
 from tabulate import tabulate
 import time
-from typing import Dict, List, Tuple, Union, Literal
+from typing import Deque, Dict, List, Optional, Tuple, Union, Literal
 # project modules
 from .exc import *
-from .job import Job
+from .job import Job, JobTable
 from .machine import Machine
+from .profiler import Profiler
+from .record_store import RecordStore, RunningStat
+from .scenario import Scenario
+from .trace import *
+from ..DRL.replay_memory import ReplayMemory
 from ..scheduler.sequencing_rule import SequencingMethod
 from ..scheduler.scheduler import CentralScheduler
 
@@ -32,6 +39,8 @@ class Narrator:
         self.env:Environment
         self.m_list:List[Machine]
         self.recorder:Recorder
+        # timers of the hot phases, if profiling is on
+        self.profiler:Optional[Profiler] = kwargs.get('profiler')
         self.logger.debug("Event narrator created")
         # specify the random seed
         if ('seed' in kwargs) and (kwargs['seed'] != 0):
@@ -53,12 +62,20 @@ class Narrator:
         _beta = _E_pt / self.E_utliz # beta is the average time interval between job arrivals
         self.logger.debug("The expected utilization rate (excluding machine down time) is: [{}%]".format(self.E_utliz*100))
         self.logger.debug("Converted expected interval between job arrival is: [{}] (m_no: [{}], pt_range: {}, exp_pt: [{}])".format(_beta, self.m_no, self.pt_range, _E_pt))
-        # number of new jobs arrive within simulation
-        self.total_no = np.round(self.span/_beta).astype(int)
-        # the interval between job arrivals by exponential distribution
-        self.arrival_interval = self.rng.exponential(_beta, self.total_no).round()
+        # replay a pre-sampled scenario if given, otherwise draw the job arrivals here and other features on the fly
+        self.scenario:Optional[Scenario] = kwargs.get('scenario')
+        if self.scenario is not None:
+            self.total_no = self.scenario.job_no
+            self.arrival_interval = self.scenario.arrival_interval
+            self.bkd_cycle_idx = [0] * self.m_no
+            self.logger.debug("Replay scenario of [{}] jobs, seed: [{}]".format(self.total_no, self.scenario.config['seed']))
+        else:
+            # number of new jobs arrive within simulation
+            self.total_no = np.round(self.span/_beta).astype(int)
+            # the interval between job arrivals by exponential distribution
+            self.arrival_interval = self.rng.exponential(_beta, self.total_no).round()
         # process the job arrival function
-        self.env.process(self.process_job_creation())
+        self.launch_job_creation()
         ''' 
         1.2 Machine initialization: knowing each other and specify the sequencing rule
         '''
@@ -68,7 +85,7 @@ class Narrator:
                 pass
                 #self.job_sequencing_func = complete_schedule.who_is_next()
             # or using mathematical optimization to produce dynamic schedule
-            elif (kwargs['sqc_method'] == SequencingMethod.GurobiOptimizer) or (kwargs['sqc_method'] == SequencingMethod.ORTools): 
+            elif kwargs['sqc_method'] in (SequencingMethod.GurobiOptimizer, SequencingMethod.ORTools, SequencingMethod.GifflerThompson, SequencingMethod.TabuSearch): 
                 self.central_scheduler = CentralScheduler(**self.kwargs)
                 self.opt_mode = True
                 job_sequencing_func = self.central_scheduler.draw_from_schedule
@@ -85,7 +102,7 @@ class Narrator:
         '''
         if self.machine_breakdown == True:
             for m_idx, m in enumerate(self.m_list):
-                self.env.process(self.process_machine_breakdown(m, self.random_MTBF, self.random_MTTR))
+                self.launch_machine_breakdown(m)
             self.logger.info("Machine breakdown mode is ON, MTBF: [{}], MTTR: [{}]".format(self.MTBF, self.MTTR))
         else:
             self.logger.debug(f"Machine breakdown is disabled.")
@@ -102,52 +119,94 @@ class Narrator:
             self.pt_cv = 0
 
 
+    def launch_job_creation(self):
+        self.env.process(self.process_job_creation())
+
+
+    def launch_machine_breakdown(self, m_instance:Machine):
+        self.env.process(self.process_machine_breakdown(m_instance, self.random_MTBF, self.random_MTTR))
+
+
     # continuously creating new jobs
     def process_job_creation(self):
         self.program_start_T = time.time()
         # jobs are assumed to go through all machines
-        trajectory_seed = np.arange(self.m_no)
+        self.trajectory_seed = np.arange(self.m_no)
         while self.j_idx < self.total_no:
             # draw the interval from pre-produced list
             job_arrival_interval = self.arrival_interval[self.j_idx]
             yield self.env.timeout(job_arrival_interval)
-            # produce the trajectory of job, by shuffling the sequence seed
-            self.rng.shuffle(trajectory_seed)
-            # produce a random processing time array of job, this is THEORATICAL value, not actual value if variance is enabled
-            ptl = self.rng.integers(low = self.pt_range[0], high = self.pt_range[1]+1, size = [self.m_no])
-            # new job instance
-            job_instance = Job(
-                env = self.env, logger = self.logger, recorder = self.recorder, rng = self.rng,
-                j_idx = self.j_idx, trajectory = trajectory_seed.copy(), pt_by_m_idx = ptl.copy(),
-                pt_range = self.pt_range, pt_cv = self.pt_cv, due_tightness = self.due_tightness)
-            # track this job
-            self.recorder.in_system_jobs[self.j_idx] = job_instance
+            job_instance = self.create_job()
             # force rendering the event
             yield self.env.timeout(0)
             # build a new schedule if optimization mode is on
             if self.opt_mode:
-                if not self.central_scheduler.build_schedule_event.triggered:
-                    self.central_scheduler.build_schedule_event.succeed()
-                    self.logger.debug("New job arrived, call central scheduler to build schedule\n"+"-"*88)
+                self.central_scheduler.request_rebuild()
+                self.logger.debug("New job arrived, call central scheduler to build schedule\n"+"-"*88)
             # after creating a job, assign it to the first machine along its trajectory
-            first_m = trajectory_seed[0]
-            self.m_list[first_m].job_arrival(job_instance)
-            # increase the running job index
-            self.j_idx += 1
+            self.release_job(job_instance)
+
+
+    # draw the trajectory and processing time of a new job, and track it in recorder
+    def create_job(self) -> Job:
+        if self.scenario is not None:
+            return self.replay_job()
+        # produce the trajectory of job, by shuffling the sequence seed
+        self.rng.shuffle(self.trajectory_seed)
+        # produce a random processing time array of job, this is THEORATICAL value, not actual value if variance is enabled
+        ptl = self.rng.integers(low = self.pt_range[0], high = self.pt_range[1]+1, size = [self.m_no])
+        # new job instance
+        job_instance = Job(
+            env = self.env, logger = self.logger, recorder = self.recorder, rng = self.rng,
+            j_idx = self.j_idx, trajectory = self.trajectory_seed.copy(), pt_by_m_idx = ptl.copy(),
+            pt_range = self.pt_range, pt_cv = self.pt_cv, due_tightness = self.due_tightness)
+        # track this job
+        self.recorder.in_system_jobs[self.j_idx] = job_instance
+        return job_instance
+
+
+    # create the new job from the pre-sampled scenario
+    def replay_job(self) -> Job:
+        job_instance = Job(
+            env = self.env, logger = self.logger, recorder = self.recorder, rng = self.rng,
+            j_idx = self.j_idx, trajectory = self.scenario.trajectory[self.j_idx], pt_by_m_idx = self.scenario.pt_by_m_idx[self.j_idx],
+            pt_range = self.pt_range, pt_cv = self.pt_cv, due_tightness = self.due_tightness,
+            actual_pt = self.scenario.actual_pt[self.j_idx], due = self.scenario.due[self.j_idx])
+        self.recorder.in_system_jobs[self.j_idx] = job_instance
+        return job_instance
+
+
+    # send the new job to the first machine along its trajectory
+    def release_job(self, job_instance:Job):
+        self.m_list[job_instance.trajectory[0]].job_arrival(job_instance)
+        # increase the running job index
+        self.j_idx += 1
+
+
+    # draw the time interval between two break downs and the down time
+    def draw_breakdown(self, m_idx:int, random_MTBF:bool, random_MTTR:bool) -> Tuple[float, float]:
+        # or read the next breakdown from the machine's calendar in scenario
+        if self.scenario is not None:
+            cycle = self.bkd_cycle_idx[m_idx]
+            if cycle >= self.scenario.bkd_interval.shape[1]:
+                raise SimulatorError(f"Breakdown calendar of Machine {m_idx} in scenario is exhausted after {cycle} cycles")
+            self.bkd_cycle_idx[m_idx] += 1
+            return self.scenario.bkd_interval[m_idx, cycle], self.scenario.bkd_time[m_idx, cycle]
+        if random_MTBF:
+            MTBF_interval = np.around(self.rng.exponential(self.MTBF), decimals = 1)
+        else:
+            MTBF_interval = self.MTBF
+        if random_MTTR:
+            bkd_t = np.around(self.rng.uniform(self.MTTR * 0.5, self.MTTR * 1.5), decimals = 1)
+        else:
+            bkd_t = self.MTTR
+        return MTBF_interval, bkd_t
 
 
     # periodicall disable machines
     def process_machine_breakdown(self, m_instance:Machine, random_MTBF:bool, random_MTTR:bool):
         while self.env.now < self.span:
-            # draw the time interval between two break downs and the down time
-            if random_MTBF:
-                MTBF_interval = np.around(self.rng.exponential(self.MTBF), decimals = 1)
-            else:
-                MTBF_interval = self.MTBF
-            if random_MTTR:
-                bkd_t = np.around(self.rng.uniform(self.MTTR * 0.5, self.MTTR * 1.5), decimals = 1)
-            else:
-                bkd_t = self.MTTR
+            MTBF_interval, bkd_t = self.draw_breakdown(m_instance.m_idx, random_MTBF, random_MTTR)
             # if machine is currently running, the breakdown will commence right after current operation
             # but get the actual beging and end time first
             yield self.env.timeout(MTBF_interval)
@@ -160,34 +219,40 @@ class Narrator:
             # restoration time is the sum of actual begin time and expected down time (MTTR)
             m_instance.release_T = actual_begin + self.MTTR
             m_instance.status = "down"
-            self.logger.info(f"{self.env.now} > BKD start: Machine {m_instance.m_idx} will be down for {bkd_t}, till {actual_begin + self.MTTR}"
-                              + (". Invoke central scheduler to rebuild the schedule" if self.opt_mode else ""))
+            if self.recorder.trace is not None:
+                self.recorder.trace.append((self.env.now, EV_BKD_BEGIN, m_instance.m_idx, -1))
+            if self.logger.isEnabledFor(INFO):
+                self.logger.info(f"{self.env.now} > BKD start: Machine {m_instance.m_idx} will be down for {bkd_t}, till {actual_begin + self.MTTR}"
+                                  + (". Invoke central scheduler to rebuild the schedule" if self.opt_mode else ""))
             #yield self.env.timeout(0)
             # rebuild schedule if necessary
             if self.opt_mode:
-                if not self.central_scheduler.build_schedule_event.triggered:
-                    self.central_scheduler.build_schedule_event.succeed()
+                self.central_scheduler.request_rebuild()
             # time of breakdown
             yield self.env.timeout(actual_end - self.env.now)
-            self.recorder.m_bkd_dict[m_instance.m_idx].append([actual_begin, actual_end])
+            self.recorder.record_breakdown(m_instance.m_idx, actual_begin, actual_end)
             m_instance.working_event.succeed()
 
     
     def post_simulation(self):
+        # write the remaining records to file in streaming mode
+        self.recorder.close_store()
         # compare the number of completed job and created job
-        if len(self.recorder.j_operation_dict) != self.j_idx:
+        if self.recorder.tardiness_stat.count != self.j_idx:
             msg = "Simulation FAILED, not all jobs have successfully complete their operations"
             self.logger.error(msg)
+            self.recorder.dump_trace(self.logger)
         # write the over-extended problem instances
-        if self.opt_mode and self.central_scheduler.ext_prob_log:
+        if self.opt_mode:
             self.central_scheduler.post_simulation()
         # compare each operation in schedule and execution
         # mismatch doesn't mean simulation failed, but indicate likely "under-optimization"
         # only meaningful when processing variablity and breakdown time (if any) variablity are 0
         if self.opt_mode and self.pt_cv == 0 and (self.machine_breakdown and self.random_MTTR) == False:
             _mismatch = {}
+            op_records = self.recorder.operation_records(self.central_scheduler.j_op_by_schedule.keys())
             for _j_idx, ops in self.central_scheduler.j_op_by_schedule.items():
-                compare = zip(ops, self.recorder.j_operation_dict[_j_idx][-len(ops):])
+                compare = zip(ops, op_records[_j_idx][-len(ops):])
                 for E, A in compare: # E, A are both (m_idx, opBeginT), one is expected, one is actual 
                     if E[1]!=A[1]: 
                         try:
@@ -230,37 +295,54 @@ class Narrator:
         if self.opt_mode:
             tt= time.time()-self.program_start_T
             opt_tt = self.recorder.opt_time_expense
-            sim_config[-1]+= "\nWall Time: {}s, Opt.: {}s, {}%".format(round(tt,2), round(opt_tt,2), round(100*(opt_tt/tt),1))
+            sim_config[-1]+= "\nWall Time: {}s, Opt.: {}s, {}%, {} solves (warm start: {})\nSolver budget: {}\nCache hit: {}, miss: {}".format(
+                round(tt,2), round(opt_tt,2), round(100*(opt_tt/tt),1), self.recorder.opt_cnt, self.central_scheduler.warm_start,
+                self.central_scheduler.budget, self.recorder.opt_cache_hit, self.recorder.opt_cache_miss)
+            sim_config[-1]+= "\nRebuild policy: {}, triggers: {}, rebuilds: {} (forced by idle machine: {})".format(
+                self.central_scheduler.rebuild_policy, self.recorder.rebuild_trigger_cnt, self.recorder.rebuild_cnt, self.recorder.rebuild_forced_cnt)
+            if self.sqc_method == SequencingMethod.GurobiOptimizer:
+                sim_config[-1]+= "\nGurobi: {} formulation, model reuse: {}{}, set-up: {}s, optimizer: {}s".format(
+                    self.central_scheduler.solver_options['formulation'], self.central_scheduler.reuse_model,
+                    " ({} models by machine set)".format(self.central_scheduler.grb_model_cnt) if self.central_scheduler.reuse_model else "",
+                    round(self.recorder.opt_setup_T, 2), round(self.recorder.opt_solver_T, 2))
+            elif self.sqc_method == SequencingMethod.TabuSearch:
+                sim_config[-1]+= "\nTabu search: {neighborhood} neighborhood, tenure: {tenure}, max. steps: {max_iter}".format(
+                    **self.central_scheduler.solver_options)
         else:
             sim_config[-1]+= "\nWall Time: {}s".format(round(time.time()-self.program_start_T,2))
-        # print to console
-        self.logger.info('Problem/Simulation Configurations:\n{}\n'.format(
+        # print to console, the report is kept even if per-event messages are silenced by quiet mode
+        report_level = max(INFO, self.logger.getEffectiveLevel())
+        self.logger.log(report_level, 'Problem/Simulation Configurations:\n{}\n'.format(
             tabulate([header, m_config, j_config, sqc_config, sim_config],
                     headers="firstrow", tablefmt="grid")))
         # performance metrics
-        cum_tard = sum(self.recorder.j_tardiness_dict.values())
-        max_tard = max(self.recorder.j_tardiness_dict.values())
-        cum_flow = sum(self.recorder.j_flowtime_dict.values())
-        max_flow = max(self.recorder.j_flowtime_dict.values())
-        self.logger.info('Performance:\n{}\n'.format(tabulate(
+        tard, flow = self.recorder.tardiness_stat, self.recorder.flowtime_stat
+        self.logger.log(report_level, 'Performance:\n{}\n'.format(tabulate(
             [["Category", "value"],
-            ["Tardiness", "max: {}, mean: {}".format(round(max_tard,2), round(cum_tard / (self.j_idx), 2))],
-            ["Flowtime", "max: {}, mean: {}".format(round(max_flow,2), round(cum_flow / (self.j_idx), 2))]],
+            ["Tardiness", "max: {}, mean: {}, std: {}".format(round(tard.max,2), round(tard.sum / (self.j_idx), 2), round(tard.std,2))],
+            ["Flowtime", "max: {}, mean: {}, std: {}".format(round(flow.max,2), round(flow.sum / (self.j_idx), 2), round(flow.std,2))]],
             headers="firstrow", tablefmt="grid")))
+        # time spent in the hot phases, the profile is written next to the log file
+        if self.profiler is not None:
+            log_dir = Path(self.logger.handlers[0].baseFilename).parent
+            self.profiler.dump(log_dir / "profile.json", log_dir / "profile.folded")
+            self.logger.log(report_level, 'Profile (wall time: {}s), saved to {}:\n{}\n'.format(
+                round(self.profiler.wall_T, 3), log_dir / "profile.json", self.profiler.summary()))
 
 
-    def build_sqc_experience_repository(self, m_list): # build two dictionaries
+    def build_sqc_experience_repository(self, m_list, capacity:int, state_spec:dict):
         self.incomplete_experience = {}
-        self.rep_memo = {}
-        for m in m_list: # each machine will have a list in the dictionaries
-            self.incomplete_experience[m.m_idx] = {} # used for storing s0 and a0
-            self.rep_memo[m.m_idx] = [] # after transition, store r0 and s1, complete the experience
+        self.reward_record = {}
+        for m in m_list: # each machine will have a dictionary of decisions waiting for transition
+            self.incomplete_experience[m.m_idx] = {} # used for storing s0 and a0, keyed by decision time
+            self.reward_record[m.m_idx] = [[], []]
+        # after transition, r0 and s1 complete the experience, which is stored in a replay memory shared by all machines
+        self.rep_memo = ReplayMemory(capacity, state_spec)
 
 
-    def complete_experience(self, m_idx, decision_point, r_t): # turn incomplete experience to complete experience
-        self.incomplete_experience[m_idx][decision_point] += [r_t]
-        complete_exp = self.incomplete_experience[m_idx].pop(decision_point)
-        self.rep_memo[m_idx].append(complete_exp)
+    def complete_experience(self, m_idx, decision_point, r_t, s_t, done:bool = False): # turn incomplete experience to complete experience
+        s_0, a_0 = self.incomplete_experience[m_idx].pop(decision_point)
+        self.rep_memo.add(s_0, a_0, r_t, s_t, done)
         self.reward_record[m_idx][0].append(self.env.now)
         self.reward_record[m_idx][1].append(r_t)
 
@@ -274,15 +356,71 @@ class Recorder:
         self.opt_time_expense = 0
         # count occurance of sequencing decisions
         self.sqc_cnt_opt = self.sqc_cnt_SI = self.sqc_cnt_reactive = self.sqc_cnt_passive = 0
+        # number of calls to the optimizer of central scheduler, and the problems found / not found in its cache
+        self.opt_cnt = self.opt_cache_hit = self.opt_cache_miss = 0
+        # schedule rebuilds of central scheduler, the events that requested one, and the rebuilds forced by a machine out of schedule
+        self.rebuild_cnt = self.rebuild_trigger_cnt = self.rebuild_forced_cnt = 0
+        # seconds of Gurobi calls spent on setting up the environment and model, and in the optimizer
+        self.opt_setup_T = self.opt_solver_T = 0
         # record the job's journey
         self.in_system_jobs:Dict[int, Job] = {}
+        self.job_table = JobTable(kwargs['m_no'])
         self.j_operation_dict = {}
         self.j_tardiness_dict = {}
         self.j_flowtime_dict = {}
         self.m_bkd_dict = {idx: [] for idx in range(kwargs['m_no'])}
+        # running aggregates of the KPIs, kept in both modes
+        self.tardiness_stat = RunningStat()
+        self.flowtime_stat = RunningStat()
+        # in streaming mode ("record_file" specified), the records are written to file in chunks instead of the dictionaries above
+        self.store = RecordStore(kwargs['record_file'], kwargs.get('record_chunk', 65536)) if kwargs.get('record_file') else None
         self.m_cum_runtime_dict = {}
         self.pt_mean_dict = {}
         self.pt_std_dict = {}
         self.expected_tardiness_dict = {}
         # performance metric
         self.cumulative_tardiness = 0
+        # machines waiting for the action of external agent, in the order of requests
+        self.pending_decisions:Deque[int] = deque()
+        # optional ring buffer of the most recent events, None if not required
+        self.trace = EventTrace(kwargs['trace_capacity']) if kwargs.get('trace_capacity') else None
+
+
+    def record_job(self, job:Job, tardiness:float, flowtime:float):
+        self.tardiness_stat.update(tardiness)
+        self.flowtime_stat.update(flowtime)
+        if self.store is None:
+            self.j_operation_dict[job.j_idx] = job.operation_record
+            self.j_tardiness_dict[job.j_idx] = tardiness
+            self.j_flowtime_dict[job.j_idx] = flowtime
+        else:
+            self.store.operations.extend(job.operation_columns())
+            self.store.jobs.append(job.j_idx, tardiness, flowtime, job.env.now)
+
+
+    def record_breakdown(self, m_idx:int, begin:float, end:float):
+        if self.store is None:
+            self.m_bkd_dict[m_idx].append([begin, end])
+        else:
+            self.store.breakdowns.append(m_idx, begin, end)
+
+
+    def close_store(self):
+        if self.store is not None:
+            self.store.close()
+
+
+    # operation history of jobs and breakdown history of machines, read back from file in streaming mode
+    def operation_records(self, j_idx:Optional[List[int]] = None) -> Dict[int, list]:
+        return self.j_operation_dict if self.store is None else self.store.read_operations(j_idx)
+
+
+    def breakdown_records(self) -> Dict[int, list]:
+        return self.m_bkd_dict if self.store is None else self.store.read_breakdowns(self.m_no)
+
+
+    def dump_trace(self, logger:Logger):
+        if self.trace is None:
+            return
+        path = self.trace.dump(Path(logger.handlers[0].baseFilename).parent / "event_trace.tsv")
+        logger.error(f"Last {len(self.trace)} events are dumped to {path}")
@@ -1,54 +1,185 @@
 """
 This is the job class, carries the information such as operation trajectory, processing time, due date, etc.
+The trajectory, processing time and operation record of all jobs in system are kept in a shop-wide columnar JobTable,
+a Job instance is a lightweight view over its row in the table
 """
 
-from dataclasses import dataclass
-from logging import Logger
+from logging import Logger, INFO
 import numpy as np
 from simpy import Environment
-from typing import Optional, Union, Literal, Any
+from typing import Optional, Union, Literal, Any, List
+from .trace import EV_JOB_CREATED, EV_JOB_COMPLETED
+
+
+class JobTable:
+    '''
+    Columnar storage of jobs' route, expected/actual processing time and operation record, one row per job in system.
+    The row of a job is recycled after its completion, so the size of table is bounded by the work-in-process, not the length of simulation.
+    '''
+    def __init__(self, m_no:int, capacity:int = 64):
+        self.m_no = m_no
+        self.capacity = 0
+        # rows that are free to use, and the job view that occupies each row
+        self.free_rows:List[int] = []
+        self.views:List[Optional["Job"]] = []
+        self.trajectory = np.zeros((0, m_no), dtype=np.int64) # machine index of each operation
+        self.pt_by_m_idx = np.zeros((0, m_no), dtype=np.int64) # expected processing time, indexed by machine
+        self.pt = np.zeros((0, m_no), dtype=np.int64) # expected processing time, indexed by operation
+        self.work = np.zeros((0, m_no), dtype=np.int64) # expected processing time of the remaining operations, from each operation
+        self.actual_pt = np.zeros((0, m_no), dtype=np.float64) # actual processing time, indexed by operation
+        self.op_begin_T = np.zeros((0, m_no), dtype=np.float64) # begin time of operations that have been processed
+        self.op_wait = np.zeros((0, m_no), dtype=np.float64) # queuing time before operations that have been processed
+        self.cursor = np.zeros(0, dtype=np.int64) # index of the current operation
+        self.grow(capacity)
+
+
+    def grow(self, capacity:int):
+        # enlarge all columns, and re-bind the row views of jobs in system to the new columns
+        for name in ('trajectory', 'pt_by_m_idx', 'pt', 'work', 'actual_pt', 'op_begin_T', 'op_wait', 'cursor'):
+            column = getattr(self, name)
+            new_column = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            new_column[:self.capacity] = column
+            setattr(self, name, new_column)
+        self.free_rows.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.views.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+        for job in self.views:
+            if job is not None:
+                job.bind()
+
+
+    def allocate(self, job:"Job") -> int:
+        if not self.free_rows:
+            self.grow(self.capacity * 2)
+        row = self.free_rows.pop()
+        self.views[row] = job
+        self.cursor[row] = 0
+        return row
+
+
+    def release(self, row:int):
+        self.views[row] = None
+        self.free_rows.append(row)
 
 
-@dataclass
 class Job:
-    env: Environment
-    logger: Logger
-    recorder: Any
-    rng: np.random.default_rng
-    j_idx: int
-    trajectory: np.array
-    pt_by_m_idx: np.array
-    pt_range: list[Union[int, float]]
-    pt_cv: Union[int, float]
-    due_tightness: float
-    status: Literal["queuing", "processing", "completed"] = "queuing"
-    transfer_t: float = 0
- 
-
-    # create additional attributes after initialization
-    def __post_init__(self):
+    __slots__ = ('env', 'logger', 'recorder', 'rng', 'j_idx', 'pt_range', 'pt_cv', 'due_tightness', 'status', 'transfer_t',
+                 'creation_T', 'arrival_T', 'available_T', 'due', 'tardiness',
+                 'table', 'row', 'op', '_trajectory', '_pt', '_actual_pt')
+
+    def __init__(self, env:Environment, logger:Logger, recorder:Any, rng:np.random.Generator, j_idx:int,
+                 trajectory:np.ndarray, pt_by_m_idx:np.ndarray, pt_range:list[Union[int, float]], pt_cv:Union[int, float], due_tightness:float,
+                 status:Literal["queuing", "processing", "completed"] = "queuing", transfer_t:float = 0,
+                 actual_pt:Optional[np.ndarray] = None, due:Optional[float] = None):
+        # actual pt (by operation) and due date are drawn here, unless they are pre-sampled in a scenario
+        self.env, self.logger, self.recorder, self.rng = env, logger, recorder, rng
+        self.j_idx = j_idx
+        self.pt_range, self.pt_cv, self.due_tightness = pt_range, pt_cv, due_tightness
+        self.status = status
+        self.transfer_t = transfer_t
         # new intrinsic attributes
         self.creation_T = self.arrival_T = self.env.now
         self.available_T = self.env.now
+        # take a row from the shop-wide job table
+        self.table:JobTable = recorder.job_table
+        self.row = self.table.allocate(self)
+        self.op = 0 # index of current operation, mirrored to the cursor column
+        self.table.trajectory[self.row] = trajectory
+        self.table.pt_by_m_idx[self.row] = pt_by_m_idx
         # re-order the processing time by the operatrions
-        _pt_by_ops = self.pt_by_m_idx[self.trajectory]
-        if self.pt_cv == 0:
-            self.remaining_pt = list(_pt_by_ops)
-            self.actual_remaining_pt = list(_pt_by_ops) # a stack of actual processing time, equals expected pt
+        _pt_by_ops = pt_by_m_idx[trajectory]
+        self.table.pt[self.row] = _pt_by_ops
+        self.table.work[self.row] = _pt_by_ops[::-1].cumsum()[::-1]
+        if actual_pt is not None:
+            self.table.actual_pt[self.row] = actual_pt
+        elif self.pt_cv == 0:
+            self.table.actual_pt[self.row] = _pt_by_ops # actual processing time equals expected pt
         else:
-            self.remaining_pt = list(_pt_by_ops)
-            _actual_pt = np.around(self.rng.normal(_pt_by_ops, _pt_by_ops*self.pt_cv), decimals=1).clip(*self.pt_range)
-            self.actual_remaining_pt = list(_actual_pt) # a stack of actual processing time, different from expected pt
-        # a stack of machine indices
-        self.remaining_machines = list(self.trajectory) # a stack of machine index that job needs to visit
-        # zip remaining machines, expected pt, and actual pt
-        self.remaining_operations = list(zip(self.remaining_machines, self.remaining_pt, self.actual_remaining_pt))
+            self.table.actual_pt[self.row] = np.around(self.rng.normal(_pt_by_ops, _pt_by_ops*self.pt_cv), decimals=1).clip(*self.pt_range)
+        self.bind()
         # produce due date for job, which is proportional to the total processing time
-        self.due = np.round(self.pt_by_m_idx.sum() * self.rng.uniform(1.2, self.due_tightness) + self.env.now)
-        # data recording
-        self.operation_record = []
-        self.logger.info("{} > Job {} created, trajectory: {}, exp.pt: {}, actual pt: {}, due: {}".format(
-            self.env.now, self.j_idx, self.trajectory, [float(x) for x in self.remaining_pt], [float(x) for x in self.actual_remaining_pt], self.due))
+        if due is not None:
+            self.due = due
+        else:
+            self.due = np.round(pt_by_m_idx.sum() * self.rng.uniform(1.2, self.due_tightness) + self.env.now)
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_JOB_CREATED, -1, self.j_idx))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > Job {} created, trajectory: {}, exp.pt: {}, actual pt: {}, due: {}".format(
+                self.env.now, self.j_idx, self.trajectory, [float(x) for x in self.remaining_pt], [float(x) for x in self.actual_remaining_pt], self.due))
+
+
+    # cache the views of this job's row in the table columns
+    def bind(self):
+        self._trajectory = self.table.trajectory[self.row]
+        self._pt = self.table.pt[self.row]
+        self._actual_pt = self.table.actual_pt[self.row]
+
+
+    '''
+    Read-only views of the route and processing time, sliced from current operation
+    '''
+    @property
+    def trajectory(self) -> np.ndarray:
+        return self._trajectory
+
+    @property
+    def pt_by_m_idx(self) -> np.ndarray:
+        return self.table.pt_by_m_idx[self.row]
+
+    @property
+    def remaining_machines(self) -> np.ndarray:
+        return self._trajectory[self.op:]
+
+    @property
+    def remaining_pt(self) -> np.ndarray:
+        return self._pt[self.op:]
+
+    @property
+    def actual_remaining_pt(self) -> np.ndarray:
+        return self._actual_pt[self.op:]
+
+    @property
+    def remaining_operations(self) -> list:
+        return list(zip(self.remaining_machines, self.remaining_pt, self.actual_remaining_pt))
+
+    @property
+    def remaining_work(self):
+        # sum of remaining_pt, kept in the table
+        return self.table.work[self.row, self.op]
+
+    @property
+    def total_work(self):
+        return self.table.work[self.row, 0]
+
+    @property
+    def remaining_op_no(self) -> int:
+        return self.table.m_no - self.op
+
+    # expected and actual processing time of current operation
+    @property
+    def current_pt(self):
+        return self._pt[self.op]
+
+    @property
+    def current_actual_pt(self):
+        return self._actual_pt[self.op]
+
+    @property
+    def operation_record(self) -> list:
+        # operations that have been picked by machines, as [m_idx, begin time, actual pt, wait]
+        recorded = self.op + 1 if self.status != "queuing" else self.op
+        return [list(x) for x in zip(
+            self._trajectory[:recorded].tolist(), self.table.op_begin_T[self.row, :recorded].tolist(),
+            self._actual_pt[:recorded].tolist(), self.table.op_wait[self.row, :recorded].tolist())]
+
+
+    def operation_columns(self) -> dict:
+        # same as operation_record, by column, written to file by the recorder in streaming mode
+        recorded = self.op + 1 if self.status != "queuing" else self.op
+        return {'j_idx': np.full(recorded, self.j_idx), 'm_idx': self._trajectory[:recorded],
+                'begin_T': self.table.op_begin_T[self.row, :recorded], 'actual_pt': self._actual_pt[:recorded],
+                'wait': self.table.op_wait[self.row, :recorded]}
 
 
     def after_arrival(self):
@@ -58,54 +189,53 @@ class Job:
     # after the job is picked for processing
     def after_decision(self, m_idx, wait):
         # the information recorded would use actual value, NOT expected value
-        self.record_operation(m_idx, self.env.now, self.actual_remaining_pt[0], wait)
+        self.record_operation(m_idx, self.env.now, self._actual_pt[self.op], wait)
         # update status
         self.status = 'processing'
         # the expected availabe time
-        self.available_T = self.env.now + self.remaining_pt[0]
+        self.available_T = self.env.now + self._pt[self.op]
 
 
     # update the information, get ready for transfer or exit
     def after_operation(self, *args):
         # if job is not completed
-        if len(self.remaining_operations) > 1:
+        if self.op < self.table.m_no - 1:
             self.status = "queuing"
-            # pop current operation tuple
-            self.remaining_operations.pop(0)
-            # and individual lists
-            self.remaining_machines.pop(0)
-            self.remaining_pt.pop(0)
-            self.actual_remaining_pt.pop(0)
+            # move the cursor to next operation
+            self.op += 1
+            self.table.cursor[self.row] = self.op
             # retrieve machine index from next operation
-            _next_m = self.remaining_machines[0]
-            return _next_m
+            return self._trajectory[self.op]
         else:
             self.status = "completed"
             self.completion()
             return -1
 
 
-    def record_operation(self, *args):
-        self.operation_record.append([*args])
+    def record_operation(self, m_idx, begin_T, actual_pt, wait):
+        # machine index and actual pt are already in the table
+        self.table.op_begin_T[self.row, self.op] = begin_T
+        self.table.op_wait[self.row, self.op] = wait
 
 
     # all operations are complete and exit the system
     def completion(self):
         # append the operation histroy to the recorder
-        self.recorder.j_operation_dict[self.j_idx] = self.operation_record
-        self.recorder.j_tardiness_dict[self.j_idx] = max(0, self.env.now - self.due)
-        self.recorder.j_flowtime_dict[self.j_idx] = self.env.now - self.creation_T
+        self.recorder.record_job(self, max(0, self.env.now - self.due), self.env.now - self.creation_T)
         self.recorder.last_job_comp_T = self.env.now
         self.recorder.in_system_jobs.pop(self.j_idx)
-        self.logger.info("{} > END: Job {} completed".format(self.env.now, self.j_idx))
+        self.table.release(self.row)
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_JOB_COMPLETED, -1, self.j_idx))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > END: Job {} completed".format(self.env.now, self.j_idx))
         self.tardiness = self.env.now - self.due
 
-    
+
     def overstay(self):
-        self.recorder.j_operation_dict[self.j_idx] = self.operation_record
-        self.recorder.j_tardiness_dict[self.j_idx] = max(0, self.env.now - self.due)
-        self.recorder.j_flowtime_dict[self.j_idx] = self.env.now - self.creation_T
+        self.recorder.record_job(self, max(0, self.env.now - self.due), self.env.now - self.creation_T)
         self.recorder.last_job_comp_T = self.env.now
         self.recorder.in_system_jobs.pop(self.j_idx)
+        self.table.release(self.row)
         self.logger.warning("{} > Job {} is removed from system due to over-stay!".format(self.env.now, self.j_idx))
         self.tardiness = self.env.now - self.due
@@ -0,0 +1,84 @@
+'''
+Queues of jobs waiting in front of a machine
+The machine picks the implementation by its sequencing rule (see Machine.initialization):
+    JobQueue: plain list in arrival order, the rule scans the whole queue (and its feature arrays) on every decision
+    HeapJobQueue: binary heap ordered by the static priority key that the rule declares, decision and removal take O(log n)
+Both pick the same job, ties are broken by the arrival order
+'''
+# standard imports
+from heapq import heappush, heappop
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+# project modules
+from ..scheduler.queue_features import QueueFeatures
+
+
+class JobQueue(list):
+    def __init__(self, env:Any):
+        super().__init__()
+        # feature arrays of queuing jobs, aligned with the queue and read by sequencing rules
+        self.features:Optional[QueueFeatures] = QueueFeatures(env)
+
+
+    def append(self, job:Any):
+        super().append(job)
+        self.features.push(job)
+
+
+    def pop(self, pos:int = -1) -> Any:
+        self.features.pop(pos)
+        return super().pop(pos)
+
+
+    def select(self, rule:Callable, **context) -> int:
+        # position of the picked job in queue, counted from the front
+        # the job stays in queue during its operation and new arrivals are appended, so a position from the end (LIFO) would shift
+        # context (e.g. the deciding machine) is passed to the rule as keywords
+        pos = rule(jobs = self, features = self.features, **context)
+        return pos if pos >= 0 else pos + len(self)
+
+
+class HeapJobQueue:
+    def __init__(self, priority_key:Callable[[Any, int], Any]):
+        # heap of (priority, arrival order, job), smallest priority is picked first
+        self.priority_key = priority_key
+        self.heap:List[Tuple[Any, int, Any]] = []
+        self.arrival_cnt = 0
+        # the picked job leaves the heap at decision, but stays in queue until its operation is done (same as JobQueue)
+        # otherwise a job arriving during the operation could take its place on the top of heap
+        self.picked:Optional[Tuple[Any, int, Any]] = None
+        self.features:Optional[QueueFeatures] = None
+
+
+    def __len__(self) -> int:
+        return len(self.heap) + (self.picked is not None)
+
+
+    def __iter__(self) -> Iterator[Any]:
+        # in arrival order, same as JobQueue
+        entries = self.heap + [self.picked] if self.picked is not None else self.heap
+        return (entry[2] for entry in sorted(entries, key = lambda entry: entry[1]))
+
+
+    def __getitem__(self, pos:int) -> Any:
+        # only the picked job, i.e. the top of heap at decision, can be accessed by position
+        if pos != 0:
+            raise IndexError(f"HeapJobQueue only exposes the picked job, got position {pos}")
+        if self.picked is None:
+            self.picked = heappop(self.heap)
+        return self.picked[2]
+
+
+    def append(self, job:Any):
+        heappush(self.heap, (self.priority_key(job, self.arrival_cnt), self.arrival_cnt, job))
+        self.arrival_cnt += 1
+
+
+    def pop(self, pos:int = 0) -> Any:
+        job = self[pos]
+        self.picked = None
+        return job
+
+
+    def select(self, rule:Callable, **context) -> int:
+        # the top of heap is always the job that the rule would pick
+        return 0
@@ -0,0 +1,355 @@
+'''
+Array-backed discrete event kernel, an alternative to simpy for rule-based sequencing
+Every simpy process of the simulation (job creation, machine breakdown, machine production and its idle/breakdown sub-processes)
+is unrolled into a small state machine, and every "yield" becomes a flat (time, priority, eid, kind, m_idx, j_idx) tuple on a binary heap.
+The priorities and the insertion counter follow simpy's own scheduling rules, so ties are broken the same way
+and a run reproduces the simpy path event by event for the same seed.
+'''
+# standard imports
+from heapq import heappush, heappop
+from logging import DEBUG, INFO
+import numpy as np
+import time
+from typing import List, Tuple, Union
+# project modules
+from .exc import *
+from .event import Narrator
+from .job import Job
+from .machine import Machine
+from .trace import *
+
+
+# event priority, identical to simpy.events.URGENT and simpy.events.NORMAL
+URGENT, NORMAL = 0, 1
+# kinds of events on the heap
+(JOB_CREATION_START, JOB_CREATION, JOB_RELEASE,
+ BKD_CYCLE, BKD_MTBF, BKD_BEGIN, BKD_END,
+ M_START, M_OP_DONE, M_LOOP, M_IDLE_START, M_STOCK, M_IDLE_DONE, M_BKD_START, M_REPAIRED, M_BKD_DONE, M_DECIDED) = range(17)
+# where a machine resumes after an idle or breakdown sub-process returns
+AFTER_START, AFTER_LOOP_TOP, AFTER_OPERATION, AFTER_IDLE = range(4)
+
+
+class HeapSignal:
+    '''
+    Stand-in for a simpy event that at most one process waits on.
+    Triggering a signal puts an event on the heap only if a process is waiting for it.
+    '''
+    __slots__ = ('env', 'kind', 'm_idx', 'triggered', 'waiting')
+
+    def __init__(self, env, kind:int = -1, m_idx:int = -1):
+        self.env = env
+        self.kind = kind
+        self.m_idx = m_idx
+        self.triggered = False
+        self.waiting = False
+
+    def succeed(self):
+        self.triggered = True
+        if self.waiting:
+            self.env.schedule(0, NORMAL, self.kind, self.m_idx)
+
+
+class HeapEnvironment:
+    '''
+    The event heap, exposes the same "now" and "run" interface of simpy.Environment to Job, Machine and Shopfloor
+    '''
+    def __init__(self):
+        self.now = 0
+        self.event_cnt = 0
+        self._queue:List[Tuple] = []
+        self._eid = 0
+        self._handlers = []
+
+
+    def bind(self, handlers:list):
+        # handlers are indexed by the kind of event
+        self._handlers = handlers
+
+
+    def event(self, kind:int = -1, m_idx:int = -1) -> HeapSignal:
+        return HeapSignal(self, kind, m_idx)
+
+
+    def schedule(self, delay, priority:int, kind:int, m_idx:int = -1, j_idx:int = -1):
+        # same arithmetic as simpy, to make sure the time of events are identical in floating point
+        heappush(self._queue, (self.now + delay, priority, self._eid, kind, m_idx, j_idx))
+        self._eid += 1
+
+
+    def peek(self) -> Union[int, float]:
+        # time of the next event, infinity if there is none (same as simpy.Environment.peek)
+        return self._queue[0][0] if self._queue else float('inf')
+
+
+    def step(self):
+        # process the next event
+        self.now, _, _, kind, m_idx, j_idx = heappop(self._queue)
+        self._handlers[kind](m_idx, j_idx)
+        self.event_cnt += 1
+
+
+    def run(self, until):
+        queue = self._queue
+        handlers = self._handlers
+        # events on the [until] time are never processed, same as simpy
+        while queue and queue[0][0] < until:
+            self.now, _, _, kind, m_idx, j_idx = heappop(queue)
+            handlers[kind](m_idx, j_idx)
+            self.event_cnt += 1
+
+
+class HeapMachine(Machine):
+    def initialization(self, **kwargs):
+        # let all machines know each other so they can pass the jobs around
+        self.m_list = kwargs['machine_list']
+        self.job_sequencing = kwargs['sqc_method']
+        self.schedule_mode = False
+        if self.job_sequencing.__name__ == "draw_from_schedule":
+            raise InvalidRequestError("Heap engine only supports rule-based sequencing, use the simpy engine for central scheduler")
+        self.agent_mode = self.job_sequencing.__name__ == "DRL_scheduler"
+        self.build_queue()
+        # activate the production (Initialize event of the simpy process)
+        self.env.schedule(0, URGENT, M_START, self.m_idx)
+
+
+    def act(self, pos:int):
+        # resume the decision with the position of picked job, same timing as succeeding the simpy event
+        self.env.schedule(0, NORMAL, M_DECIDED, self.m_idx, pos)
+
+
+class HeapNarrator(Narrator):
+    '''
+    Drives the job creation, machine breakdown and machine production on the event heap.
+    Each handler below corresponds to the code between two "yield" statements of the simpy generators.
+    '''
+    def __init__(self, **kwargs):
+        self.env:HeapEnvironment = kwargs['env']
+        # per-machine breakdown state, preallocated
+        m_no = len(kwargs['m_list'])
+        self.bkd_t = [0] * m_no
+        self.bkd_actual_begin = [0] * m_no
+        self.bkd_actual_end = [0] * m_no
+        self.bkd_start = [0] * m_no
+        # where each machine resumes after its idle/breakdown sub-process
+        self.m_resume_after_idle = [AFTER_START] * m_no
+        self.m_resume_after_bkd = [AFTER_LOOP_TOP] * m_no
+        self.env.bind([
+            self.job_creation_start, self.job_creation, self.job_release,
+            self.bkd_cycle, self.bkd_mtbf, self.bkd_begin, self.bkd_end,
+            self.m_start, self.m_op_done, self.m_loop, self.m_idle_start, self.m_stock, self.m_idle_done,
+            self.m_bkd_start, self.m_repaired, self.m_bkd_done, self.m_decided])
+        super().__init__(**kwargs)
+
+
+    def launch_job_creation(self):
+        self.env.schedule(0, URGENT, JOB_CREATION_START)
+
+
+    def launch_machine_breakdown(self, m_instance:Machine):
+        self.env.schedule(0, URGENT, BKD_CYCLE, m_instance.m_idx)
+
+
+    '''
+    PART I: job creation, see Narrator.process_job_creation
+    '''
+    def job_creation_start(self, m_idx, j_idx):
+        self.program_start_T = time.time()
+        self.trajectory_seed = np.arange(self.m_no)
+        if self.j_idx < self.total_no:
+            self.env.schedule(self.arrival_interval[self.j_idx], NORMAL, JOB_CREATION)
+
+
+    def job_creation(self, m_idx, j_idx):
+        job_instance = self.create_job()
+        self.env.schedule(0, NORMAL, JOB_RELEASE, j_idx = job_instance.j_idx)
+
+
+    def job_release(self, m_idx, j_idx):
+        self.release_job(self.recorder.in_system_jobs[j_idx])
+        if self.j_idx < self.total_no:
+            self.env.schedule(self.arrival_interval[self.j_idx], NORMAL, JOB_CREATION)
+
+
+    '''
+    PART II: machine breakdown, see Narrator.process_machine_breakdown
+    '''
+    def bkd_cycle(self, m_idx, j_idx):
+        if self.env.now < self.span:
+            MTBF_interval, self.bkd_t[m_idx] = self.draw_breakdown(m_idx, self.random_MTBF, self.random_MTTR)
+            self.env.schedule(MTBF_interval, NORMAL, BKD_MTBF, m_idx)
+
+
+    def bkd_mtbf(self, m_idx, j_idx):
+        now = self.env.now
+        actual_begin = max(self.m_list[m_idx].hidden_release_T, now)
+        self.bkd_actual_begin[m_idx] = actual_begin
+        self.bkd_actual_end[m_idx] = actual_begin + self.bkd_t[m_idx]
+        self.env.schedule(actual_begin - now, NORMAL, BKD_BEGIN, m_idx)
+
+
+    def bkd_begin(self, m_idx, j_idx):
+        m_instance = self.m_list[m_idx]
+        actual_begin = self.bkd_actual_begin[m_idx]
+        # when we reach the actual breakdown time, switch off machine
+        m_instance.working_event = self.env.event(M_REPAIRED, m_idx)
+        m_instance.release_T = actual_begin + self.MTTR
+        m_instance.status = "down"
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_BKD_BEGIN, m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info(f"{self.env.now} > BKD start: Machine {m_idx} will be down for {self.bkd_t[m_idx]}, till {actual_begin + self.MTTR}")
+        self.env.schedule(self.bkd_actual_end[m_idx] - self.env.now, NORMAL, BKD_END, m_idx)
+
+
+    def bkd_end(self, m_idx, j_idx):
+        self.recorder.record_breakdown(m_idx, self.bkd_actual_begin[m_idx], self.bkd_actual_end[m_idx])
+        self.m_list[m_idx].working_event.succeed()
+        self.bkd_cycle(m_idx, j_idx)
+
+
+    '''
+    PART III: machine production, see Machine.process_production, process_idle and process_breakdown
+    '''
+    def m_start(self, m_idx, j_idx):
+        if len(self.m_list[m_idx].queue) < 1:
+            self.start_idle(m_idx, AFTER_START)
+        else:
+            self.m_loop(m_idx, j_idx)
+
+
+    # the top of the production loop
+    def m_loop(self, m_idx, j_idx):
+        if not self.m_list[m_idx].working_event.triggered:
+            self.start_breakdown(m_idx, AFTER_LOOP_TOP)
+        else:
+            self.m_decision(m_idx)
+
+
+    def m_decision(self, m_idx):
+        m = self.m_list[m_idx]
+        m.decision_T = self.env.now
+        if m.agent_mode and len(m.queue) > 1:
+            # wait for the action of external agent, see HeapMachine.act and m_decided
+            self.recorder.pending_decisions.append(m_idx)
+            return
+        if len(m.queue) > 1:
+            m.sqc_decision_pos = m.queue.select(m.job_sequencing, machine = m)
+            self.recorder.sqc_cnt_reactive += 1
+            _decision_type = 'Reactive'
+        else:
+            m.sqc_decision_pos = 0
+            self.recorder.sqc_cnt_passive += 1
+            _decision_type = 'Passive'
+        self.m_process(m, _decision_type)
+
+
+    # the action of external agent is carried by the j_idx slot of event
+    def m_decided(self, m_idx, pos):
+        self.m_list[m_idx].sqc_decision_pos = pos
+        self.recorder.sqc_cnt_reactive += 1
+        self.m_process(self.m_list[m_idx], 'Agent')
+
+
+    def m_process(self, m:HeapMachine, _decision_type:str):
+        m_idx = m.m_idx
+        m.picked_j_instance = m.queue[m.sqc_decision_pos]
+        m.status = "processing"
+        actual_pt = m.after_decision()
+        if self.logger.isEnabledFor(DEBUG):
+            self.logger.debug("{} > {}. Machine {} process Job {}, expected PT: {}, actual: {}".format(
+                self.env.now, _decision_type, m_idx, m.picked_j_instance.j_idx,
+                m.picked_j_instance.remaining_operations[0][1], actual_pt))
+        self.env.schedule(actual_pt, NORMAL, M_OP_DONE, m_idx)
+
+
+    def m_op_done(self, m_idx, j_idx):
+        m = self.m_list[m_idx]
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_OP_END, m_idx, m.picked_j_instance.j_idx))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > OUT: Job {} left Machine {}".format(self.env.now, m.picked_j_instance.j_idx, m_idx))
+        m.after_operation()
+        if not m.working_event.triggered:
+            self.start_breakdown(m_idx, AFTER_OPERATION)
+        else:
+            self.m_check_stock(m_idx)
+
+
+    def m_check_stock(self, m_idx):
+        m = self.m_list[m_idx]
+        if len(m.queue) == 0:
+            m.status = "idle"
+            self.start_idle(m_idx, AFTER_OPERATION)
+        else:
+            self.env.schedule(0, NORMAL, M_LOOP, m_idx)
+
+
+    # idle sub-process
+    def start_idle(self, m_idx, resume_at):
+        self.m_resume_after_idle[m_idx] = resume_at
+        self.env.schedule(0, URGENT, M_IDLE_START, m_idx)
+
+
+    def m_idle_start(self, m_idx, j_idx):
+        m = self.m_list[m_idx]
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_IDLE_BEGIN, m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > IDL on: Machine {} became idle".format(self.env.now, m_idx))
+        m.sufficient_stock = self.env.event(M_STOCK, m_idx)
+        m.sufficient_stock.waiting = True
+
+
+    def m_stock(self, m_idx, j_idx):
+        if not self.m_list[m_idx].working_event.triggered:
+            self.start_breakdown(m_idx, AFTER_IDLE)
+        else:
+            self.finish_idle(m_idx)
+
+
+    def finish_idle(self, m_idx):
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_IDLE_END, m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > IDL off: Machine {} replenished".format(self.env.now, m_idx))
+        self.env.schedule(0, NORMAL, M_IDLE_DONE, m_idx)
+
+
+    def m_idle_done(self, m_idx, j_idx):
+        if self.m_resume_after_idle[m_idx] == AFTER_START:
+            self.m_loop(m_idx, j_idx)
+        else:
+            self.env.schedule(0, NORMAL, M_LOOP, m_idx)
+
+
+    # breakdown sub-process
+    def start_breakdown(self, m_idx, resume_at):
+        self.m_resume_after_bkd[m_idx] = resume_at
+        self.env.schedule(0, URGENT, M_BKD_START, m_idx)
+
+
+    def m_bkd_start(self, m_idx, j_idx):
+        self.bkd_start[m_idx] = self.env.now
+        self.m_list[m_idx].working_event.waiting = True
+
+
+    def m_repaired(self, m_idx, j_idx):
+        m = self.m_list[m_idx]
+        start = self.bkd_start[m_idx]
+        if self.recorder.store is None:
+            m.breakdown_record.append([(m_idx, start, self.env.now - start)])
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_BKD_END, m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info(f"{self.env.now} > BKD end: Machine {m_idx} repaired, delayed the production for {self.env.now - start} units")
+        self.env.schedule(0, NORMAL, M_BKD_DONE, m_idx)
+
+
+    def m_bkd_done(self, m_idx, j_idx):
+        resume_at = self.m_resume_after_bkd[m_idx]
+        if resume_at == AFTER_LOOP_TOP:
+            self.m_decision(m_idx)
+        elif resume_at == AFTER_OPERATION:
+            self.m_check_stock(m_idx)
+        else:
+            self.finish_idle(m_idx)
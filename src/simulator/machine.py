@@ -5,12 +5,15 @@ The machine/sequencing agent would pick one job from its queue for the next oper
 Either by following a sequencing rule or a set of trained parameters
 '''
 # standard imports
+from logging import DEBUG, INFO
 import numpy as np
 import simpy
 from typing import Optional, List, Union, Literal, Any
 # project modules
 from .exc import *
 from .job import Job
+from .job_queue import JobQueue, HeapJobQueue
+from .trace import *
 from ..scheduler.sequencing_rule import *
 
 
@@ -25,8 +28,10 @@ class Machine:
         self.m_idx:int
         self.status: Literal["idle", "processing", "strategic_idle", "down"] = "idle"
         self.next_job_in_schedule = -1
+        # the machine drew its next job from the schedule and waits to begin it, see process_production
+        self.waiting_for_scheduled_job = False
         # Initialize the possible events during production
-        self.queue:List[Union[Job|None]] = []
+        self.queue:Union[JobQueue, HeapJobQueue] = JobQueue(self.env)
         self.sufficient_stock = self.env.event()
         # working condition in shut down or breakdown
         self.working_event = self.env.event()
@@ -54,10 +59,22 @@ class Machine:
         # [self.job_sequencing] is assigned by event.Narrator
         if self.job_sequencing.__name__ == "draw_from_schedule":
             self.schedule_mode = True
+        # or the decisions are made by an external agent (e.g. the DRL vector environment), see act
+        self.agent_mode = self.job_sequencing.__name__ == "DRL_scheduler"
+        self.build_queue()
         # activate the produciton
         self.production_proc = self.env.process(self.process_production())
 
 
+    # rules with static priority keep the queue in a heap, unless disabled by "heap_queue" = False
+    def build_queue(self):
+        priority_key = getattr(self.job_sequencing, 'priority_key', None)
+        if priority_key is not None and getattr(self, 'heap_queue', True):
+            self.queue = HeapJobQueue(priority_key)
+        else:
+            self.queue = JobQueue(self.env)
+
+
     # The main function, simulates the production
     def process_production(self):
         # at the begining of simulation, check the initial queue/stock level
@@ -80,9 +97,16 @@ class Machine:
                 # i.e. the next job that should be processed by this machine
                 # WARNING: a sequencing decision has been made, pop the first element from the schedule
                 self.next_job_in_schedule = self.job_sequencing(m_idx = self.m_idx)
+                # a rebuild before the operation begins replaces the drawn job by the head of new schedule
+                self.waiting_for_scheduled_job = True
                 # if the next scheduled job is NOT yet in queue, activate the strategic idleness process
                 self.check_strategic_idleness()
                 yield self.required_job_in_queue_event
+                # a rebuild between the arrival of job and the resumption of machine may have replaced it by a job not yet in queue
+                while self.next_job_in_schedule not in [j.j_idx for j in self.queue]:
+                    self.check_strategic_idleness()
+                    yield self.required_job_in_queue_event
+                self.waiting_for_scheduled_job = False
 
                 try:
                     # when scheduled job is in queue (with ot without strategic idleness)
@@ -92,11 +116,19 @@ class Machine:
                     raise SimulatorError(f"Machine {self.m_idx} trying to pick Job {self.next_job_in_schedule} that is not in queue!")
                 self.recorder.sqc_cnt_opt += 1
                 _decision_type = 'Scheduled'
-            # TYPE II: if sequencing strategy is reactive
+            # TYPE II: if an external agent makes the decision, wait for its action
+            elif self.agent_mode and len(self.queue) > 1:
+                self.decision_request = self.env.event()
+                self.recorder.pending_decisions.append(self.m_idx)
+                self.sqc_decision_pos = yield self.decision_request
+                self.picked_j_instance = self.queue[self.sqc_decision_pos]
+                self.recorder.sqc_cnt_reactive += 1
+                _decision_type = 'Agent'
+            # TYPE III: if sequencing strategy is reactive
             # and we have more than one queuing jobs, sequencing is required
             elif len(self.queue) > 1:
                 # the returned value is picked job's position in machine's queue
-                self.sqc_decision_pos = self.job_sequencing(jobs = self.queue)
+                self.sqc_decision_pos = self.queue.select(self.job_sequencing, machine = self)
                 self.picked_j_instance = self.queue[self.sqc_decision_pos]
                 self.recorder.sqc_cnt_reactive += 1
                 _decision_type = 'Reactive'
@@ -112,13 +144,17 @@ class Machine:
             # update job instance, and get the time of operation
             self.status = "processing"
             actual_pt = self.after_decision()
-            self.logger.debug("{} > {}. Machine {} process Job {}, expected PT: {}, actual: {}".format(
-                self.env.now, _decision_type, self.m_idx, self.picked_j_instance.j_idx, 
-                self.picked_j_instance.remaining_operations[0][1], actual_pt))
+            if self.logger.isEnabledFor(DEBUG):
+                self.logger.debug("{} > {}. Machine {} process Job {}, expected PT: {}, actual: {}".format(
+                    self.env.now, _decision_type, self.m_idx, self.picked_j_instance.j_idx, 
+                    self.picked_j_instance.remaining_operations[0][1], actual_pt))
             # The production process (yield the actual processing time of operation)
             yield self.env.timeout(actual_pt)
-            self.logger.info("{} > OUT: Job {} left Machine {}".format(
-                self.env.now, self.picked_j_instance.j_idx, self.m_idx))
+            if self.recorder.trace is not None:
+                self.recorder.trace.append((self.env.now, EV_OP_END, self.m_idx, self.picked_j_instance.j_idx))
+            if self.logger.isEnabledFor(INFO):
+                self.logger.info("{} > OUT: Job {} left Machine {}".format(
+                    self.env.now, self.picked_j_instance.j_idx, self.m_idx))
             """
             PART III: after operation, update information and check for machine breakdown and idleness
             """
@@ -134,9 +170,17 @@ class Machine:
             yield self.env.timeout(0)
     
 
+    # the action of external agent, position of the picked job in queue
+    def act(self, pos:int):
+        self.decision_request.succeed(pos)
+
+
     # when there's no job queueing, machine becomes idle
     def process_idle(self):
-        self.logger.info("{} > IDL on: Machine {} became idle".format(self.env.now, self.m_idx))
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_IDLE_BEGIN, self.m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > IDL on: Machine {} became idle".format(self.env.now, self.m_idx))
         # set the self.sufficient_stock event to untriggered
         self.sufficient_stock = self.env.event()
         # proceed only if the sufficient_stock event is triggered by new job arrival
@@ -144,7 +188,10 @@ class Machine:
         # check if the scheduled shutdown is triggered
         if not self.working_event.triggered:
             yield self.env.process(self.process_breakdown())
-        self.logger.info("{} > IDL off: Machine {} replenished".format(self.env.now, self.m_idx))
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_IDLE_END, self.m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info("{} > IDL off: Machine {} replenished".format(self.env.now, self.m_idx))
 
 
     # or when machine failure happens
@@ -152,22 +199,29 @@ class Machine:
         start = self.env.now
         # suspend the production here, untill the working_event is triggered
         yield self.working_event
-        self.breakdown_record.append([(self.m_idx, start, self.env.now - start)])
-        self.logger.info(f"{self.env.now} > BKD end: Machine {self.m_idx} repaired, delayed the production for {self.env.now - start} units")
+        if self.recorder.store is None:
+            self.breakdown_record.append([(self.m_idx, start, self.env.now - start)])
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_BKD_END, self.m_idx, -1))
+        if self.logger.isEnabledFor(INFO):
+            self.logger.info(f"{self.env.now} > BKD end: Machine {self.m_idx} repaired, delayed the production for {self.env.now - start} units")
 
 
     # a new job (instance) arrives
     def job_arrival(self, arriving_job: object):
         # add the job instance to queue
-        self.queue.append(arriving_job)
         arriving_job.after_arrival()
+        self.queue.append(arriving_job)
         # change the stocking status if machine is currently idle (empty stock or strategic)
         if not self.sufficient_stock.triggered:
             self.sufficient_stock.succeed()
-        common_msg = "{} > IN: Job {} arrived at Machine {}, current status {}, queue: {}".format(
-            self.env.now, arriving_job.j_idx, self.m_idx, self.status, [j.j_idx for j in self.queue])
-        extra_msg = ", scheduled next op/job: {}".format(self.next_job_in_schedule if self.next_job_in_schedule>0 else 'None')
-        self.logger.info(common_msg + extra_msg if self.schedule_mode else common_msg)
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_JOB_ARRIVED, self.m_idx, arriving_job.j_idx))
+        if self.logger.isEnabledFor(INFO):
+            common_msg = "{} > IN: Job {} arrived at Machine {}, current status {}, queue: {}".format(
+                self.env.now, arriving_job.j_idx, self.m_idx, self.status, [j.j_idx for j in self.queue])
+            extra_msg = ", scheduled next op/job: {}".format(self.next_job_in_schedule if self.next_job_in_schedule>0 else 'None')
+            self.logger.info(common_msg + extra_msg if self.schedule_mode else common_msg)
         # if schedule mode is ON, need to check if arrived job match the required job
         if self.schedule_mode:
             # check if arriving job matches the [next_job_in_schedule]
@@ -175,7 +229,8 @@ class Machine:
                 # if so, end strategic idleness and reactivate machine
                 if not self.required_job_in_queue_event.triggered:
                     self.required_job_in_queue_event.succeed()
-                    self.logger.info("{} > Str.Idle end: Machine {} reactivated".format(self.env.now, self.m_idx))
+                    if self.logger.isEnabledFor(INFO):
+                        self.logger.info("{} > Str.Idle end: Machine {} reactivated".format(self.env.now, self.m_idx))
 
 
     # suspend the machine if strategic idleness is needed
@@ -188,8 +243,11 @@ class Machine:
         else:
             self.status = "strategic_idle" # and change the status
             self.recorder.sqc_cnt_SI += 1
-            self.logger.info("{} > STR.IDL. on: Machine {} suspended, waiting for Job {}, current queue: {}".format(
-                self.env.now, self.m_idx, self.next_job_in_schedule, [j.j_idx for j in self.queue]))
+            if self.recorder.trace is not None:
+                self.recorder.trace.append((self.env.now, EV_STR_IDLE, self.m_idx, self.next_job_in_schedule))
+            if self.logger.isEnabledFor(INFO):
+                self.logger.info("{} > STR.IDL. on: Machine {} suspended, waiting for Job {}, current queue: {}".format(
+                    self.env.now, self.m_idx, self.next_job_in_schedule, [j.j_idx for j in self.queue]))
             self.required_job_in_queue_event = self.env.event()
 
 
@@ -202,11 +260,13 @@ class Machine:
 
     def after_decision(self) -> int:
         # get data of upcoming operation
-        expected_pt = self.picked_j_instance.remaining_pt[0] # the expected processing time
-        actual_pt = self.picked_j_instance.actual_remaining_pt[0] # the actual processing time in this stage, can be different from expected value
+        expected_pt = self.picked_j_instance.current_pt # the expected processing time
+        actual_pt = self.picked_j_instance.current_actual_pt # the actual processing time in this stage, can be different from expected value
         wait = self.env.now - self.picked_j_instance.arrival_T # time that job queued before being picked
         # record this decision/operation
         self.picked_j_instance.after_decision(self.m_idx, wait)
+        if self.recorder.trace is not None:
+            self.recorder.trace.append((self.env.now, EV_OP_BEGIN, self.m_idx, self.picked_j_instance.j_idx))
         # update status of picked job and machine
         self.release_T = self.env.now + expected_pt
         self.hidden_release_T = self.env.now + actual_pt # invisible to decision maker
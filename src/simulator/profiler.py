@@ -0,0 +1,159 @@
+'''
+Opt-in profiling of the hot phases of a simulation run (enabled by "profile" = True)
+The phases are timed by wrapping the methods of the instances of one shopfloor (see Profiler.instrument),
+a shopfloor without profiler runs the original methods and pays nothing.
+Time is kept by the stack of nested phases: the number of calls, the total time and the self time (total minus the nested phases).
+Phases timed inside a call (e.g. model build and solve of the scheduler backends) are added by the callee, see Profiler.add.
+The solver threads of central scheduler keep their own stacks, under the root "solver_thread" instead of "simulation".
+A profile is written as JSON, and as collapsed stacks ("simulation;job_transfer;job_arrival <self time in µs>" per line)
+that flame-graph tools (flamegraph.pl, speedscope, inferno) read as they are.
+'''
+# standard imports
+import functools
+import json
+from pathlib import Path
+from tabulate import tabulate
+import threading
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+
+class Profiler:
+    def __init__(self):
+        # number of calls, total and self time (s) by stack of phases, joined by ";"
+        self.stats:Dict[str, List[float]] = {}
+        self.lock = threading.Lock()
+        # stack of the running phases of every thread, a frame is [stack, begin time, time of nested phases]
+        self.local = threading.local()
+        self.main_thread = threading.current_thread()
+        # wall time of the profiled run, see start and stop
+        self.start_T:Optional[float] = None
+        self.stop_T:Optional[float] = None
+
+
+    def start(self):
+        self.start_T, self.stop_T = perf_counter(), None
+
+
+    def stop(self):
+        self.stop_T = perf_counter()
+
+
+    @property
+    def wall_T(self) -> float:
+        if self.start_T is None:
+            return 0.0
+        return (self.stop_T or perf_counter()) - self.start_T
+
+
+    def instrument(self, shopfloor):
+        '''
+        Wrap the hot methods of the machines, the event narrator, the central scheduler (if any) and the handlers of simulation logger
+        A decision by rule is timed in the queue (JobQueue.select), a heap queue orders its jobs on arrival instead
+        '''
+        for m in shopfloor.m_list:
+            if m.schedule_mode:
+                self.wrap(m, 'job_sequencing', "job_sequencing")
+            else:
+                self.wrap(m.queue, 'select', "job_sequencing")
+            self.wrap(m, 'after_operation', "job_transfer")
+            self.wrap(m, 'job_arrival', "job_arrival")
+        self.wrap(shopfloor.narrator, 'create_job', "job_creation")
+        if shopfloor.narrator.opt_mode:
+            for name in ('rebuild', 'solve_component', 'convert_to_schedule'):
+                self.wrap(shopfloor.narrator.central_scheduler, name, name)
+        for handler in shopfloor.logger.handlers:
+            self.wrap(handler, 'handle', "logging")
+
+
+    def wrap(self, obj:Any, attr:str, name:str):
+        # replace the method of instance by a timed one, its attributes (e.g. __name__ and priority_key of rules) are kept
+        func, enter, exit = getattr(obj, attr), self.enter, self.exit
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                exit()
+        setattr(obj, attr, timed)
+
+
+    def frames(self) -> list:
+        frames = getattr(self.local, 'frames', None)
+        if frames is None:
+            root = "simulation" if threading.current_thread() is self.main_thread else "solver_thread"
+            frames = self.local.frames = [[root, 0.0, 0.0]]
+        return frames
+
+
+    def enter(self, name:str):
+        frames = self.frames()
+        frames.append([frames[-1][0] + ";" + name, perf_counter(), 0.0])
+
+
+    def exit(self):
+        frames = self.frames()
+        stack, begin_T, nested_T = frames.pop()
+        elapsed = perf_counter() - begin_T
+        frames[-1][2] += elapsed
+        self.record(stack, elapsed, elapsed - nested_T)
+
+
+    def add(self, name:str, elapsed:float):
+        # a phase timed by the caller, nested in the running phase of this thread
+        frames = self.frames()
+        frames[-1][2] += elapsed
+        self.record(frames[-1][0] + ";" + name, elapsed, elapsed)
+
+
+    def record(self, stack:str, total_T:float, self_T:float):
+        with self.lock:
+            stat = self.stats.get(stack)
+            if stat is None:
+                self.stats[stack] = [1, total_T, self_T]
+            else:
+                stat[0] += 1
+                stat[1] += total_T
+                stat[2] += self_T
+
+
+    def stacks(self) -> Dict[str, dict]:
+        # the time of the main thread outside all phases (simpy kernel, processes of machines and narrator) is the self time of root
+        with self.lock:
+            stacks = {stack: {'calls': calls, 'total_T': total_T, 'self_T': self_T} for stack, (calls, total_T, self_T) in self.stats.items()}
+        nested_T = sum(stat['total_T'] for stack, stat in stacks.items() if stack.count(";") == 1 and stack.startswith("simulation;"))
+        stacks["simulation"] = {'calls': 1, 'total_T': self.wall_T, 'self_T': max(0.0, self.wall_T - nested_T)}
+        return stacks
+
+
+    def phases(self) -> Dict[str, dict]:
+        # totals by phase, over all stacks it appears in
+        phases = {}
+        for stack, stat in self.stacks().items():
+            name = stack.rsplit(";", 1)[-1]
+            phase = phases.setdefault(name, {'calls': 0, 'total_T': 0.0, 'self_T': 0.0})
+            for k in phase:
+                phase[k] += stat[k]
+        return phases
+
+
+    def summary(self) -> str:
+        wall_T = self.wall_T
+        rows = [["Phase", "Calls", "Total (s)", "Self (s)", "Per call (µs)", "Self / wall"]]
+        for name, phase in sorted(self.phases().items(), key = lambda item: -item[1]['self_T']):
+            per_call = round(phase['total_T'] / phase['calls'] * 1e6, 1) if name != "simulation" else "-"
+            rows.append([name if name != "simulation" else "simulation (other)", phase['calls'], round(phase['total_T'], 4), round(phase['self_T'], 4),
+                         per_call, "{:.1%}".format(phase['self_T'] / wall_T) if wall_T else "-"])
+        return tabulate(rows, headers="firstrow", tablefmt="grid")
+
+
+    def dump(self, json_path:Path, collapsed_path:Path):
+        stacks = self.stacks()
+        with open(json_path, "w") as f:
+            json.dump({'wall_T': self.wall_T, 'phases': self.phases(), 'stacks': stacks}, f, indent=1)
+        # self time in integer microseconds, the unit of flame graph is arbitrary
+        with open(collapsed_path, "w") as f:
+            for stack, stat in sorted(stacks.items()):
+                if round(stat['self_T'] * 1e6) > 0:
+                    f.write("{} {}\n".format(stack, round(stat['self_T'] * 1e6)))
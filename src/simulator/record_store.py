@@ -0,0 +1,149 @@
+"""
+Bounded-memory storage of simulation records, used by Recorder in streaming mode
+Running aggregates of the KPIs are kept in memory, the per-operation, per-job and breakdown records
+are buffered in fixed-size numpy chunks and appended to resizable, chunked HDF5 datasets
+"""
+
+import h5py
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+
+class RunningStat:
+    '''
+    Count, sum, max and variance (Welford's algorithm) of a stream of values
+    '''
+    __slots__ = ('count', 'sum', 'max', '_mean', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self.max = -np.inf
+        self._mean = 0.0
+        self._m2 = 0.0
+
+
+    def update(self, x:float):
+        self.count += 1
+        self.sum += x
+        if x > self.max:
+            self.max = x
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else np.nan
+
+    @property
+    def var(self) -> float:
+        # sample variance
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self.var)
+
+
+class ChunkedTable:
+    '''
+    Fixed-size buffer of rows that is appended to the datasets of an HDF5 group whenever it is full
+    '''
+    def __init__(self, group:h5py.Group, columns:Dict[str, np.dtype], chunk_size:int):
+        self.group = group
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.buffer = {name: np.zeros(chunk_size, dtype=dtype) for name, dtype in columns.items()}
+        for name, dtype in columns.items():
+            group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=dtype, chunks=(chunk_size,))
+
+
+    def append(self, *row):
+        for column, x in zip(self.buffer.values(), row):
+            column[self.size] = x
+        self.size += 1
+        if self.size == self.chunk_size:
+            self.flush()
+
+
+    def extend(self, rows:Dict[str, np.ndarray]):
+        # append several rows at once, given by column
+        n = len(next(iter(rows.values())))
+        if self.size + n > self.chunk_size:
+            self.flush()
+        if n > self.chunk_size:
+            self.write(rows, n)
+            return
+        for name, column in self.buffer.items():
+            column[self.size:self.size+n] = rows[name]
+        self.size += n
+        if self.size == self.chunk_size:
+            self.flush()
+
+
+    def flush(self):
+        if self.size:
+            self.write({name: column[:self.size] for name, column in self.buffer.items()}, self.size)
+            self.size = 0
+
+
+    def write(self, rows:Dict[str, np.ndarray], n:int):
+        for name, data in rows.items():
+            ds = self.group[name]
+            ds.resize((ds.shape[0] + n,))
+            ds[-n:] = data
+
+
+class RecordStore:
+    '''
+    HDF5 file of three tables:
+        operations: j_idx, m_idx, begin_T, actual_pt, wait, one row per operation, rows of a job are contiguous and in order
+        jobs: j_idx, tardiness, flowtime, completion_T
+        breakdowns: m_idx, begin_T, end_T
+    '''
+    OPERATIONS = {'j_idx': np.int64, 'm_idx': np.int64, 'begin_T': np.float64, 'actual_pt': np.float64, 'wait': np.float64}
+    JOBS = {'j_idx': np.int64, 'tardiness': np.float64, 'flowtime': np.float64, 'completion_T': np.float64}
+    BREAKDOWNS = {'m_idx': np.int64, 'begin_T': np.float64, 'end_T': np.float64}
+
+    def __init__(self, path:Union[str, Path], chunk_size:int = 65536):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = h5py.File(self.path, 'w')
+        self.operations = ChunkedTable(self.file.create_group('operations'), self.OPERATIONS, chunk_size)
+        self.jobs = ChunkedTable(self.file.create_group('jobs'), self.JOBS, chunk_size)
+        self.breakdowns = ChunkedTable(self.file.create_group('breakdowns'), self.BREAKDOWNS, chunk_size)
+
+
+    def close(self):
+        # flush the buffers, the file can only be read back after closing
+        if self.file is None:
+            return
+        for table in (self.operations, self.jobs, self.breakdowns):
+            table.flush()
+        self.file.close()
+        self.file = None
+
+
+    '''
+    Read back, in the same layout as the dictionaries of Recorder in memory mode
+    '''
+    def read_operations(self, j_idx:Optional[Iterable[int]] = None) -> Dict[int, List[list]]:
+        with h5py.File(self.path, 'r') as f:
+            ops = {name: f['operations'][name][()] for name in self.OPERATIONS}
+        mask = np.isin(ops['j_idx'], list(j_idx)) if j_idx is not None else slice(None)
+        records:Dict[int, List[list]] = {}
+        for j, m, begin, pt, wait in zip(*(ops[name][mask].tolist() for name in self.OPERATIONS)):
+            records.setdefault(j, []).append([m, begin, pt, wait])
+        return records
+
+
+    def read_breakdowns(self, m_no:int) -> Dict[int, List[list]]:
+        with h5py.File(self.path, 'r') as f:
+            bkd = {name: f['breakdowns'][name][()] for name in self.BREAKDOWNS}
+        records:Dict[int, List[list]] = {idx: [] for idx in range(m_no)}
+        for m, begin, end in zip(*(bkd[name].tolist() for name in self.BREAKDOWNS)):
+            records[m].append([begin, end])
+        return records
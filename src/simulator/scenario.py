@@ -0,0 +1,144 @@
+"""
+Pre-sampled problem instances (scenario tapes)
+All random features of a simulation run: job arrivals, trajectories, expected/actual processing time, due dates and machine breakdown calendars
+are drawn in one vectorized pass, saved to file, and replayed by Narrator without any re-sampling.
+Comparing several sequencing rules on one scenario therefore costs nothing but the simulation itself.
+
+usage: python -m src.simulator.scenario -o scenarios -seed 1 2 3 -m_no 10 -span 100000
+"""
+
+import argparse
+import h5py
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Union
+
+
+# simulation settings that define a scenario, they override the settings given to Shopfloor when the scenario is replayed
+CONFIG_KEYS = ('seed', 'm_no', 'span', 'E_utliz', 'pt_range', 'due_tightness', 'processing_time_variability', 'pt_cv',
+               'machine_breakdown', 'MTBF', 'MTTR', 'random_MTBF', 'random_MTTR')
+ARRAY_KEYS = ('arrival_interval', 'trajectory', 'pt_by_m_idx', 'actual_pt', 'due', 'bkd_interval', 'bkd_time')
+
+
+class Scenario:
+    def __init__(self, config:dict, **arrays):
+        self.config = config
+        self.arrival_interval: np.ndarray # (jobs,) interval between consecutive job arrivals
+        self.trajectory: np.ndarray # (jobs, m_no) machine index of operations
+        self.pt_by_m_idx: np.ndarray # (jobs, m_no) expected processing time, indexed by machine
+        self.actual_pt: np.ndarray # (jobs, m_no) actual processing time, indexed by operation
+        self.due: np.ndarray # (jobs,) due date
+        self.bkd_interval: np.ndarray # (m_no, cycles) time between breakdowns of each machine
+        self.bkd_time: np.ndarray # (m_no, cycles) down time of each breakdown
+        for k in ARRAY_KEYS:
+            setattr(self, k, arrays[k])
+
+
+    @property
+    def job_no(self) -> int:
+        return len(self.arrival_interval)
+
+
+    @classmethod
+    def generate(cls, seed:int, m_no:int, span:int, E_utliz:float, pt_range:list, due_tightness:float,
+                 processing_time_variability:bool = False, pt_cv:float = 0, machine_breakdown:bool = False,
+                 MTBF:float = 50, MTTR:float = 10, random_MTBF:bool = True, random_MTTR:bool = False, **kwargs) -> "Scenario":
+        '''
+        Draw a complete problem instance, follows the same distributions as Narrator and Job
+        '''
+        config = dict(seed = seed, m_no = m_no, span = span, E_utliz = E_utliz, pt_range = list(pt_range), due_tightness = due_tightness,
+                      processing_time_variability = processing_time_variability, pt_cv = pt_cv, machine_breakdown = machine_breakdown,
+                      MTBF = MTBF, MTTR = MTTR, random_MTBF = random_MTBF, random_MTTR = random_MTTR)
+        rng = np.random.default_rng(seed = seed)
+        # 1. job arrivals
+        _beta = np.average(pt_range) / E_utliz
+        total_no = np.round(span / _beta).astype(int)
+        arrival_interval = rng.exponential(_beta, total_no).round()
+        arrival_T = np.cumsum(arrival_interval)
+        # 2. trajectories and processing time
+        trajectory = rng.permuted(np.tile(np.arange(m_no), (total_no, 1)), axis=1)
+        pt_by_m_idx = rng.integers(low = pt_range[0], high = pt_range[1]+1, size = (total_no, m_no))
+        pt_by_ops = np.take_along_axis(pt_by_m_idx, trajectory, axis=1)
+        if processing_time_variability and pt_cv > 0:
+            actual_pt = np.around(rng.normal(pt_by_ops, pt_by_ops*pt_cv), decimals=1).clip(*pt_range)
+        else:
+            actual_pt = pt_by_ops.astype(np.float64)
+        due = np.round(pt_by_m_idx.sum(axis=1) * rng.uniform(1.2, due_tightness, total_no) + arrival_T)
+        # 3. breakdown calendars, enough cycles to cover the span with a wide margin
+        cycles = int(np.ceil(2 * span / max(MTBF, 1))) + 20 if machine_breakdown else 0
+        if random_MTBF:
+            bkd_interval = np.around(rng.exponential(MTBF, (m_no, cycles)), decimals = 1)
+        else:
+            bkd_interval = np.full((m_no, cycles), MTBF, dtype=np.float64)
+        if random_MTTR:
+            bkd_time = np.around(rng.uniform(MTTR * 0.5, MTTR * 1.5, (m_no, cycles)), decimals = 1)
+        else:
+            bkd_time = np.full((m_no, cycles), MTTR, dtype=np.float64)
+        return cls(config, arrival_interval = arrival_interval, trajectory = trajectory, pt_by_m_idx = pt_by_m_idx,
+                   actual_pt = actual_pt, due = due, bkd_interval = bkd_interval, bkd_time = bkd_time)
+
+
+    def save(self, path:Union[str, Path]) -> Path:
+        '''
+        Save as .npz, or as .h5 with contiguous datasets that can be memory-mapped by load
+        '''
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {k: getattr(self, k) for k in ARRAY_KEYS}
+        if path.suffix == '.npz':
+            np.savez(path, config = json.dumps(self.config), **arrays)
+        elif path.suffix in ('.h5', '.hdf5'):
+            with h5py.File(path, 'w') as f:
+                f.attrs['config'] = json.dumps(self.config)
+                for k, v in arrays.items():
+                    f.create_dataset(k, data = np.ascontiguousarray(v))
+        else:
+            raise ValueError(f"Unsupported scenario file type: {path.suffix}, use .npz or .h5")
+        return path
+
+
+    @classmethod
+    def load(cls, path:Union[str, Path], mmap:bool = True) -> "Scenario":
+        '''
+        HDF5 datasets are memory-mapped (read-only) if possible, so that parallel replays share the same pages
+        '''
+        path = Path(path)
+        if path.suffix == '.npz':
+            with np.load(path) as f:
+                return cls(json.loads(str(f['config'])), **{k: f[k] for k in ARRAY_KEYS})
+        with h5py.File(path, 'r') as f:
+            config = json.loads(f.attrs['config'])
+            arrays:Dict[str, np.ndarray] = {}
+            for k in ARRAY_KEYS:
+                ds = f[k]
+                offset = ds.id.get_offset()
+                # empty or non-contiguous datasets have no offset, read them to memory
+                if mmap and offset is not None and ds.size > 0:
+                    arrays[k] = np.memmap(path, dtype = ds.dtype, mode = 'r', offset = offset, shape = ds.shape)
+                else:
+                    arrays[k] = ds[()]
+        return cls(config, **arrays)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a corpus of scenarios')
+    parser.add_argument('-o', '--output', default='scenarios', help='Output directory')
+    parser.add_argument('-format', default='h5', choices=['h5', 'npz'], help='File format')
+    parser.add_argument('-seed', nargs='+', default=[1], type=int, help='Random seeds, one scenario per seed')
+    parser.add_argument('-m_no', default=5, type=int, help='Number of Machines in system')
+    parser.add_argument('-span', default=1000, type=int, help='Length of simulation')
+    parser.add_argument('-utl', '--E_utliz', default=0.6, type=float, help='Expected system utilization rate')
+    parser.add_argument('-dt', '--due_tightness', default=2, type=float, help='Due time tightness')
+    parser.add_argument('-pt_r', '--pt_range', default=[1,10], nargs=2, type=int, help='Range of processing time')
+    parser.add_argument('-pt_v', '--processing_time_variability', default=False, action='store_true', help='Non-deterministic processing time')
+    parser.add_argument('-pt_cv', default=0.1, type=float, help='Coefficiency of variance of processing time')
+    parser.add_argument('-mbkd', '--machine_breakdown', default=True, action='store_false', help='Disable machine breakdown')
+    parser.add_argument('-mtbf', '--MTBF', default=50, type=float, help='Mean time between failure')
+    parser.add_argument('-mttr', '--MTTR', default=10, type=float, help='Mean time to repair')
+    parser.add_argument('-rnd_mttr', '--random_MTTR', default=False, action='store_true', help='Use random MTTR')
+    args = vars(parser.parse_args())
+    output, file_format, seeds = Path(args.pop('output')), args.pop('format'), args.pop('seed')
+    for seed in seeds:
+        path = Scenario.generate(seed = seed, **args).save(output / f"m{args['m_no']}_span{args['span']}_seed{seed}.{file_format}")
+        print(f"Scenario saved to {path}")
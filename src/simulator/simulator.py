@@ -3,19 +3,26 @@
 # standard imports
 import logging.config
 import multiprocessing as mp
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import simpy
 import time
 import traceback
+from typing import List, Literal, Optional, Tuple
 
 # Project modules
 from .event import *
 from .exc import *
 from .job import *
+from .kernel import HeapEnvironment, HeapMachine, HeapNarrator
 from .machine import *
+from .profiler import Profiler
+from .scenario import Scenario
+from .snapshot import Snapshot
+from ..DRL.broker import DecisionBroker
 from ..scheduler.sequencing_rule import SequencingMethod
-from ..utilities import create_logger, setup_logger, draw_gantt_chart
+from ..utilities import LOG_DIR, create_logger, prune_logs, setup_logger, draw_gantt_chart
 
 
 class Simulator:
@@ -27,63 +34,148 @@ class Simulator:
         spf.run_simulation()
 
 
-class SimulatorMultiThread:
-    def __init__(self, **kwargs) -> None:
-        if kwargs['multi_thread'] == False:
-            spf = Shopfloor(**kwargs)
-            spf.run_simulation()
+    @classmethod
+    def replicate(cls, seeds:List[int], sqc_methods:List[str], processes:Optional[int] = None, **kwargs) -> pd.DataFrame:
+        '''
+        Run every (sequencing method, seed) combination in a pool of worker processes
+        Each worker builds its own Shopfloor and logs to its own sub-directory of the log directory
+        Return one row of performance per run, with the seed that the run actually used (a scenario replays its own)
+        Seed 0 is rejected: a run draws a random seed for it, the methods would not be compared on the same workload
+        '''
+        if 0 in seeds:
+            raise InvalidRequestError("Seed 0 draws a random seed in every run, replications need seeds from 1")
+        # no plotting and no interaction in workers
+        kwargs.update(draw_gantt = 0, save_gantt = False, stream = False, headless = True)
+        tasks = [(sqc_method, seed, LOG_DIR / f"{sqc_method}_seed{seed}", kwargs) for sqc_method in sqc_methods for seed in seeds]
+        prune_logs()
+        processes = min(processes or mp.cpu_count(), len(tasks))
+        if processes > 1:
+            with mp.Pool(processes) as pool:
+                results = list(pool.imap_unordered(replication_worker, tasks, chunksize=1))
         else:
-            # disable plotting
-            kwargs['draw_gantt'] = False
-            # create multiple threads
-            spf_dict = {}
-            sim_thread_dict = {}
-            spfPool = mp.Pool(kwargs['thread_no'])
-            for idx in range(1, kwargs['thread_no'] + 1):
-                spf_dict[idx] = Shopfloor(thread_idx = idx, **kwargs)
-                sim_thread_dict[idx] = mp.Process(target=spf_dict[idx].run_simulation)
-                sim_thread_dict[idx].start()
+            results = [replication_worker(task) for task in tasks]
+        return pd.DataFrame(results).sort_values(['sqc_method', 'seed'], ignore_index=True)
+
+
+def replication_worker(task:Tuple[str, int, Path, dict]) -> dict:
+    sqc_method, seed, log_dir, kwargs = task
+    config = dict(kwargs, seed = seed, sqc_method = getattr(SequencingMethod, sqc_method), log_dir = log_dir)
+    _start_T = time.time()
+    spf = Shopfloor(**config)
+    spf.run_simulation()
+    return {'sqc_method': sqc_method, 'seed': spf.narrator.seed, 'succeeded': spf.succeeded,
+            **spf.performance(), 'wall_time': time.time() - _start_T}
 
 
 class Shopfloor:
-    def __init__(self, **kwargs):
+    def __init__(self, engine:Literal["simpy", "heap"] = "simpy", **kwargs):
         # STEP 1. important features shared by all machine and job instances
-        self.env = simpy.Environment()
+        # the simpy engine supports all sequencing methods, the array-backed event heap supports only rule-based sequencing
+        if engine == "simpy":
+            if kwargs['sqc_method'] == SequencingMethod.Rollout:
+                raise InvalidRequestError("Rollout needs to copy the running simulation, use the heap engine instead")
+            self.env = simpy.Environment()
+            machine_cls, narrator_cls = Machine, Narrator
+        elif engine == "heap":
+            if kwargs['sqc_method'] in (SequencingMethod.GurobiOptimizer, SequencingMethod.ORTools, SequencingMethod.GifflerThompson, SequencingMethod.TabuSearch):
+                raise InvalidRequestError(f"Heap engine does not support {kwargs['sqc_method'].__name__}, use the simpy engine instead")
+            self.env = HeapEnvironment()
+            machine_cls, narrator_cls = HeapMachine, HeapNarrator
+        else:
+            raise InvalidRequestError(f"Unknown simulation engine: {engine}")
+        # replay a pre-sampled scenario (instance or file path), its settings override the given ones
+        if kwargs.get('scenario') is not None:
+            if not isinstance(kwargs['scenario'], Scenario):
+                kwargs['scenario'] = Scenario.load(kwargs['scenario'])
+            kwargs.update(kwargs['scenario'].config)
+        self.engine = engine
         self.kwargs = kwargs
         # initialize the logger
-        self.logger = setup_logger(stream=kwargs['stream'])
+        self.logger = setup_logger(stream=kwargs['stream'], quiet=kwargs.get('quiet', False), log_dir=kwargs.get('log_dir'))
+        # streaming mode of recorder, records are written next to the log file unless a file is specified
+        if kwargs.get('stream_records') and not kwargs.get('record_file'):
+            kwargs['record_file'] = Path(self.logger.handlers[0].baseFilename).parent / "records.h5"
+        # timers of the hot phases shared by all other objects if profiling is on, see profiler
+        if kwargs.get('profile') and kwargs['sqc_method'] == SequencingMethod.Rollout:
+            raise InvalidRequestError("Rollout copies the running simulation by snapshot, a profiled shopfloor can not be copied")
+        self.profiler = kwargs['profiler'] = Profiler() if kwargs.get('profile') else None
         # create the recorder object that shared by all other objects
         self.recorder = Recorder(**kwargs) 
         # STEP 2. create machines
         self.m_list = []
         self.logger.debug(f"Creating {kwargs['m_no']} machines on shopfloor ")
         for i in range(kwargs['m_no']):
-            self.m_list.append(Machine(env = self.env, logger = self.logger, recorder = self.recorder, m_idx = i, **kwargs))
+            self.m_list.append(machine_cls(env = self.env, logger = self.logger, recorder = self.recorder, m_idx = i, shopfloor = self, **kwargs))
         # STEP 3. create the event narrator of dynamic events
-        self.logger.debug(f"Initializing event narrator, machine breakdown: {kwargs['machine_breakdown']}, processing time variability: {kwargs['processing_time_variability']}")
-        self.narrator = Narrator(env = self.env, logger = self.logger, recorder = self.recorder, m_list = self.m_list, **kwargs)
+        self.logger.debug(f"Initializing event narrator ({engine} engine), machine breakdown: {kwargs['machine_breakdown']}, processing time variability: {kwargs['processing_time_variability']}")
+        self.narrator = narrator_cls(env = self.env, logger = self.logger, recorder = self.recorder, m_list = self.m_list, **kwargs)
+        if self.profiler is not None:
+            self.profiler.instrument(self)
 
     
     def run_simulation(self):
+        self.succeeded = False
         try:
             self.verify_simulation_setting()
             _start_T = time.time()
             self.logger.info("Simulation starts at: {}".format(time.strftime("%Y-%m-%d, %H:%M:%S")))
-            self.env.run(until=self.kwargs['span']+1000)
+            if self.profiler is not None:
+                self.profiler.start()
+            if self.kwargs['sqc_method'] == SequencingMethod.DRL_scheduler:
+                # decisions of DRL scheduler are served in batches by the policy, see DRL.broker
+                self.broker = DecisionBroker(self.kwargs['policy'], self.kwargs['m_no'], max_queue = self.kwargs.get('max_queue', 16),
+                                             batched = self.kwargs.get('batched_inference', True))
+                self.broker.run(self, until=self.kwargs['span']+1000)
+            else:
+                self.env.run(until=self.kwargs['span']+1000)
+            if self.profiler is not None:
+                self.profiler.stop()
             self.logger.info("Simulation elapsed after {}s".format(round(time.time()-_start_T,5)))
             self.narrator.post_simulation()
             # whether to plot the gantt chart
             if "draw_gantt" in self.kwargs and self.kwargs['draw_gantt'] > 0:
                 draw_gantt_chart(self.logger, self.recorder, **self.kwargs)
+            self.succeeded = True
         except Exception as e:
             self.logger.error(f"Simulation failed due to following exception:\n{str(traceback.format_exc())}")
+            self.recorder.dump_trace(self.logger)
+        finally:
+            # flush the buffered records in streaming mode, most needed when the simulation failed (no-op if already closed)
+            self.recorder.close_store()
 
     
     def verify_simulation_setting(self):
+        # decisions of DRL scheduler are given by a policy, or by an agent stepping the shopfloor (src.DRL.vec_env.ShopfloorVecEnv)
+        if self.kwargs['sqc_method'] == SequencingMethod.DRL_scheduler and self.kwargs.get('policy') is None:
+            raise InvalidRequestError("DRL_scheduler needs a policy to make the decisions, or an agent stepping the shopfloor, use src.DRL.vec_env.ShopfloorVecEnv")
         # check for clash between randomness and use of optimization
         occ_variability = self.kwargs['random_MTTR'] or self.kwargs['processing_time_variability']
-        if occ_variability and (self.kwargs['sqc_method'] == SequencingMethod.opt_scheduler):
+        if occ_variability and (self.kwargs['sqc_method'] in (SequencingMethod.GurobiOptimizer, SequencingMethod.ORTools, SequencingMethod.GifflerThompson, SequencingMethod.TabuSearch)):
+            if self.kwargs.get('headless', False):
+                self.logger.warning("Machine occupation time variance enabled when using optimization algorithm-based scheduler! Processing time variance: {}, Random MTTR: {}".format(
+                    self.kwargs['processing_time_variability'], self.kwargs['random_MTTR']))
+                return
             Input = input("WARNING: Machine occupation time variance enabled when using optimization algorithm-based scheduler! Processing time variance: {}, Random MTTR: {}.\nDo you still want to proceed? [Y/N]: ".format(
                 self.kwargs['processing_time_variability'], self.kwargs['random_MTTR']))
             if Input != "Y":
-                exit()
\ No newline at end of file
+                exit()
+
+
+    def snapshot(self, history:bool = False) -> Snapshot:
+        # state of the simulation that can be restored into runnable copies, heap engine only
+        return Snapshot(self, history)
+
+
+    def performance(self) -> dict:
+        # key performance indicators of the jobs completed so far
+        tardiness, flowtime = self.recorder.tardiness_stat, self.recorder.flowtime_stat
+        completed = tardiness.count
+        last_T = getattr(self.recorder, 'last_job_comp_T', 0)
+        return {
+            'jobs': completed,
+            'mean_tardiness': tardiness.mean,
+            'max_tardiness': tardiness.max if completed else np.nan,
+            'mean_flowtime': flowtime.mean,
+            'max_flowtime': flowtime.max if completed else np.nan,
+            'utilization': sum(m.cumulative_runtime for m in self.m_list) / len(self.m_list) / last_T if last_T else np.nan,
+            }
@@ -0,0 +1,80 @@
+'''
+Snapshot of a running simulation, to fork it and simulate candidate decisions ahead (see SequencingMethod.Rollout)
+The simpy processes are generators that can not be copied, but the heap engine keeps the whole simulation state
+(event heap, machines, queues, jobs in system and their table, breakdown state, random generator) in plain objects.
+A snapshot pickles the shopfloor into bytes, and every restore unpickles an independent and runnable copy.
+Read-only objects are shared with the copies instead of pickled: the loggers, functions (e.g. the priority keys of queues),
+and the settings given to the shopfloor (scenario, sequencing method, policy).
+The completed history (operation, tardiness and breakdown records) is dropped unless required, so the size of a snapshot
+is bounded by the work-in-process, a copy in streaming mode keeps its records in memory.
+'''
+# standard imports
+import io
+import logging
+import pickle
+from typing import Any, Dict
+# project modules
+from .exc import *
+
+
+# loggers of the copies, silenced
+CLONE_LOGGER = logging.getLogger("snapshot")
+CLONE_LOGGER.disabled = True
+
+
+class Snapshot:
+    def __init__(self, shopfloor, history:bool = False):
+        if shopfloor.engine != "heap":
+            raise InvalidRequestError(f"Snapshot needs the heap engine, processes of the {shopfloor.engine} engine can not be copied")
+        if shopfloor.profiler is not None:
+            raise InvalidRequestError("Snapshot of a profiled shopfloor is not supported, its methods are wrapped by the profiler")
+        recorder = shopfloor.recorder
+        self.now = shopfloor.env.now
+        self.m_no = len(shopfloor.m_list)
+        # shared objects, by id
+        self.shared:Dict[int, Any] = {id(v): v for v in shopfloor.kwargs.values() if not isinstance(v, (int, float, str, type(None)))}
+        for obj in [shopfloor.logger, shopfloor.narrator.logger] + [m.logger for m in shopfloor.m_list]:
+            self.shared[id(obj)] = obj
+        for m in shopfloor.m_list:
+            if getattr(m.queue, 'priority_key', None) is not None:
+                self.shared[id(m.queue.priority_key)] = m.queue.priority_key
+        # persistent ids of the shared objects, and of the objects that are replaced in the copies
+        persistent_ids:Dict[int, Any] = {i: i for i in self.shared}
+        if recorder.store is not None:
+            persistent_ids[id(recorder.store)] = 'none'
+        if not history:
+            persistent_ids.update({id(d): 'dict' for d in (recorder.j_operation_dict, recorder.j_tardiness_dict, recorder.j_flowtime_dict)})
+            persistent_ids[id(recorder.m_bkd_dict)] = 'bkd_dict'
+            persistent_ids.update({id(m.breakdown_record): 'list' for m in shopfloor.m_list})
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+        # called for every pickled object, kept to a single lookup
+        pickler.persistent_id = lambda obj: persistent_ids.get(id(obj))
+        pickler.dump(shopfloor)
+        self.data = buffer.getvalue()
+
+
+    def __len__(self) -> int:
+        # size in bytes
+        return len(self.data)
+
+
+    def restore(self, quiet:bool = True):
+        '''
+        Rebuild an independent copy of the shopfloor at the time of snapshot, messages of the copy are silenced if quiet
+        '''
+        shared = self.shared
+        unpickler = pickle.Unpickler(io.BytesIO(self.data))
+        def persistent_load(pid):
+            if pid == 'none':
+                return None
+            if pid == 'dict':
+                return {}
+            if pid == 'list':
+                return []
+            if pid == 'bkd_dict':
+                return {idx: [] for idx in range(self.m_no)}
+            obj = shared[pid]
+            return CLONE_LOGGER if quiet and isinstance(obj, logging.Logger) else obj
+        unpickler.persistent_load = persistent_load
+        return unpickler.load()
@@ -0,0 +1,28 @@
+"""
+In-memory ring buffer of structured simulation events (time, event code, machine index, job index)
+Kept by the Recorder when "trace_capacity" is specified, and dumped to the log directory if the simulation fails
+"""
+
+from collections import deque
+from pathlib import Path
+
+
+# event codes
+(EV_JOB_CREATED, EV_JOB_ARRIVED, EV_OP_BEGIN, EV_OP_END, EV_JOB_COMPLETED,
+ EV_IDLE_BEGIN, EV_IDLE_END, EV_BKD_BEGIN, EV_BKD_END, EV_STR_IDLE) = range(10)
+EVENT_NAMES = ("JOB_CREATED", "JOB_ARRIVED", "OP_BEGIN", "OP_END", "JOB_COMPLETED",
+               "IDLE_BEGIN", "IDLE_END", "BKD_BEGIN", "BKD_END", "STR_IDLE")
+
+
+class EventTrace(deque):
+    # append is deque's own C method, the oldest events are discarded once the capacity is reached
+    def __init__(self, capacity:int):
+        super().__init__(maxlen=capacity)
+
+
+    def dump(self, path:Path) -> Path:
+        with open(path, "w") as f:
+            f.write("time\tevent\tm_idx\tj_idx\n")
+            for T, code, m_idx, j_idx in self:
+                f.write(f"{T}\t{EVENT_NAMES[code]}\t{m_idx}\t{j_idx}\n")
+        return path
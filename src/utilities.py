@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 # Author: Liu Renke
+import copy
 from datetime import datetime as dt
 import json
 import logging
@@ -52,7 +53,7 @@ LOG_CONFIG = {
     }
 }
 
-def setup_logger(stream:bool=True, keep:int=10):
+def prune_logs(keep:int=10):
     # verify log directories
     LOG_DIR.mkdir(parents=True, exist_ok=True)
     # prune obsolete log folders from root logging directory
@@ -64,10 +65,24 @@ def setup_logger(stream:bool=True, keep:int=10):
         if folder not in folders_to_keep:
             folder_path = LOG_ROOT_DIR / folder
             shutil.rmtree(folder_path)
-    # restart all loggers
+
+
+def setup_logger(stream:bool=True, quiet:bool=False, log_dir:Optional[Path]=None, keep:int=10):
+    # a specific directory can be given to separate the logs of parallel runs, the caller is responsible for pruning in this case
+    if log_dir is None:
+        log_dir = LOG_DIR
+        prune_logs(keep)
+    else:
+        log_dir.mkdir(parents=True, exist_ok=True)
+    # restart all loggers, work on a copy so that the shopfloors created later in the same process get the full config
+    log_config = copy.deepcopy(LOG_CONFIG)
+    log_config['handlers']['sim_log_file']['filename'] = log_dir/"sim.log"
     if not stream:
-        LOG_CONFIG['loggers']['sim_logger']['handlers'].pop(1) # remove the streaming handler
-    dictConfig(LOG_CONFIG)
+        log_config['loggers']['sim_logger']['handlers'].pop(1) # remove the streaming handler
+    # quiet (production) mode, per-event info and debug messages are not even built
+    if quiet:
+        log_config['loggers']['sim_logger']['level'] = "WARNING"
+    dictConfig(log_config)
     return logging.getLogger("sim_logger")
 
 
@@ -127,7 +142,7 @@ def draw_gantt_chart(logger, recorder, **kwargs):
     '''
     PART A. jobs' operation history
     '''
-    op_data = recorder.j_operation_dict
+    op_data = recorder.operation_records()
     for x in op_data.items():
         j_idx = x[0] 
         op_history = x[1]
@@ -144,7 +159,7 @@ def draw_gantt_chart(logger, recorder, **kwargs):
     '''
     PART B. 
     '''
-    bkd_data = recorder.m_bkd_dict
+    bkd_data = recorder.breakdown_records()
     for x in bkd_data.items():
         m_idx = x[0] 
         bkd_history = x[1]